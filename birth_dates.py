@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+出生日期解析与年龄计算
+抓取时只解析并保存出生日期 (ISO格式 YYYY-MM-DD，只知道年份时为 YYYY)，
+年龄在导出时按当天日期计算，选手过生日后无需重新抓取。
+"""
+import calendar
+import re
+from datetime import date
+from typing import Optional
+
+from config import VALIDATION_RULES
+
+UNKNOWN_AGE = "未知年龄"
+
+# 英文月份全称与缩写 -> 月份数字
+_MONTHS = {name.lower(): i for i, name in enumerate(calendar.month_name) if name}
+_MONTHS.update({name.lower(): i for i, name in enumerate(calendar.month_abbr) if name})
+_MONTHS['sept'] = 9
+
+_ISO_PATTERN = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')
+_CHINESE_PATTERN = re.compile(r'(\d{4})\s*年\s*(\d{1,2})\s*月\s*(\d{1,2})\s*日')
+_MONTH_FIRST_PATTERN = re.compile(r'([A-Za-z]+)\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})')
+_DAY_FIRST_PATTERN = re.compile(r'(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]+)\.?,?\s+(\d{4})')
+_SLASH_PATTERN = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})')  # MM/DD/YYYY
+_YEAR_PATTERN = re.compile(r'(?<!\d)(\d{4})(?!\d)')
+
+
+def _to_iso(year: int, month: int, day: int) -> str:
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return ""
+
+
+def parse_birth_date(text: str) -> str:
+    """
+    从信息框文本中解析出生日期，如 "October 2, 1997 (age 28)" -> "1997-10-02"
+    只能识别出年份时返回 "YYYY"，无法识别返回空字符串
+    """
+    if not text:
+        return ""
+
+    match = _ISO_PATTERN.search(text)
+    if match:
+        return _to_iso(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+
+    match = _CHINESE_PATTERN.search(text)
+    if match:
+        return _to_iso(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+
+    match = _MONTH_FIRST_PATTERN.search(text)
+    if match and match.group(1).lower() in _MONTHS:
+        return _to_iso(int(match.group(3)), _MONTHS[match.group(1).lower()], int(match.group(2)))
+
+    match = _DAY_FIRST_PATTERN.search(text)
+    if match and match.group(2).lower() in _MONTHS:
+        return _to_iso(int(match.group(3)), _MONTHS[match.group(2).lower()], int(match.group(1)))
+
+    match = _SLASH_PATTERN.search(text)
+    if match:
+        return _to_iso(int(match.group(3)), int(match.group(1)), int(match.group(2)))
+
+    match = _YEAR_PATTERN.search(text)
+    return match.group(1) if match else ""
+
+
+def age_on(birth_date: str, today: Optional[date] = None) -> Optional[int]:
+    """按出生日期计算某天的周岁年龄；只有年份时按年份差近似"""
+    if not birth_date:
+        return None
+    today = today or date.today()
+    try:
+        if len(birth_date) == 4:
+            return today.year - int(birth_date)
+        born = date.fromisoformat(birth_date)
+    except ValueError:
+        return None
+    return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+
+
+def age_text(birth_date: str, fallback: str = UNKNOWN_AGE, today: Optional[date] = None) -> str:
+    """导出用的年龄文本，超出合理范围或没有出生日期时返回 fallback"""
+    age = age_on(birth_date, today)
+    if age is None or not VALIDATION_RULES['min_age'] <= age <= VALIDATION_RULES['max_age']:
+        return fallback
+    return str(age)
@@ -67,11 +67,17 @@ DATA_SOURCES = {
             'Asia': 'Portal:Players/Asia',
             'Africa & Middle East': 'Portal:Players/Africa_&_Middle_East'
         },
+        # 转会门户页面 (players_updater.py --transfers)
+        'transfer_pages': ['Portal:Transfers'],
         'enabled': True
     },
     'hltv': {
         'base_url': 'https://www.hltv.org',
         'stats_url': 'https://www.hltv.org/stats/players',
+        'top_n': 500,  # 抓取统计表的前N名，可大于500
+        'page_size': 100,  # 统计表每页行数
+        'min_rating': None,  # 只抓取Rating不低于此值的选手页面 (None表示不过滤)
+        'min_maps': None,  # 只抓取地图数不低于此值的选手页面
         'enabled': True
     },
     'famous_players': {
@@ -109,7 +115,8 @@ LOGGING_CONFIG = {
     'format': '%(asctime)s - %(levelname)s - %(message)s',
     'log_file': 'crawler.log',
     'max_file_size': 10 * 1024 * 1024,  # 10MB
-    'backup_count': 5
+    'backup_count': 5,
+    'json_format': False  # 日志文件使用JSON Lines格式
 }
 
 # 错误处理配置
@@ -127,6 +134,7 @@ DATA_CLEANING = {
     'remove_wiki_links': True,
     'normalize_whitespace': True,
     'strip_quotes': True,
+    'unicode_form': 'NFKC',  # Unicode规范化 (全角字母、兼容字符)，None 表示不做
     'normalize_roles': True,
     'role_mapping': {
         'rifler/awper': 'Rifler',
@@ -138,4 +146,109 @@ DATA_CLEANING = {
         'support': 'Support',
         'lurker': 'Lurker'
     }
-} 
\ No newline at end of file
+}
+
+# 自适应超时配置 (request_guard.AdaptiveTimeout)
+TIMEOUT_CONFIG = {
+    'default': (5.0, 15.0),  # 样本不足时的 (连接, 读取) 超时(秒)
+    'floor': (1.0, 2.0),  # 超时下限
+    'ceiling': (10.0, 30.0),  # 超时上限
+    'percentile': 99,  # 按该百分位的观测延迟计算超时
+    'multiplier': 1.5,  # 超时 = 百分位延迟 x 倍数
+    'min_samples': 10,  # 某主机样本少于此数时使用默认超时
+    'window': 200,  # 每个主机保留最近的样本数
+    'run_deadline': None,  # 整次运行最多花费的秒数 (None表示不限)，可用 --deadline 覆盖
+}
+
+# 内存上限配置 (optimized_crawler.py --max-rss)
+MEMORY_CONFIG = {
+    'max_rss_mb': None,  # 常驻内存上限(MB)，None表示不限，可用 --max-rss 覆盖
+    'link_queue_size': 200,  # 地区列表页 -> 选手页面 之间最多缓冲的链接数
+    'check_interval': 1.0,  # 两次读取RSS的最小间隔(秒)
+}
+
+# 缓存配置
+CACHE_CONFIG = {
+    'cache_dir': 'cache',
+    'negative_cache_file': 'negative_cache.json',
+    'negative_ttl': 24 * 3600,  # 首次确认缺失后的缓存时间(秒)
+    'negative_max_ttl': 30 * 24 * 3600,  # 多次确认缺失后TTL翻倍，最长不超过此值
+    'title_cache_file': 'title_cache.json',
+    'team_title_cache_file': 'team_title_cache.json',  # 队伍页面的规范标题 (与选手标题分开缓存)
+    'title_ttl': 7 * 24 * 3600,  # 规范标题的缓存时间(秒)
+    'missing_title_ttl': 24 * 3600,  # 不存在/消歧义标题的缓存时间(秒)
+    'hltv_stats_file': 'hltv_stats.json',
+    'refresh_history_file': 'refresh_history.json',
+    'download_stats_file': 'download_stats.json',
+    'team_registry_file': 'teams.json',  # 队伍维度表 (ID、规范名称、别名)
+    'cookie_file': 'cookies.lwp',  # Cloudflare 验证Cookie
+    'session_cookie_ttl': 12 * 3600,  # 没有过期时间的会话Cookie保留时间(秒)
+    'parse_cache_file': 'parse_cache.json',  # {正文哈希: 信息框字段}，页面没变时跳过解析
+    'parse_cache_max_entries': 20000,  # 超出后淘汰最久未使用的条目
+    'transfer_feed_file': 'transfer_feed.json',  # 转会动态的高水位
+}
+
+# 按队伍刷新配置 (players_updater.py --by-team)
+TEAM_ROSTER_CONFIG = {
+    'min_players': 2,  # 名单中至少有这么多名队员时才请求队伍页面，否则逐个刷新
+}
+
+# 本地角色库配置
+ROLE_DATABASE_CONFIG = {
+    'file': 'player_roles.json',  # {"players": {选手: 角色}, "aliases": {别名: 选手}}
+    'reload_check_interval': 5,  # 检查文件是否被修改的最小间隔(秒)
+}
+
+# 本地只读数据服务配置 (player_api.py)
+API_CONFIG = {
+    'host': '127.0.0.1',
+    'port': 8600,
+    'snapshot_file': 'output/updated_players.csv',
+    'reload_check_interval': 5,  # 检查快照文件是否更新的间隔(秒)
+}
+
+# 更新器守护进程配置 (players_updater.py --daemon)
+DAEMON_CONFIG = {
+    'cycle_seconds': 24 * 3600,  # 把全部选手刷新一遍的目标时长，刷新均匀分散在这段时间内(秒)
+    'max_requests_per_hour': 600,  # 每小时最多向Liquipedia发送的请求数
+    'snapshot_interval': 10 * 60,  # 有数据变化时写出快照的间隔(秒)
+}
+
+# 多来源合并配置 (record_merge.py)
+MERGE_CONFIG = {
+    # 同一字段都有有效值时优先采用的来源 (数值越大越优先)，优先级相同时取抓取时间较新的
+    'source_precedence': {
+        'Liquipedia': 3,  # 地区页面直接链接的选手页
+        'Famous': 2,
+        'HLTV': 1,  # HLTV统计表中的选手，部分只有HLTV搜索结果
+    },
+}
+
+# 抓取存档配置 (--warc / reparse.py)
+WARC_CONFIG = {
+    'directory': 'cache/warc',
+    'max_file_size': 32 * 1024 * 1024,  # 单个 .warc.gz 文件的大小上限，超过后换新文件
+    'reparse_chunk_records': 64,  # reparse.py 每个任务处理的记录数 (按记录切分，单个文件也能并行)
+}
+
+# 页面抓取配置
+FETCH_CONFIG = {
+    'lean_fetch': True,  # 通过 api.php?action=parse&section=0 只获取信息框所在的首段
+    'full_page_estimate_bytes': 400 * 1024,  # 没有完整页面样本时用于估算节省的字节数
+    'stream_full_page': True,  # 抓取完整页面时边下载边解析，信息框读完即断开连接
+    'stream_chunk_size': 16 * 1024,
+    'estimated_latency': 0.8,  # --plan 估算耗时时假设的单次请求耗时(秒)
+}
+
+# 刷新优先级调度配置
+SCHEDULER_CONFIG = {
+    'staleness_horizon': 7 * 24 * 3600,  # 超过此时间未刷新视为完全过期(秒)
+    'weights': {
+        'staleness': 1.0,  # 距上次刷新的时间
+        'change_rate': 2.0,  # 历史上每次刷新发生变化的比例
+        'active_team': 1.5,  # 是否在活跃队伍中
+        'ranking': 1.0,  # HLTV排名
+    },
+    # 视为不在活跃队伍的队伍名
+    'inactive_teams': {'', 'free agent', '自由选手', 'retired', '退役', '未找到', 'none'},
+}
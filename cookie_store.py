@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cloudflare 验证Cookie持久化
+把 cloudscraper 通过JS验证后得到的 cf_clearance 等Cookie保存到本地Cookie文件，
+下次运行直接复用，过期前不必重新做验证。
+"""
+import copy
+import logging
+import os
+import time
+from http.cookiejar import CookieJar, LoadError, LWPCookieJar
+from pathlib import Path
+from typing import Optional
+
+from config import CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class CookieStore:
+    """基于 LWPCookieJar 的Cookie文件，加载时自动丢弃已过期的Cookie"""
+
+    def __init__(self, cookie_file: Optional[str] = None,
+                 session_cookie_ttl: int = CACHE_CONFIG['session_cookie_ttl']):
+        if cookie_file is None:
+            cookie_file = os.path.join(CACHE_CONFIG['cache_dir'], CACHE_CONFIG['cookie_file'])
+        self.cookie_file = Path(cookie_file)
+        # 没有过期时间的会话Cookie最多保留多久
+        self.session_cookie_ttl = session_cookie_ttl
+
+    def load_into(self, cookies: CookieJar) -> int:
+        """把未过期的Cookie加载到会话中，返回加载的数量"""
+        if not self.cookie_file.exists():
+            return 0
+        jar = LWPCookieJar(str(self.cookie_file))
+        try:
+            # 忽略已过期的Cookie；是否保留只看过期时间，不看 discard 标记
+            jar.load(ignore_discard=True)
+        except (OSError, LoadError) as e:
+            logger.warning("Cookie文件读取失败: %s", e)
+            return 0
+        count = 0
+        for cookie in jar:
+            cookies.set_cookie(cookie)
+            count += 1
+        if count:
+            logger.info("复用已保存的 %s 个Cookie (跳过Cloudflare验证)", count)
+        return count
+
+    def save(self, cookies: CookieJar):
+        """保存会话中的Cookie，会话Cookie按 session_cookie_ttl 设置过期时间"""
+        jar = LWPCookieJar(str(self.cookie_file))
+        expires = int(time.time()) + self.session_cookie_ttl
+        for cookie in cookies:
+            if cookie.expires is None:
+                cookie = copy.copy(cookie)
+                cookie.expires = expires
+            jar.set_cookie(cookie)
+
+        self.cookie_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = Path(f"{self.cookie_file}.{os.getpid()}.tmp")
+        jar.save(str(tmp_file), ignore_discard=True)
+        os.replace(tmp_file, self.cookie_file)
+
+    def clear(self, cookies: Optional[CookieJar] = None):
+        """验证失效时清除已保存的Cookie"""
+        if cookies is not None:
+            cookies.clear()
+        try:
+            self.cookie_file.unlink()
+        except FileNotFoundError:
+            pass
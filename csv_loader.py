@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量CSV加载
+1. 按文件开头的数据块识别编码 (BOM / UTF-8 / GBK)，不再把GBK文件读成乱码
+2. 大文件通过 mmap 读取，整体解码一次
+3. 表头的各种中英文写法只映射一次，之后按列号批量构造记录
+4. iter_records 逐行读取，用于合并大文件时控制内存
+"""
+import codecs
+import csv
+import dataclasses
+import io
+import logging
+import mmap
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 用于判断编码的数据块大小
+SNIFF_BLOCK_SIZE = 64 * 1024
+# 超过该大小的文件使用 mmap 读取
+MMAP_THRESHOLD = 1024 * 1024
+
+# 字段名 -> 表头的各种写法 (比较时忽略大小写和首尾空格)
+HEADER_ALIASES: Dict[str, Tuple[str, ...]] = {
+    'name': ('姓名', '名字', '选手', '选手名', '昵称', 'name', 'player', 'nickname'),
+    'team': ('队伍', '战队', '俱乐部', '所属队伍', 'team'),
+    'nationality': ('国籍', '国家', '地区', 'nationality', 'country'),
+    'age': ('年龄', 'age'),
+    'role': ('游戏内位置', '位置', '角色', '职责', 'role', 'position'),
+    'birth_date': ('出生日期', '生日', 'birth_date', 'birthday', 'born'),
+    'source': ('来源', '数据来源', 'source'),
+}
+
+
+def sniff_encoding(block: bytes) -> str:
+    """根据文件开头的数据块判断编码：BOM > 合法UTF-8 > GB18030(兼容GBK) > latin-1"""
+    if block.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if block.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    for encoding in ('utf-8', 'gb18030'):
+        try:
+            # final=False: 数据块末尾被截断的多字节字符不算错误
+            codecs.getincrementaldecoder(encoding)().decode(block, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return 'latin-1'
+
+
+def read_text(path) -> Tuple[str, str]:
+    """读取并解码整个文件，返回 (文本, 使用的编码)"""
+    path = Path(path)
+    with open(path, 'rb') as file:
+        size = path.stat().st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return _decode(data, path)
+        return _decode(file.read(), path)
+
+
+def fallback_encoding(encoding: str) -> str:
+    """开头识别出的编码解码失败时改用的编码"""
+    return 'gb18030' if encoding != 'gb18030' else 'latin-1'
+
+
+def _decode(data, path: Path) -> Tuple[str, str]:
+    encoding = sniff_encoding(bytes(data[:SNIFF_BLOCK_SIZE]))
+    try:
+        return str(data, encoding), encoding
+    except UnicodeDecodeError:
+        # 开头是合法UTF-8但后面不是 (如后来追加了GBK内容)
+        fallback = fallback_encoding(encoding)
+        logger.warning("%s 不是完整的 %s 编码，改用 %s", path, encoding, fallback)
+        try:
+            return str(data, fallback), fallback
+        except UnicodeDecodeError:
+            return str(data, encoding, 'replace'), encoding
+
+
+def map_header(header: Sequence[str]) -> Dict[str, int]:
+    """把表头映射为 {字段名: 列号}，同一字段出现多次时取第一列"""
+    lookup = {alias.casefold(): field for field, aliases in HEADER_ALIASES.items() for alias in aliases}
+    columns: Dict[str, int] = {}
+    for index, title in enumerate(header):
+        field = lookup.get(title.strip().lstrip('\ufeff').casefold())
+        if field and field not in columns:
+            columns[field] = index
+    return columns
+
+
+def load_records(path, factory: Callable, skip_empty: bool = False, **extra) -> List:
+    """
+    读取CSV并批量构造记录: factory(name=..., team=..., ..., **extra)
+    表头中没有的字段不传给 factory (使用其默认值)；skip_empty 时空单元格同样不传
+    extra 是表头中没有 (或单元格为空) 时使用的值；没有姓名列的文件返回空列表
+    """
+    text, encoding = read_text(path)
+    records = list(_build_records(csv.reader(io.StringIO(text, newline='')), path, factory, skip_empty, extra))
+    logger.info("从 %s (%s) 读取了 %s 条记录", path, encoding, len(records))
+    return records
+
+
+def iter_records(path, factory: Callable, skip_empty: bool = False, **extra) -> Iterator:
+    """
+    与 load_records 相同，但逐行读取、逐条返回，内存占用与文件大小无关 (用于流式合并)
+    编码按开头的数据块识别，之后某一行解码失败时该行改用后备编码 (与 read_text 相同)
+    """
+    path = Path(path)
+    with open(path, 'rb') as file:
+        encoding = sniff_encoding(file.read(SNIFF_BLOCK_SIZE))
+    if encoding == 'utf-16':
+        # UTF-16 不能按字节中的换行符分行
+        with open(path, 'r', encoding=encoding, newline='') as file:
+            yield from _build_records(csv.reader(file), path, factory, skip_empty, extra)
+        return
+    with open(path, 'rb') as file:
+        yield from _build_records(csv.reader(_decode_lines(file, encoding, path)), path, factory, skip_empty, extra)
+
+
+def _decode_lines(lines: Iterator[bytes], encoding: str, path: Path) -> Iterator[str]:
+    """逐行解码，解码失败的行 (如后来追加的GBK内容) 改用后备编码"""
+    fallback = fallback_encoding(encoding)
+    warned = False
+    for number, line in enumerate(lines, 1):
+        try:
+            yield line.decode(encoding)
+        except UnicodeDecodeError:
+            if not warned:
+                logger.warning("%s 第 %s 行起不是完整的 %s 编码，改用 %s", path, number, encoding, fallback)
+                warned = True
+            try:
+                yield line.decode(fallback)
+            except UnicodeDecodeError:
+                yield line.decode(encoding, 'replace')
+
+
+def _build_records(rows: Iterator[List[str]], path, factory: Callable, skip_empty: bool,
+                   extra: Dict) -> Iterator:
+    header = next(rows, None)
+    if not header:
+        return
+
+    columns = map_header(header)
+    if 'name' not in columns:
+        logger.error("%s 的表头中没有姓名列: %s", path, header)
+        return
+    if dataclasses.is_dataclass(factory):
+        # 只传 factory 认识的字段 (如更新器的 PlayerInfo 没有来源字段)
+        accepted = {field.name for field in dataclasses.fields(factory)}
+        columns = {field: index for field, index in columns.items() if field in accepted}
+
+    fields = list(columns)
+    indices = [columns[field] for field in fields]
+    width = max(indices) + 1
+    name_pos = fields.index('name')
+
+    for row in rows:
+        if len(row) < width:
+            row += [''] * (width - len(row))
+        values = [row[i].strip() for i in indices]
+        if not values[name_pos]:
+            continue
+        if skip_empty:
+            kwargs = {field: value for field, value in zip(fields, values) if value}
+        else:
+            kwargs = dict(zip(fields, values))
+        yield factory(**{**extra, **kwargs})
@@ -1,8 +1,10 @@
-import re
 import logging
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 from config import VALIDATION_RULES, DATA_CLEANING
+from stats_aggregator import StatsAggregator
+from birth_dates import parse_birth_date, age_text
+from text_cleaning import TextCleaner
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +22,7 @@ class DataValidator:
     def __init__(self):
         self.validation_rules = VALIDATION_RULES
         self.cleaning_rules = DATA_CLEANING
+        self.cleaner = TextCleaner(self.cleaning_rules)
     
     def validate_player_info(self, player_data: Dict[str, Any]) -> ValidationResult:
         """验证选手信息"""
@@ -66,27 +69,8 @@ class DataValidator:
         )
     
     def clean_text(self, text: str) -> str:
-        """清理文本数据"""
-        if not text:
-            return ""
-        
-        # 移除HTML标签
-        if self.cleaning_rules['remove_html_tags']:
-            text = re.sub(r'<[^>]+>', '', text)
-        
-        # 移除Wiki链接标记
-        if self.cleaning_rules['remove_wiki_links']:
-            text = re.sub(r'\[\[|\]\]', '', text)
-        
-        # 标准化空白字符
-        if self.cleaning_rules['normalize_whitespace']:
-            text = re.sub(r'\s+', ' ', text.strip())
-        
-        # 移除引号
-        if self.cleaning_rules['strip_quotes']:
-            text = text.strip('"\'')
-        
-        return text
+        """清理文本数据 (共用的 text_cleaning 流水线，按 DATA_CLEANING 的开关)"""
+        return self.cleaner.clean(text)
     
     def normalize_role(self, role: str) -> str:
         """标准化角色名称"""
@@ -105,42 +89,15 @@ class DataValidator:
         return role
     
     def extract_age_from_birth_date(self, birth_date: str) -> str:
-        """从出生日期提取年龄"""
-        if not birth_date:
-            return "未知年龄"
-        
-        try:
-            # 匹配年份模式
-            year_patterns = [
-                r'(\d{4})',  # 标准4位年份
-                r'born\s+(\d{4})',  # born 1995
-                r'(\d{4})\s*年',  # 1995年
-                r'(\d{4})-\d{2}-\d{2}',  # 1995-01-01
-                r'(\d{1,2})/(\d{1,2})/(\d{4})',  # MM/DD/YYYY
-            ]
-            
-            for pattern in year_patterns:
-                match = re.search(pattern, birth_date, re.IGNORECASE)
-                if match:
-                    if len(match.groups()) == 1:
-                        birth_year = int(match.group(1))
-                    else:
-                        birth_year = int(match.group(3))  # 对于MM/DD/YYYY格式
-                    
-                    from datetime import datetime
-                    current_year = datetime.now().year
-                    age = current_year - birth_year
-                    
-                    if self.validation_rules['min_age'] <= age <= self.validation_rules['max_age']:
-                        return str(age)
-            
-            return "未知年龄"
-        except (ValueError, TypeError) as e:
-            logger.warning(f"年龄解析失败: {birth_date} - {e}")
-            return "未知年龄"
+        """从出生日期提取年龄 (按完整日期计算周岁，只有年份时按年份差近似)"""
+        return age_text(parse_birth_date(birth_date))
     
     def validate_and_clean_player_data(self, player_data: Dict[str, Any]) -> Dict[str, Any]:
         """验证并清洗选手数据"""
+        return self._validate_and_clean(player_data).cleaned_data
+    
+    def _validate_and_clean(self, player_data: Dict[str, Any]) -> ValidationResult:
+        """清洗后验证一次，返回完整的验证结果"""
         # 首先清理文本数据
         cleaned_data = {}
         for key, value in player_data.items():
@@ -164,18 +121,24 @@ class DataValidator:
         for error in validation_result.errors:
             logger.error(error)
         
-        return validation_result.cleaned_data
+        return validation_result
     
-    def batch_validate(self, players_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """批量验证选手数据"""
+    def batch_validate(self, players_data: List[Dict[str, Any]],
+                       stats: Optional[StatsAggregator] = None) -> List[Dict[str, Any]]:
+        """
+        批量验证选手数据
+        stats: 传入时顺便累计验证统计，之后 generate_validation_report(stats=stats) 无需再次验证
+        """
         validated_players = []
         invalid_count = 0
         
         for player_data in players_data:
-            validated_data = self.validate_and_clean_player_data(player_data)
+            validation_result = self._validate_and_clean(player_data)
+            validated_data = validation_result.cleaned_data
+            if stats is not None:
+                self.record_validation(stats, validated_data, validation_result)
             
             # 检查是否有效
-            validation_result = self.validate_player_info(validated_data)
             if validation_result.is_valid:
                 validated_players.append(validated_data)
             else:
@@ -185,78 +148,74 @@ class DataValidator:
         logger.info(f"批量验证完成: {len(validated_players)} 个有效数据, {invalid_count} 个无效数据")
         return validated_players
     
-    def generate_validation_report(self, players_data: List[Dict[str, Any]]) -> str:
-        """生成数据验证报告"""
-        total_count = len(players_data)
-        valid_count = 0
-        invalid_count = 0
-        warning_count = 0
-        
-        # 统计信息
-        age_stats = {'valid': 0, 'invalid': 0, 'unknown': 0}
-        role_stats = {'valid': 0, 'invalid': 0, 'unknown': 0}
-        nationality_stats = {}
-        
-        for player_data in players_data:
-            validation_result = self.validate_player_info(player_data)
-            
-            if validation_result.is_valid:
-                valid_count += 1
-            else:
-                invalid_count += 1
-            
-            warning_count += len(validation_result.warnings)
-            
-            # 统计年龄
-            age = player_data.get('age', '')
-            if age == "未知年龄":
-                age_stats['unknown'] += 1
-            elif age and age.isdigit():
-                age_int = int(age)
-                if self.validation_rules['min_age'] <= age_int <= self.validation_rules['max_age']:
-                    age_stats['valid'] += 1
-                else:
-                    age_stats['invalid'] += 1
-            
-            # 统计角色
-            role = player_data.get('role', '')
-            if role == "未知位置":
-                role_stats['unknown'] += 1
-            elif role and role.lower() in self.validation_rules['valid_roles']:
-                role_stats['valid'] += 1
+    def record_validation(self, stats: StatsAggregator, player_data: Dict[str, Any],
+                          validation_result: ValidationResult):
+        """把一条验证结果累计到统计中"""
+        stats.add_record(player_data.get('team', ''), player_data.get('nationality', ''),
+                         player_data.get('age', ''), player_data.get('role', ''))
+        stats.count('valid' if validation_result.is_valid else 'invalid')
+        stats.count('warnings', len(validation_result.warnings))
+        
+        # 统计年龄
+        age = player_data.get('age', '')
+        if age == "未知年龄":
+            stats.count('age_unknown')
+        elif age and age.isdigit():
+            age_int = int(age)
+            if self.validation_rules['min_age'] <= age_int <= self.validation_rules['max_age']:
+                stats.count('age_valid')
             else:
-                role_stats['invalid'] += 1
-            
-            # 统计国籍
-            nationality = player_data.get('nationality', '')
-            if nationality:
-                nationality_stats[nationality] = nationality_stats.get(nationality, 0) + 1
+                stats.count('age_invalid')
+        
+        # 统计角色
+        role = player_data.get('role', '')
+        if role == "未知位置":
+            stats.count('role_unknown')
+        elif role and role.lower() in self.validation_rules['valid_roles']:
+            stats.count('role_valid')
+        else:
+            stats.count('role_invalid')
+    
+    def generate_validation_report(self, players_data: Optional[List[Dict[str, Any]]] = None,
+                                   stats: Optional[StatsAggregator] = None) -> str:
+        """
+        生成数据验证报告
+        stats: batch_validate 已累计的统计；不传时对 players_data 单遍验证并统计
+        """
+        if stats is None:
+            stats = StatsAggregator()
+            for player_data in players_data or []:
+                self.record_validation(stats, player_data, self.validate_player_info(player_data))
+        
+        total_count = stats.total
+        counters = stats.counters
+        percent = lambda count: count / total_count * 100 if total_count else 0.0
         
         # 生成报告
         report = f"""
 数据验证报告
 ============
 总数据量: {total_count}
-有效数据: {valid_count} ({valid_count/total_count*100:.1f}%)
-无效数据: {invalid_count} ({invalid_count/total_count*100:.1f}%)
-警告数量: {warning_count}
+有效数据: {counters['valid']} ({percent(counters['valid']):.1f}%)
+无效数据: {counters['invalid']} ({percent(counters['invalid']):.1f}%)
+警告数量: {counters['warnings']}
 
 年龄统计:
-- 有效年龄: {age_stats['valid']} ({age_stats['valid']/total_count*100:.1f}%)
-- 无效年龄: {age_stats['invalid']} ({age_stats['invalid']/total_count*100:.1f}%)
-- 未知年龄: {age_stats['unknown']} ({age_stats['unknown']/total_count*100:.1f}%)
+- 有效年龄: {counters['age_valid']} ({percent(counters['age_valid']):.1f}%)
+- 无效年龄: {counters['age_invalid']} ({percent(counters['age_invalid']):.1f}%)
+- 未知年龄: {counters['age_unknown']} ({percent(counters['age_unknown']):.1f}%)
 
 角色统计:
-- 有效角色: {role_stats['valid']} ({role_stats['valid']/total_count*100:.1f}%)
-- 无效角色: {role_stats['invalid']} ({role_stats['invalid']/total_count*100:.1f}%)
-- 未知角色: {role_stats['unknown']} ({role_stats['unknown']/total_count*100:.1f}%)
+- 有效角色: {counters['role_valid']} ({percent(counters['role_valid']):.1f}%)
+- 无效角色: {counters['role_invalid']} ({percent(counters['role_invalid']):.1f}%)
+- 未知角色: {counters['role_unknown']} ({percent(counters['role_unknown']):.1f}%)
 
 国籍分布 (Top 10):
 """
         
-        # 按数量排序国籍
-        sorted_nationalities = sorted(nationality_stats.items(), key=lambda x: x[1], reverse=True)
-        for nationality, count in sorted_nationalities[:10]:
-            report += f"- {nationality}: {count} ({count/total_count*100:.1f}%)\n"
+        # 按数量排序国籍 (空国籍不计入)
+        top_nationalities = [(n, c) for n, c in stats.nationalities.most_common(11) if n][:10]
+        for nationality, count in top_nationalities:
+            report += f"- {nationality}: {count} ({percent(count):.1f}%)\n"
         
-        return report 
\ No newline at end of file
+        return report
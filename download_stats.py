@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+下载量统计
+按抓取方式(完整页面 / 精简首段)统计响应正文字节数，
+用历史上完整页面的平均大小估算精简抓取节省的字节数。
+"""
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from config import CACHE_CONFIG, FETCH_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadStats:
+    """记录本次运行的下载字节数"""
+
+    def __init__(self, stats_file: Optional[str] = None):
+        if stats_file is None:
+            stats_file = os.path.join(CACHE_CONFIG['cache_dir'], CACHE_CONFIG['download_stats_file'])
+        self.stats_file = Path(stats_file)
+        self.bytes: Dict[str, int] = {}
+        self.requests: Dict[str, int] = {}
+
+        # 完整页面的平均大小 (跨运行累计)
+        self.full_page_avg = float(FETCH_CONFIG['full_page_estimate_bytes'])
+        self.full_page_samples = 0
+        if self.stats_file.exists():
+            try:
+                with open(self.stats_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.full_page_avg = data['full_page_avg_bytes']
+                self.full_page_samples = data['full_page_samples']
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("下载统计读取失败: %s", e)
+
+    def record(self, mode: str, nbytes: int):
+        """mode: 'full' 完整页面, 'lean' 只取信息框所在首段, 或其他自定义类别"""
+        self.bytes[mode] = self.bytes.get(mode, 0) + nbytes
+        self.requests[mode] = self.requests.get(mode, 0) + 1
+        if mode == 'full':
+            self.full_page_samples += 1
+            self.full_page_avg += (nbytes - self.full_page_avg) / self.full_page_samples
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self.bytes.values())
+
+    @property
+    def bytes_saved(self) -> int:
+        """精简抓取相比完整页面估计节省的字节数"""
+        lean_requests = self.requests.get('lean', 0)
+        return max(0, int(lean_requests * self.full_page_avg) - self.bytes.get('lean', 0))
+
+    def summary(self) -> str:
+        parts = [f"{mode}: {self.requests[mode]} 次/{self.bytes[mode] / 1024:.1f} KB" for mode in self.bytes]
+        text = f"下载 {self.total_bytes / 1024:.1f} KB ({', '.join(parts) or '无请求'})"
+        if self.requests.get('lean'):
+            text += f"，精简抓取约节省 {self.bytes_saved / 1024:.1f} KB"
+        return text
+
+    def to_dict(self) -> Dict:
+        return {
+            'bytes': dict(self.bytes),
+            'requests': dict(self.requests),
+            'total_bytes': self.total_bytes,
+            'bytes_saved': self.bytes_saved,
+        }
+
+    def save(self):
+        self.stats_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = Path(f"{self.stats_file}.{os.getpid()}.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'full_page_avg_bytes': self.full_page_avg,
+                       'full_page_samples': self.full_page_samples}, f)
+        os.replace(tmp_file, self.stats_file)
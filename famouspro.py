@@ -4,12 +4,19 @@ import csv
 import time
 from datetime import datetime
 
+from request_guard import AdaptiveTimeout
+from text_cleaning import clean_text
+
 # MediaWiki API URL
 api_url = "https://liquipedia.net/counterstrike/api.php"
 
+# 请求超时按观测延迟计算 (之前没有超时，卡住的连接会一直等待)
+timeouts = AdaptiveTimeout()
+session = timeouts.instrument(requests.Session())
+
 
-def get_player_info(player_name):
-    """获取指定选手的资料"""
+def get_player_info(player_name, archive=None):
+    """获取指定选手的资料 (archive: WarcWriter，传入时把API响应存档)"""
     # 调用 API 获取 Wiki 文本
     params = {
         "action": "parse",
@@ -17,9 +24,14 @@ def get_player_info(player_name):
         "format": "json",
         "prop": "wikitext"
     }
-    response = requests.get(api_url, params=params)
-    data = response.json()
+    response = timeouts.request(session.get, api_url, params=params)
+    if archive is not None and response.ok:
+        archive.capture(response)
+    return parse_player_data(player_name, response.json())
 
+
+def parse_player_data(player_name, data):
+    """从 action=parse&prop=wikitext 的API结果中提取选手资料 (reparse.py 离线重新解析时也使用)"""
     # 检查 API 返回是否有效
     if 'error' in data or 'parse' not in data:
         return {
@@ -49,7 +61,7 @@ def get_player_info(player_name):
 
     # 提取并翻译国籍
     nationality = infobox.get('nationality', infobox.get('country', '未知国籍'))
-    nationality = re.sub(r'\[\[|\]\]', '', nationality)  # 清理 Wiki 链接
+    nationality = clean_text(nationality)  # 清理 Wiki 链接
 
     # 提取出生日期并计算年龄
     birth = infobox.get('birth_date', '')
@@ -88,32 +100,48 @@ players = [
     "Westmelon","z4kr","EmiliaQAQ","C4LLM3SU3","xertioN"
 ]
 
-# CSV 文件路径
-csv_file = 'players.csv'
 
-# 覆盖写入 CSV
-with open(csv_file, 'w', newline='', encoding='utf-8') as file:
-    writer = csv.writer(file)
-    writer.writerow(['姓名', '队伍', '国籍', '年龄', '游戏内位置'])  # 表头
+def main():
+    import argparse
+    from config import WARC_CONFIG
+    from warc_archive import WarcWriter
+
+    parser = argparse.ArgumentParser(description="知名选手资料查询")
+    parser.add_argument('--warc', nargs='?', const=WARC_CONFIG['directory'], default=None, metavar='DIR',
+                        help="把API响应存档为WARC，之后可用 reparse.py 离线重新解析")
+    args = parser.parse_args()
+    archive = WarcWriter(args.warc, prefix='famouspro') if args.warc else None
+
+    # CSV 文件路径
+    csv_file = 'players.csv'
+
+    # 覆盖写入 CSV
+    with open(csv_file, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['姓名', '队伍', '国籍', '年龄', '游戏内位置'])  # 表头
+
+        for player in players:
+            print(f"正在查询: {player}")
+            info = get_player_info(player, archive)
+
+            # 打印结果
+            print(f"姓名: {info['姓名']}")
+            print(f"队伍: {info['队伍']}")
+            print(f"国籍: {info['国籍']}")
+            print(f"年龄: {info['年龄']}")
+            print(f"游戏内位置: {info['游戏内位置']}")
+            print("-" * 50)
 
-    for player in players:
-        print(f"正在查询: {player}")
-        info = get_player_info(player)
+            # 写入 CSV
+            writer.writerow([
+                info['姓名'], info['队伍'], info['国籍'],
+                info['年龄'], info['游戏内位置']
+            ])
 
-        # 打印结果
-        print(f"姓名: {info['姓名']}")
-        print(f"队伍: {info['队伍']}")
-        print(f"国籍: {info['国籍']}")
-        print(f"年龄: {info['年龄']}")
-        print(f"游戏内位置: {info['游戏内位置']}")
-        print("-" * 50)
+            time.sleep(0.5)  # 避免请求过频
 
-        # 写入 CSV
-        writer.writerow([
-            info['姓名'], info['队伍'], info['国籍'],
-            info['年龄'], info['游戏内位置']
-        ])
+    print(f"数据已覆盖保存到 {csv_file}")
 
-        time.sleep(0.5)  # 避免请求过频
 
-print(f"数据已覆盖保存到 {csv_file}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓取计划 (--plan 试运行)
+只查询本地缓存，不发送任何请求：列出本次运行会请求哪些URL、哪些命中缓存/被跳过，
+并按当前的请求间隔估算各主机的请求数和总耗时。
+"""
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+from config import FETCH_CONFIG
+from request_guard import CircuitBreaker
+
+# 请求状态: 一定发送 / 前一步失败时才发送 / 命中缓存 / 已知无效直接跳过
+STATUS_LABELS = {
+    'fetch': '请求',
+    'conditional': '可能请求',
+    'cached': '缓存命中',
+    'skipped': '跳过',
+}
+
+
+@dataclass
+class PlannedRequest:
+    url: str
+    purpose: str
+    status: str = 'fetch'
+    reason: str = ''
+
+
+class FetchPlan:
+    """一次运行的抓取计划"""
+
+    def __init__(self, delay_func: Callable[[int], float],
+                 latency: float = FETCH_CONFIG['estimated_latency']):
+        """
+        delay_func: 第i个请求(从0开始)前的最小请求间隔，与爬虫的频率控制保持一致
+        latency: 估算的单次请求耗时(秒)
+        """
+        self.delay_func = delay_func
+        self.latency = latency
+        self.requests: List[PlannedRequest] = []
+        self.notes: List[str] = []
+
+    def add(self, url: str, purpose: str, status: str = 'fetch', reason: str = ''):
+        self.requests.append(PlannedRequest(url, purpose, status, reason))
+
+    def note(self, text: str):
+        """无法在试运行中确定的部分 (如运行时才能发现的链接)"""
+        self.notes.append(text)
+
+    def count(self, status: str) -> int:
+        return sum(1 for request in self.requests if request.status == status)
+
+    def by_host(self) -> Dict[str, Counter]:
+        hosts: Dict[str, Counter] = {}
+        for request in self.requests:
+            hosts.setdefault(CircuitBreaker.host_of(request.url), Counter())[request.status] += 1
+        return hosts
+
+    def estimate_seconds(self, include_conditional: bool = False) -> float:
+        """按请求间隔与单次耗时估算总耗时 (请求是串行发送的)"""
+        total = self.count('fetch')
+        if include_conditional:
+            total += self.count('conditional')
+        return sum(max(self.delay_func(i), self.latency) for i in range(total))
+
+    def render(self, list_urls: bool = True) -> str:
+        lines = []
+        if list_urls:
+            for request in self.requests:
+                line = f"[{STATUS_LABELS[request.status]}] {request.purpose}: {request.url}"
+                if request.reason:
+                    line += f" ({request.reason})"
+                lines.append(line)
+            lines.append("")
+
+        lines.append("抓取计划汇总")
+        lines.append("==================")
+        for host, counts in sorted(self.by_host().items()):
+            parts = [f"{STATUS_LABELS[status]} {counts[status]}" for status in STATUS_LABELS if counts[status]]
+            lines.append(f"{host}: {', '.join(parts)}")
+
+        expected = self.estimate_seconds()
+        worst = self.estimate_seconds(include_conditional=True)
+        lines.append(f"确定发送的请求: {self.count('fetch')}，最多: {self.count('fetch') + self.count('conditional')}")
+        lines.append(f"预计耗时: {_format_duration(expected)} (最多 {_format_duration(worst)}，"
+                     f"按单次请求 {self.latency:.1f}s 估算)")
+        for text in self.notes:
+            lines.append(f"注意: {text}")
+        return "\n".join(lines)
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}小时{minutes}分{seconds}秒"
+    if minutes:
+        return f"{minutes}分{seconds}秒"
+    return f"{seconds}秒"
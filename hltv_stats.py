@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HLTV选手统计表抓取
+分页请求 stats/players，边下载边用 HTMLParser 增量解析，
+把 Maps/Rounds/K-D Diff/K/D/Rating 等数值列保存到按列存储的类型化数组中，
+可以在逐个抓取选手页面之前先按数据筛选选手。
+"""
+import codecs
+import json
+import logging
+import os
+import re
+from array import array
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from config import CACHE_CONFIG, DATA_SOURCES
+
+logger = logging.getLogger(__name__)
+
+# 表头文字 -> 字段名 (Rating 列名随版本变化，如 Rating2.0 / Rating 3.0)
+HEADER_FIELDS = [
+    ('maps', re.compile(r'^maps$', re.IGNORECASE)),
+    ('rounds', re.compile(r'^rounds$', re.IGNORECASE)),
+    ('kd_diff', re.compile(r'^k-d\s*diff$', re.IGNORECASE)),
+    ('kd', re.compile(r'^k/d$', re.IGNORECASE)),
+    ('rating', re.compile(r'^rating', re.IGNORECASE)),
+]
+
+INT_FIELDS = ('player_id', 'maps', 'rounds', 'kd_diff')
+FLOAT_FIELDS = ('kd', 'rating')
+
+
+class HLTVStatsTable:
+    """按列存储的选手统计表"""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.teams: List[str] = []
+        self.nationalities: List[str] = []
+        self.player_id = array('l')
+        self.maps = array('l')
+        self.rounds = array('l')
+        self.kd_diff = array('l')
+        self.kd = array('d')
+        self.rating = array('d')
+        self._ids = set()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def append(self, row: Dict) -> bool:
+        """追加一行，重复的选手(翻页时排名变动)会被忽略"""
+        player_id = row.get('player_id', 0)
+        key = player_id or row['name']
+        if key in self._ids:
+            return False
+        self._ids.add(key)
+
+        self.names.append(row['name'])
+        self.teams.append(row.get('team', ''))
+        self.nationalities.append(row.get('nationality', ''))
+        for field in INT_FIELDS:
+            getattr(self, field).append(int(row.get(field, 0)))
+        for field in FLOAT_FIELDS:
+            getattr(self, field).append(float(row.get(field, 0.0)))
+        return True
+
+    def filter_names(self, min_rating: Optional[float] = None, min_maps: Optional[int] = None,
+                     min_kd: Optional[float] = None, limit: Optional[int] = None) -> List[str]:
+        """按统计数据筛选选手名字，保持原有排名顺序"""
+        result = []
+        for i, name in enumerate(self.names):
+            if min_rating is not None and self.rating[i] < min_rating:
+                continue
+            if min_maps is not None and self.maps[i] < min_maps:
+                continue
+            if min_kd is not None and self.kd[i] < min_kd:
+                continue
+            result.append(name)
+            if limit is not None and len(result) >= limit:
+                break
+        return result
+
+    def rankings(self) -> Dict[str, int]:
+        """返回 {选手名: 排名(从1开始)}"""
+        return {name: i for i, name in enumerate(self.names, 1)}
+
+    def save(self, filename: str):
+        path = Path(filename)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {'names': self.names, 'teams': self.teams, 'nationalities': self.nationalities}
+        for field in INT_FIELDS + FLOAT_FIELDS:
+            data[field] = getattr(self, field).tolist()
+        tmp_file = Path(f"{path}.{os.getpid()}.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file, path)
+
+    @classmethod
+    def load(cls, filename: str) -> 'HLTVStatsTable':
+        with open(filename, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        table = cls()
+        table.names = data['names']
+        table.teams = data['teams']
+        table.nationalities = data['nationalities']
+        for field in INT_FIELDS:
+            getattr(table, field).fromlist(data[field])
+        for field in FLOAT_FIELDS:
+            getattr(table, field).fromlist(data[field])
+        table._ids = {pid or name for pid, name in zip(table.player_id, table.names)}
+        return table
+
+
+class StatsTableParser(HTMLParser):
+    """增量解析 table.stats-table，每解析完一行就回调一次"""
+
+    def __init__(self, on_row: Callable[[Dict], None]):
+        super().__init__(convert_charrefs=True)
+        self.on_row = on_row
+        self.in_table = False
+        self.in_thead = False
+        self.in_tbody = False
+        self.headers: List[str] = []
+        self.column_fields: Dict[int, str] = {}
+        self.row: Optional[Dict] = None
+        self.cell_index = -1
+        self.cell_class = ''
+        self.cell_text: Optional[List[str]] = None
+        self.name_start: Optional[int] = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        css_class = attrs.get('class') or ''
+        if tag == 'table' and 'stats-table' in css_class:
+            self.in_table = True
+            return
+        if not self.in_table:
+            return
+
+        if tag == 'thead':
+            self.in_thead = True
+        elif tag == 'tbody':
+            self.in_tbody = True
+            self._map_headers()
+        elif tag == 'tr' and self.in_tbody:
+            self.row = {}
+            self.cell_index = -1
+        elif tag in ('th', 'td'):
+            self.cell_text = []
+            self.cell_class = css_class
+            if self.row is not None:
+                self.cell_index += 1
+                if 'teamCol' in css_class and attrs.get('data-sort'):
+                    self.row['team'] = attrs['data-sort']
+        elif self.row is None or self.cell_text is None:
+            return
+        elif tag == 'a' and 'name' not in self.row and (
+                'player-nick' in css_class or attrs.get('href', '').startswith('/stats/players/')):
+            match = re.match(r'/stats/players/(\d+)/', attrs.get('href', ''))
+            if match:
+                self.row['player_id'] = int(match.group(1))
+            self.name_start = len(self.cell_text)
+        elif tag == 'img':
+            alt = attrs.get('alt') or attrs.get('title') or ''
+            if 'flag' in css_class and 'nationality' not in self.row:
+                self.row['nationality'] = alt
+            elif 'teamCol' in self.cell_class and 'team' not in self.row:
+                self.row['team'] = alt
+
+    def handle_endtag(self, tag):
+        if not self.in_table:
+            return
+        if tag == 'table':
+            self.in_table = self.in_thead = self.in_tbody = False
+        elif tag == 'thead':
+            self.in_thead = False
+        elif tag == 'tbody':
+            self.in_tbody = False
+        elif tag in ('th', 'td') and self.cell_text is not None:
+            text = ' '.join(''.join(self.cell_text).split())
+            if self.in_thead:
+                self.headers.append(text)
+            elif self.row is not None:
+                field = self.column_fields.get(self.cell_index)
+                if field:
+                    self.row[field] = _parse_number(text, field)
+            self.cell_text = None
+        elif tag == 'a' and self.name_start is not None and self.row is not None:
+            self.row['name'] = ' '.join(''.join(self.cell_text[self.name_start:]).split())
+            self.name_start = None
+        elif tag == 'tr' and self.row is not None:
+            row, self.row = self.row, None
+            if row.get('name'):
+                self.on_row(row)
+
+    def handle_data(self, data):
+        if self.cell_text is not None:
+            self.cell_text.append(data)
+
+    def _map_headers(self):
+        self.column_fields = {}
+        for index, header in enumerate(self.headers):
+            for field, pattern in HEADER_FIELDS:
+                if pattern.search(header) and field not in self.column_fields.values():
+                    self.column_fields[index] = field
+                    break
+
+
+def _parse_number(text: str, field: str):
+    """解析数值单元格，如 '+1,234'、'1.25'、'-'"""
+    cleaned = text.replace(',', '').replace('+', '').strip()
+    try:
+        if field in FLOAT_FIELDS:
+            return float(cleaned)
+        return int(float(cleaned))
+    except ValueError:
+        return 0.0 if field in FLOAT_FIELDS else 0
+
+
+class HLTVStatsIngestor:
+    """分页、流式地抓取HLTV选手统计表"""
+
+    def __init__(self, request_func: Callable[..., Optional[object]],
+                 stats_url: str = DATA_SOURCES['hltv']['stats_url'],
+                 page_size: int = DATA_SOURCES['hltv']['page_size'],
+                 chunk_size: int = 16 * 1024):
+        """
+        request_func: request_func(url, stream=True) -> Response 或 None
+        """
+        self.request_func = request_func
+        self.stats_url = stats_url
+        self.page_size = page_size
+        self.chunk_size = chunk_size
+
+    def ingest(self, top_n: int) -> HLTVStatsTable:
+        """抓取前 top_n 名选手的统计数据"""
+        table = HLTVStatsTable()
+        start = 0
+        while len(table) < top_n:
+            limit = min(self.page_size, top_n - len(table))
+            page_rows = self._ingest_page(self.page_url(start, limit), table)
+            logger.info("HLTV统计分页 start=%s: %s 行，累计 %s 个选手", start, page_rows, len(table))
+            if page_rows < limit:
+                # 最后一页或请求失败
+                break
+            start += limit
+        return table
+
+    def page_url(self, start: int, limit: int) -> str:
+        return f"{self.stats_url}?start={start}&limit={limit}"
+
+    def page_urls(self, top_n: int) -> List[str]:
+        """每页都取满时抓取前 top_n 名需要请求的分页地址"""
+        return [self.page_url(start, min(self.page_size, top_n - start))
+                for start in range(0, top_n, self.page_size)]
+
+    def _ingest_page(self, url: str, table: HLTVStatsTable) -> int:
+        response = self.request_func(url, stream=True)
+        if not response:
+            return 0
+
+        page_rows = 0
+
+        def on_row(row: Dict):
+            nonlocal page_rows
+            page_rows += 1
+            table.append(row)
+
+        parser = StatsTableParser(on_row)
+        decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+        try:
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                parser.feed(decoder.decode(chunk))
+            parser.feed(decoder.decode(b'', final=True))
+            parser.close()
+        except requests.exceptions.RequestException as e:
+            # 读取中途断开按请求失败处理 (结束分页)，已解析的行保留在表中
+            logger.error("HLTV统计分页读取中断 %s: %s (保留已读取的 %s 行)", url, e, page_rows)
+            return 0
+        finally:
+            response.close()
+        return page_rows
+
+
+def default_stats_file() -> str:
+    return os.path.join(CACHE_CONFIG['cache_dir'], CACHE_CONFIG['hltv_stats_file'])
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Liquipedia 选手信息框提取
+1. extract_infobox_fields: 从已解析的 BeautifulSoup 中提取信息框字段
+2. InfoboxStreamParser: 边下载边解析，信息框字段齐全(或信息框结束)后即可停止下载
+"""
+import codecs
+import logging
+from html.parser import HTMLParser
+from typing import Dict, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# 需要的信息框字段
+INFOBOX_LABELS = ('Team:', 'Nationality:', 'Born:', 'Role:')
+
+
+def extract_infobox_fields(soup, labels=INFOBOX_LABELS) -> Dict[str, str]:
+    """返回 {标签: 紧随其后的div的原始文本}，页面上没有的标签不出现在结果中"""
+    fields = {}
+    for label in labels:
+        label_elem = soup.find('div', class_='infobox-cell-2', string=label)
+        if label_elem:
+            value_div = label_elem.find_next('div')
+            if value_div:
+                fields[label] = value_div.text
+    return fields
+
+
+class InfoboxStreamParser(HTMLParser):
+    """增量解析选手页面，收集信息框字段、<title> 和一级标题"""
+
+    def __init__(self, labels=INFOBOX_LABELS):
+        super().__init__(convert_charrefs=True)
+        self.labels = set(labels)
+        self.fields: Dict[str, str] = {}
+        self.title = ''
+        self.heading = ''
+        # 读取中途连接出错时记录异常，此时字段可能不完整
+        self.error: Optional[Exception] = None
+
+        self.div_depth = 0
+        self.infobox_depth: Optional[int] = None
+        self.infobox_closed = False
+
+        # 当前正在收集文本的元素: (类型, 起始div深度)
+        self.capture: Optional[Tuple[str, int]] = None
+        self.capture_text = []
+        self.pending_label: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        """所需字段都已找到，或信息框已经结束"""
+        return self.infobox_closed or self.labels.issubset(self.fields)
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title' and not self.title:
+            self._start_capture('title')
+        elif tag == 'h1' and not self.heading and 'firstHeading' in (dict(attrs).get('class') or ''):
+            self._start_capture('heading')
+        if tag != 'div':
+            return
+
+        css_class = dict(attrs).get('class') or ''
+        self.div_depth += 1
+        if self.infobox_depth is None and 'fo-nttax-infobox' in css_class.split():
+            self.infobox_depth = self.div_depth
+
+        if self.capture is None:
+            if self.pending_label:
+                # 标签之后的第一个div就是字段值 (与 find_next('div') 一致)
+                self._start_capture(self.pending_label)
+                self.pending_label = None
+            elif 'infobox-cell-2' in css_class.split():
+                self._start_capture('label')
+
+    def handle_endtag(self, tag):
+        if self.capture and self.capture[0] in ('title', 'heading') and tag in ('title', 'h1'):
+            self._finish_capture()
+            return
+        if tag != 'div':
+            return
+
+        if self.capture and self.capture[1] == self.div_depth:
+            self._finish_capture()
+        if self.infobox_depth == self.div_depth:
+            self.infobox_closed = True
+            self.infobox_depth = None
+        self.div_depth -= 1
+
+    def handle_data(self, data):
+        if self.capture:
+            self.capture_text.append(data)
+
+    def _start_capture(self, kind: str):
+        self.capture = (kind, self.div_depth)
+        self.capture_text = []
+
+    def _finish_capture(self):
+        kind = self.capture[0]
+        text = ''.join(self.capture_text)
+        self.capture = None
+        if kind == 'title':
+            self.title = text.strip()
+        elif kind == 'heading':
+            self.heading = text.strip()
+        elif kind == 'label':
+            # 与 soup.find(string=label) 一致：只匹配文本恰好是标签的单元格
+            if text in self.labels and text not in self.fields:
+                self.pending_label = text
+        else:
+            self.fields[kind] = text
+
+
+def read_infobox_stream(response, chunk_size: int = 16 * 1024,
+                        labels=INFOBOX_LABELS) -> Tuple[InfoboxStreamParser, int]:
+    """
+    从 stream=True 的响应中边读边解析，信息框读完后立即关闭连接
+    返回 (解析器, 实际读取的字节数)；读取中途连接出错时不抛出，记录在 parser.error 中
+    """
+    parser = InfoboxStreamParser(labels)
+    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+    bytes_read = 0
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            bytes_read += len(chunk)
+            parser.feed(decoder.decode(chunk))
+            if parser.done:
+                break
+    except requests.exceptions.RequestException as e:
+        parser.error = e
+    finally:
+        # 提前结束时关闭连接，丢弃剩余内容
+        response.close()
+    return parser, bytes_read
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日志配置
+所有日志先进入内存队列，由后台 QueueListener 线程负责格式化并写入
+按大小轮转的日志文件和终端，抓取线程不会因磁盘/终端I/O而阻塞。
+"""
+import atexit
+import json
+import logging
+import queue
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+from config import LOGGING_CONFIG
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """每条日志输出为一行JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    不在调用线程里格式化消息：QueueHandler 默认会在 prepare() 中完成格式化，
+    这里直接把原始记录交给监听线程，%-格式化也推迟到后台线程执行
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(log_file: str = LOGGING_CONFIG['log_file'],
+                  json_format: bool = LOGGING_CONFIG['json_format'],
+                  level: str = LOGGING_CONFIG['level']) -> QueueListener:
+    """
+    配置根日志记录器 (重复调用直接返回已有的监听器)
+    json_format: 日志文件使用JSON Lines格式，终端仍输出普通文本
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    file_handler = RotatingFileHandler(
+        log_file,
+        maxBytes=LOGGING_CONFIG['max_file_size'],
+        backupCount=LOGGING_CONFIG['backup_count'],
+        encoding='utf-8'
+    )
+    text_formatter = logging.Formatter(LOGGING_CONFIG['format'])
+    file_handler.setFormatter(JsonLinesFormatter() if json_format else text_formatter)
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(text_formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _listener.start()
+    # 退出时把队列中剩余的日志写完
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """停止后台线程并刷新剩余日志"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内存上限与峰值统计 (optimized_crawler.py --max-rss)
+1. MemoryGuard: 常驻内存 (RSS) 超过上限时先回收垃圾并释放可丢弃的缓存，
+   仍然超出时由调用方施加背压 (上游阶段等待下游处理完已缓冲的工作)；
+   最后一个阶段 (抓取选手页面) 没有可以等待的下游，只释放缓存 (release)
+2. PeakTracker: 用 tracemalloc 记录各阶段的Python内存分配峰值，写入运行统计
+"""
+import gc
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from config import MEMORY_CONFIG
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def current_rss() -> Optional[int]:
+    """当前常驻内存(字节)；Linux 读取 /proc，其他系统退回峰值RSS，都不可用时返回None"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return peak_rss()
+
+
+def peak_rss() -> Optional[int]:
+    """进程的峰值常驻内存(字节)，Windows 上返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 单位是字节，Linux 是KB
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class MemoryGuard:
+    """按RSS上限判断是否需要背压；max_rss 为None时从不触发"""
+
+    def __init__(self, max_rss_mb: Optional[float] = MEMORY_CONFIG['max_rss_mb'],
+                 check_interval: float = MEMORY_CONFIG['check_interval']):
+        self.max_rss = int(max_rss_mb * MB) if max_rss_mb else None
+        self.check_interval = check_interval
+        # 内存紧张时调用，释放可以重新获取的数据 (如本次运行的页面结果缓存)
+        self.relief_callbacks: List[Callable[[], None]] = []
+        self.last_rss = 0
+        self._checked_at = 0.0
+        self.relieved = 0
+        self.backpressure = 0
+
+    def over_budget(self) -> bool:
+        """RSS是否超过上限 (按 check_interval 节流读取)"""
+        if self.max_rss is None:
+            return False
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            self.last_rss = current_rss() or 0
+        return self.last_rss > self.max_rss
+
+    def release(self):
+        """回收垃圾并释放缓存"""
+        self.relieved += 1
+        for callback in self.relief_callbacks:
+            callback()
+        gc.collect()
+        self._checked_at = 0.0
+
+    def relieve(self) -> bool:
+        """回收垃圾并释放缓存，返回之后是否仍然超出上限 (仍超出时调用方应施加背压)"""
+        self.release()
+        if not self.over_budget():
+            return False
+        self.backpressure += 1
+        logger.warning("常驻内存 %.0f MB 超过上限 %.0f MB，暂停上游阶段", self.last_rss / MB, self.max_rss / MB)
+        return True
+
+    def stats(self) -> Dict:
+        peak = peak_rss()
+        return {
+            '上限MB': round(self.max_rss / MB) if self.max_rss else None,
+            '峰值RSS MB': round(peak / MB, 1) if peak else None,
+            '释放缓存次数': self.relieved,
+            '背压次数': self.backpressure,
+        }
+
+
+class PeakTracker:
+    """用 tracemalloc 统计各阶段的分配峰值 (开启后分配变慢，只在内存受限模式下使用)"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.stages: Dict[str, float] = {}
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            self.stages[name] = round(peak / MB, 1)
+            logger.info("阶段 %s 的Python内存分配峰值: %.1f MB", name, peak / MB)
+
+    def stats(self) -> Dict[str, float]:
+        """{阶段: 峰值MB}"""
+        return dict(self.stages)
+
+    def stop(self):
+        if self.enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
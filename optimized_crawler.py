@@ -1,30 +1,46 @@
 import requests
 from bs4 import BeautifulSoup
-from datetime import datetime
 import time
 import csv
 import random
 import os
-import re
 import json
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import logging
 from urllib.parse import urljoin, urlparse
 import concurrent.futures
-from dataclasses import dataclass
+import queue
+import threading
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('crawler.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+from request_guard import NegativeCache, CircuitBreaker, AdaptiveTimeout, DeadlineExceeded
+from title_resolver import TitleResolver
+from hltv_stats import HLTVStatsIngestor, HLTVStatsTable, default_stats_file
+from sharding import normalize_title, shard_of, parse_shard_spec, shard_filename, find_shard_files
+from infobox import read_infobox_stream
+from parse_cache import SingleFlight
+from memory_guard import MemoryGuard, PeakTracker
+from text_cleaning import clean_text, clean_texts
+from stats_aggregator import StatsAggregator
+from birth_dates import parse_birth_date, age_text
+from csv_loader import load_records, iter_records
+from record_merge import FieldMerger, is_sorted, merge_key, merge_lists, merge_sorted
+from fetch_plan import FetchPlan
+from role_database import default_role_database
+from team_registry import default_team_registry
+from log_setup import setup_logging
+from config import CACHE_CONFIG, DATA_SOURCES, OUTPUT_CONFIG, FETCH_CONFIG, LOGGING_CONFIG, MEMORY_CONFIG, TIMEOUT_CONFIG
+
+# 日志在 main() 中通过 setup_logging 配置
 logger = logging.getLogger(__name__)
 
+# 输出CSV的表头 (来源用于合并时的优先级)
+CSV_FIELDNAMES = ['姓名', '队伍', '国籍', '年龄', '游戏内位置', '出生日期', '来源']
+
+# 链接队列中的分页标记：解析线程处理完一个列表页
+_PAGE_PARSED = object()
+
 @dataclass
 class PlayerInfo:
     """选手信息数据类"""
@@ -34,20 +50,46 @@ class PlayerInfo:
     age: str = "未知年龄"
     role: str = "未知位置"
     source: str = ""
+    # ISO格式出生日期 (只知道年份时为 YYYY)，有出生日期时年龄在导出时计算
+    birth_date: str = ""
+    # 队伍维度表中的ID (0 表示没有队伍，-1 表示尚未分配)，由 TeamRegistry.assign / canonicalize 显式分配
+    team_id: int = field(default=-1, compare=False)
+    
+    def current_age(self) -> str:
+        """按今天的日期计算年龄，没有出生日期时使用已保存的年龄"""
+        if self.birth_date:
+            return age_text(self.birth_date)
+        return str(self.age)
     
     def to_dict(self) -> Dict[str, str]:
         return {
             '姓名': self.name,
             '队伍': self.team,
             '国籍': self.nationality,
-            '年龄': str(self.age),
-            '游戏内位置': self.role
+            '年龄': self.current_age(),
+            '游戏内位置': self.role,
+            '出生日期': self.birth_date,
+            '来源': self.source
         }
 
 class CS2PlayerCrawler:
     """CS2选手信息爬虫类"""
     
-    def __init__(self):
+    def __init__(self, shard: Optional[Tuple[int, int]] = None,
+                 liquipedia_url: str = DATA_SOURCES['liquipedia']['base_url'],
+                 hltv_url: str = DATA_SOURCES['hltv']['base_url'],
+                 run_deadline: Optional[float] = TIMEOUT_CONFIG['run_deadline'],
+                 max_rss_mb: Optional[float] = MEMORY_CONFIG['max_rss_mb']):
+        """
+        shard: (分片编号, 分片总数)，只处理哈希到本分片的选手
+        liquipedia_url / hltv_url: 数据源地址，可指向本地替身服务器做测试
+        run_deadline: 整次运行最多花费的秒数，到时后不再发送请求
+        max_rss_mb: 常驻内存上限(MB)，超出时暂停解析地区列表页
+        """
+        self.shard = shard
+        self.liquipedia_url = liquipedia_url.rstrip('/')
+        self.hltv_url = hltv_url.rstrip('/')
+
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -57,10 +99,15 @@ class CS2PlayerCrawler:
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
         })
+        # 按主机延迟自适应的连接/读取超时
+        self.timeouts = AdaptiveTimeout(run_deadline)
+        self.timeouts.instrument(self.session)
         
         # 请求控制
         self.request_count = 0
         self.last_request_time = 0
+        # 地区列表页在后台线程中解析，两个阶段共用同一个请求间隔
+        self._rate_lock = threading.Lock()
         self.min_delay = 1.0
         self.max_delay = 3.0
         
@@ -71,35 +118,97 @@ class CS2PlayerCrawler:
             'poland', 'france', 'germany', 'norway', 'estonia', 'latvia',
             'brazil', 'canada', 'israel', 'kazakhstan', 'netherlands', 'guatemala'
         }
-        
+
+        # 已知缺失页面缓存 + 按主机熔断
+        self.negative_cache = NegativeCache()
+        self.circuit_breaker = CircuitBreaker()
+        self.title_resolver = TitleResolver(self._make_request, base_url=self.liquipedia_url)
+        
+        # 本地角色库 (页面上没有角色信息时使用)
+        self.role_database = default_role_database()
+        
+        # 队伍维度表 (与其他爬虫共用)
+        self.team_registry = default_team_registry()
+        # 队伍页面的标题解析单独缓存，不与选手标题混在一起
+        self.team_resolver = TitleResolver(
+            self._make_request, os.path.join(CACHE_CONFIG['cache_dir'], CACHE_CONFIG['team_title_cache_file']),
+            base_url=self.liquipedia_url)
+
+        # 同一页面在地区列表/HLTV/知名选手中重复出现时只抓取一次
+        self.page_flight = SingleFlight(remember=True)
+
+        # 内存上限：超出时先丢弃已抓取页面的结果 (之后重复出现时重新请求)
+        self.memory_guard = MemoryGuard(max_rss_mb)
+        self.memory_guard.relief_callbacks.append(self.page_flight.reset)
+
     def _rate_limit(self):
         """智能请求频率控制"""
+        with self._rate_lock:
+            self._wait_turn()
+
+    def _wait_turn(self):
         current_time = time.time()
         time_since_last = current_time - self.last_request_time
+        delay = self._request_delay(self.request_count)
         
-        if time_since_last < self.min_delay:
-            sleep_time = self.min_delay - time_since_last
+        if time_since_last < delay:
+            sleep_time = delay - time_since_last
             time.sleep(sleep_time)
         
-        # 动态调整延迟
+        # 每50个请求间隔增加一次
         if self.request_count % 50 == 0:
-            self.min_delay = min(2.0, self.min_delay + 0.1)
-            logger.info(f"调整请求延迟为: {self.min_delay}s")
+            logger.info(f"调整请求延迟为: {self._request_delay(self.request_count + 1)}s")
         
         self.last_request_time = time.time()
         self.request_count += 1
     
-    def _make_request(self, url: str, timeout: int = 10) -> Optional[requests.Response]:
+    def _request_delay(self, index: int) -> float:
+        """第index个请求(从0开始)前的最小间隔：第一个请求不等待，之后每50个请求增加0.1秒，最多2秒 (--plan 共用)"""
+        if index == 0:
+            return 0.0
+        return min(2.0, self.min_delay + 0.1 * ((index - 1) // 50 + 1))
+    
+    def _make_request(self, url: str, stream: bool = False) -> Optional[requests.Response]:
         """安全的请求方法"""
+        # 超过运行截止时间后不再请求
+        if self.timeouts.expired():
+            return None
+        # 熔断打开时直接返回，不等待超时
+        if not self.circuit_breaker.allow_request(url):
+            logger.warning(f"主机熔断中，跳过请求: {url}")
+            return None
+
         try:
             self._rate_limit()
-            response = self.session.get(url, timeout=timeout)
+            response = self.timeouts.request(self.session.get, url, stream=stream)
+            if response.status_code == 404:
+                # 不读正文就返回：关闭响应，stream=True 时连接才会还给连接池
+                response.close()
+                self.circuit_breaker.record_success(url)
+                self.negative_cache.add(url)
+                logger.warning(f"页面不存在 {url}")
+                return None
+            if not response.ok:
+                # 其他错误响应同样先释放连接
+                response.close()
             response.raise_for_status()
+            self.circuit_breaker.record_success(url)
+            self.negative_cache.discard(url)
             return response
+        except DeadlineExceeded:
+            return None
         except requests.exceptions.RequestException as e:
+            self.circuit_breaker.record_failure(url)
             logger.error(f"请求失败 {url}: {e}")
             return None
     
+    def _in_shard(self, title: str) -> bool:
+        """判断选手标题是否属于本分片 (未分片时总是True)；链接末尾和姓名都按 shard_key 计算，结果一致"""
+        if not self.shard:
+            return True
+        index, count = self.shard
+        return shard_of(title, count) == index
+    
     def _validate_player_info(self, player: PlayerInfo) -> bool:
         """验证选手信息"""
         if not player.name or len(player.name.strip()) < 2:
@@ -116,145 +225,153 @@ class CS2PlayerCrawler:
         
         return True
     
-    def _clean_text(self, text: str) -> str:
-        """清理文本数据"""
-        if not text:
-            return ""
-        
-        # 移除多余的空白字符
-        text = re.sub(r'\s+', ' ', text.strip())
-        
-        # 移除Wiki链接标记
-        text = re.sub(r'\[\[|\]\]', '', text)
-        
-        # 移除HTML标签
-        text = re.sub(r'<[^>]+>', '', text)
-        
-        return text
+    def crawl_liquipedia_by_region(self) -> List[PlayerInfo]:
+        """
+        从Liquipedia按地区爬取选手信息
+        所有请求都在主线程发出 (会话、熔断器、负缓存等不跨线程共享)：主线程抓取地区列表页交给后台线程解析，
+        选手链接以字符串放入有界队列，主线程同时抓取选手页面；
+        队列满时解析线程等待，内存超出上限时主线程先处理完已缓冲的链接再抓取下一个列表页
+        """
+        page_queue = queue.Queue(maxsize=1)
+        link_queue = queue.Queue(maxsize=MEMORY_CONFIG['link_queue_size'])
+        parser = threading.Thread(target=self._parse_region_pages, args=(page_queue, link_queue),
+                                  name='region-links', daemon=True)
+        parser.start()
+        players = self._process_player_links(self._region_links(page_queue, link_queue), "Liquipedia")
+        parser.join()
+        return players
     
-    def _extract_age_from_birth_date(self, birth_date: str) -> str:
-        """从出生日期提取年龄"""
-        try:
-            # 匹配年份模式
-            year_patterns = [
-                r'(\d{4})',  # 标准4位年份
-                r'born\s+(\d{4})',  # born 1995
-                r'(\d{4})\s*年',  # 1995年
-            ]
+    def _region_links(self, page_queue: queue.Queue, link_queue: queue.Queue) -> Iterator[str]:
+        """主线程：按需抓取地区列表页并逐个返回解析出的选手链接"""
+        regions = iter(DATA_SOURCES['liquipedia']['regions'].items())
+        fetching = True
+        fed = parsed = 0
+        holding = False
+        while True:
+            if fetching and not page_queue.full():
+                # 已交给解析线程的页面全部处理完后解除背压
+                holding = holding and fed > parsed
+                # 抓取下一页之前检查内存，仍超出上限时先处理完已缓冲的链接
+                if not holding and fed > parsed and self.memory_guard.over_budget():
+                    holding = self.memory_guard.relieve()
+                if not holding:
+                    page = self._fetch_region_page(regions)
+                    if page is None:
+                        fetching = False
+                        page_queue.put(None)
+                    else:
+                        fed += 1
+                        page_queue.put(page)
             
-            for pattern in year_patterns:
-                match = re.search(pattern, birth_date, re.IGNORECASE)
-                if match:
-                    birth_year = int(match.group(1))
-                    current_year = datetime.now().year
-                    age = current_year - birth_year
-                    
-                    if 15 <= age <= 50:  # 合理的年龄范围
-                        return str(age)
-            
-            return "未知年龄"
-        except (ValueError, TypeError) as e:
-            logger.warning(f"年龄解析失败: {birth_date} - {e}")
-            return "未知年龄"
+            href = link_queue.get()
+            if href is None:
+                return
+            if href is _PAGE_PARSED:
+                parsed += 1
+                continue
+            yield href
     
-    def crawl_liquipedia_by_region(self) -> List[PlayerInfo]:
-        """从Liquipedia按地区爬取选手信息"""
-        region_urls = {
-            "Europe": "https://liquipedia.net/counterstrike/Portal:Players/Europe",
-            "CIS": "https://liquipedia.net/counterstrike/Portal:Players/CIS",
-            "Americas": "https://liquipedia.net/counterstrike/Portal:Players/Americas",
-            "Oceania": "https://liquipedia.net/counterstrike/Portal:Players/Oceania",
-            "Asia": "https://liquipedia.net/counterstrike/Portal:Players/Asia",
-            "Africa & Middle East": "https://liquipedia.net/counterstrike/Portal:Players/Africa_&_Middle_East"
-        }
-        
-        all_players = []
-        
-        for region, url in region_urls.items():
+    def _fetch_region_page(self, regions: Iterator[Tuple[str, str]]) -> Optional[Tuple[str, str]]:
+        """抓取下一个可用的地区列表页，返回 (地区, 页面HTML)，没有剩余地区时返回None"""
+        for region, page in regions:
             logger.info(f"正在处理地区: {region}")
-            
-            response = self._make_request(url)
+            response = self._make_request(f"{self.liquipedia_url}/{page}")
             if not response:
                 continue
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            tables = soup.find_all('table', class_='wikitable')
-            
-            region_players = []
-            for table in tables:
-                links = table.find_all('a', href=True)
-                for link in links:
-                    href = link['href']
-                    if (href.startswith('/counterstrike/') and
-                            href.count('/') == 2 and
-                            ' ' not in link.text.strip() and
-                            len(link.text.strip()) < 15):
-                        region_players.append(link)
-            
-            logger.info(f"{region} 找到 {len(region_players)} 个选手链接")
-            all_players.extend(region_players)
-        
-        return self._process_player_links(all_players, "Liquipedia")
-    
-    def crawl_hltv_top500(self) -> List[PlayerInfo]:
-        """从HLTV爬取Top 500选手"""
-        hltv_url = "https://www.hltv.org/stats/players?start=0&limit=500"
-        
-        response = self._make_request(hltv_url)
-        if not response:
+            text = response.text
+            response.close()
+            return region, text
+        return None
+    
+    def _parse_region_pages(self, page_queue: queue.Queue, link_queue: queue.Queue):
+        """
+        解析线程：只解析主线程抓取的列表页，不发请求；
+        每页的链接之后放入 _PAGE_PARSED，全部结束时放入 None
+        """
+        try:
+            for region, text in iter(page_queue.get, None):
+                hrefs = self._extract_region_links(text)
+                logger.info(f"{region} 找到 {len(hrefs)} 个选手链接")
+                for href in hrefs:
+                    # 队列满时阻塞，直到主线程取走链接
+                    link_queue.put(href)
+                link_queue.put(_PAGE_PARSED)
+        except Exception as e:
+            logger.error(f"地区列表解析失败: {e}")
+        finally:
+            link_queue.put(None)
+    
+    @staticmethod
+    def _extract_region_links(text: str) -> List[str]:
+        """提取列表页中的选手链接，链接提取为字符串后立即释放整页的解析树"""
+        soup = BeautifulSoup(text, 'html.parser')
+        hrefs = []
+        for table in soup.find_all('table', class_='wikitable'):
+            for link in table.find_all('a', href=True):
+                href = link['href']
+                name = link.text.strip()
+                if (href.startswith('/counterstrike/') and
+                        href.count('/') == 2 and
+                        ' ' not in name and
+                        len(name) < 15):
+                    hrefs.append(str(href))
+        soup.decompose()
+        return hrefs
+    
+    def crawl_hltv_top500(self, top_n: Optional[int] = None) -> List[PlayerInfo]:
+        """从HLTV爬取Top N选手 (默认 DATA_SOURCES['hltv']['top_n'])"""
+        hltv_config = DATA_SOURCES['hltv']
+        top_n = top_n or hltv_config['top_n']
+        
+        # 分页流式解析统计表，保留Rating/Maps/K-D等数值列
+        ingestor = HLTVStatsIngestor(self._make_request, stats_url=f"{self.hltv_url}/stats/players")
+        stats = ingestor.ingest(top_n)
+        if not len(stats):
             return []
+        stats.save(default_stats_file())
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        player_names = []
-        
-        for row in soup.select('table.stats-table tbody tr'):
-            name_elem = row.find('a', class_='player-nick')
-            if name_elem:
-                name = self._clean_text(name_elem.text)
-                if name:
-                    player_names.append(name)
+        # 先按统计数据筛选，再逐个抓取选手页面
+        player_names = clean_texts(stats.filter_names(
+            min_rating=hltv_config['min_rating'], min_maps=hltv_config['min_maps']))
+        player_names = [name for name in player_names if name]
         
-        logger.info(f"从HLTV找到 {len(player_names)} 个Top选手")
+        logger.info(f"从HLTV找到 {len(stats)} 个Top选手，筛选后 {len(player_names)} 个")
         return self._process_player_names(player_names, "HLTV")
     
     def crawl_famous_players(self) -> List[PlayerInfo]:
         """爬取知名选手信息"""
-        famous_players = [
-            "s1mple", "ZywOo", "NiKo", "dev1ce", "coldzera", "f0rest", "GeT_RiGhT",
-            "kennyS", "olofmeister", "GuardiaN", "paszaBiceps", "Snax", "shox", "KRIMZ",
-            "flusha", "JW", "Xyp9x", "dupreeh", "gla1ve", "magisk", "electronic",
-            "Boombl4", "Perfecto", "b1t", "m0NESY", "donk", "Ax1Le", "magixx",
-            "chopper", "zont1x", "siuhy", "elige", "bLitz", "Techno", "Senzu",
-            "mzinho", "910", "Wicadia", "HeavyGod", "torzsi", "Jimpphat", "flameZ",
-            "mezii", "jottAAA", "iM", "w0nderful", "kyxsan", "Maka", "Staehr", "FL4MUS",
-            "fame", "ICY", "NertZ", "ultimate", "snow", "nqz", "Tauson", "sl3nd",
-            "PR", "story", "skullz", "exit", "Lucaozy", "brnz4n", "insani", "phzy",
-            "JBa", "nicoodoz", "LNZ", "JDC", "fear", "somebody", "CYPHER", "jkaem",
-            "kaze", "ChildKing", "L1haNg", "Attacker", "JamYoung", "Jee", "Mercury",
-            "Moseyuh", "Westmelon", "z4kr", "EmiliaQAQ", "C4LLM3SU3", "xertioN"
-        ]
-        
-        return self._process_player_names(famous_players, "Famous")
-    
-    def _process_player_links(self, links: List, source: str) -> List[PlayerInfo]:
-        """处理选手链接列表"""
+        return self._process_player_names(DATA_SOURCES['famous_players']['players'], "Famous")
+    
+    def _process_player_links(self, hrefs: Iterable[str], source: str) -> List[PlayerInfo]:
+        """处理选手链接 (页面内的相对地址)，可以是边解析边产生的迭代器"""
         players = []
-        
-        for link in links:
-            player_url = "https://liquipedia.net" + link['href']
+        processed = 0
+        for href in hrefs:
+            if not self._in_shard(href.rsplit('/', 1)[-1]):
+                continue
+            processed += 1
+            self._release_memory()
+            player_url = urljoin(self.liquipedia_url, href)
             player_info = self._get_player_info_from_liquipedia(player_url)
             if player_info:
                 player_info.source = source
                 if self._validate_player_info(player_info):
                     players.append(player_info)
         
+        if self.shard:
+            logger.info(f"分片 {self.shard[0]}/{self.shard[1]}: 处理了 {processed} 个选手链接")
         return players
     
     def _process_player_names(self, names: List[str], source: str) -> List[PlayerInfo]:
         """处理选手姓名列表"""
         players = []
+        names = [name for name in names if self._in_shard(name)]
+        if self.shard:
+            logger.info(f"分片 {self.shard[0]}/{self.shard[1]}: 处理 {len(names)} 个选手")
+        self.title_resolver.resolve(names)
         
         for name in names:
+            self._release_memory()
             player_info = self._get_player_info_by_name(name)
             if player_info:
                 player_info.source = source
@@ -263,57 +380,65 @@ class CS2PlayerCrawler:
         
         return players
     
+    def _release_memory(self):
+        """选手页面阶段没有下游可以等待，超出内存上限时只释放缓存，不暂停抓取"""
+        if self.memory_guard.over_budget():
+            self.memory_guard.release()
+    
     def _get_player_info_from_liquipedia(self, url: str) -> Optional[PlayerInfo]:
-        """从Liquipedia页面获取选手信息"""
-        response = self._make_request(url)
+        """从Liquipedia页面获取选手信息 (本次运行内同一页面只抓取一次，返回副本供调用方设置来源)"""
+        player_info = self.page_flight.do(url, lambda: self._fetch_player_page(url))
+        return replace(player_info) if player_info else None
+
+    def _fetch_player_page(self, url: str) -> Optional[PlayerInfo]:
+        if self.negative_cache.contains(url):
+            return None
+
+        # 边下载边解析，信息框读完后立即断开连接
+        response = self._make_request(url, stream=True)
         if not response:
             return None
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        parser, _ = read_infobox_stream(response, FETCH_CONFIG['stream_chunk_size'])
+        if parser.error is not None:
+            # 读取中途断开：按请求失败处理，不记入负缓存
+            self.circuit_breaker.record_failure(url)
+            logger.error(f"页面读取中断 {url}: {parser.error}")
+            return None
+        fields = parser.fields
         
-        # 检查是否为选手页面
-        if not soup.find('div', class_='infobox-cell-2', string='Nationality:'):
+        # 检查是否为选手页面 (页面存在，只是缺少国籍或没有读到：不记入负缓存，只有404才记入)
+        if 'Nationality:' not in fields:
             return None
         
         try:
             # 提取姓名
-            name_elem = soup.find('h1', class_='firstHeading')
-            name = self._clean_text(name_elem.text) if name_elem else ""
+            name = clean_text(parser.heading)
             
             # 提取队伍
-            team_elem = soup.find('div', class_='infobox-cell-2', string='Team:')
             team = "自由选手"
-            if team_elem:
-                team_div = team_elem.find_next('div')
-                if team_div:
-                    team = self._clean_text(team_div.text)
+            if 'Team:' in fields:
+                team = clean_text(fields['Team:'])
             
             # 提取国籍
-            nationality_elem = soup.find('div', class_='infobox-cell-2', string='Nationality:')
-            nationality = "未知国籍"
-            if nationality_elem:
-                nationality_div = nationality_elem.find_next('div')
-                if nationality_div:
-                    nationality = self._clean_text(nationality_div.text)
+            nationality = clean_text(fields['Nationality:'])
             
             # 提取年龄
-            birth_elem = soup.find('div', class_='infobox-cell-2', string='Born:')
             age = "未知年龄"
-            if birth_elem:
-                birth_div = birth_elem.find_next('div')
-                if birth_div:
-                    birth_date = self._clean_text(birth_div.text)
-                    age = self._extract_age_from_birth_date(birth_date)
+            birth_date = ""
+            if 'Born:' in fields:
+                birth_date = parse_birth_date(clean_text(fields['Born:']))
+                age = age_text(birth_date)
             
             # 提取角色
-            role_elem = soup.find('div', class_='infobox-cell-2', string='Role:')
             role = "未知位置"
-            if role_elem:
-                role_div = role_elem.find_next('div')
-                if role_div:
-                    role = self._clean_text(role_div.text)
+            if 'Role:' in fields:
+                role = clean_text(fields['Role:'])
+            else:
+                role = self.role_database.lookup(name) or role
             
-            return PlayerInfo(name=name, team=team, nationality=nationality, age=age, role=role)
+            return PlayerInfo(name=name, team=team, nationality=nationality, age=age, role=role,
+                              birth_date=birth_date)
             
         except Exception as e:
             logger.error(f"解析选手信息失败 {url}: {e}")
@@ -321,19 +446,23 @@ class CS2PlayerCrawler:
     
     def _get_player_info_by_name(self, name: str) -> Optional[PlayerInfo]:
         """通过姓名获取选手信息"""
-        # 尝试从Liquipedia获取
-        liquipedia_url = f"https://liquipedia.net/counterstrike/{name}"
-        player_info = self._get_player_info_from_liquipedia(liquipedia_url)
-        
-        if player_info:
-            return player_info
+        # 尝试从Liquipedia获取 (已确认不存在或消歧义的标题直接跳过)
+        entry = self.title_resolver.lookup(name)
+        if not entry or not (entry['missing'] or entry['disambiguation']):
+            liquipedia_url = self.title_resolver.page_url(name)
+            player_info = self._get_player_info_from_liquipedia(liquipedia_url)
+            
+            if player_info:
+                return player_info
         
         # 如果Liquipedia没有，尝试从HLTV获取基本信息
         return self._get_player_info_from_hltv(name)
     
     def _get_player_info_from_hltv(self, name: str) -> Optional[PlayerInfo]:
         """从HLTV获取选手基本信息"""
-        search_url = f"https://www.hltv.org/search?query={name}"
+        search_url = f"{self.hltv_url}/search?query={name}"
+        if self.negative_cache.contains(search_url):
+            return None
         
         response = self._make_request(search_url)
         if not response:
@@ -341,11 +470,14 @@ class CS2PlayerCrawler:
         
         soup = BeautifulSoup(response.text, 'html.parser')
         player_link = soup.find("a", class_="player-nick")
+        player_href = str(player_link['href']) if player_link else None
+        soup.decompose()
         
-        if not player_link:
+        if not player_href:
+            self.negative_cache.add(search_url)
             return None
         
-        player_url = "https://www.hltv.org" + player_link['href']
+        player_url = self.hltv_url + player_href
         player_response = self._make_request(player_url)
         
         if not player_response:
@@ -357,7 +489,7 @@ class CS2PlayerCrawler:
         team = "自由选手"
         nationality = "未知国籍"
         age = "未知年龄"
-        role = "未知位置"
+        role = self.role_database.lookup(name) or "未知位置"
         
         # 尝试提取队伍信息
         team_elem = player_soup.find("div", class_="player-info")
@@ -366,11 +498,70 @@ class CS2PlayerCrawler:
             # 简单的队伍信息提取逻辑
             if "team" in team_text.lower():
                 team = "活跃选手"  # HLTV通常不显示具体队伍
+        player_soup.decompose()
         
         return PlayerInfo(name=name, team=team, nationality=nationality, age=age, role=role)
     
+    def build_fetch_plan(self, top_n: Optional[int] = None) -> FetchPlan:
+        """试运行：按当前缓存列出本次爬取会发送的请求，不访问网络"""
+        plan = FetchPlan(self._request_delay)
+        
+        # 1. Liquipedia 地区列表页 (其中的选手链接要运行时才知道)
+        for region, page in DATA_SOURCES['liquipedia']['regions'].items():
+            url = f"{self.liquipedia_url}/{page}"
+            if self.negative_cache.contains(url, record_hit=False):
+                plan.add(url, f"地区列表 {region}", 'cached', "已知缺失页面")
+            else:
+                plan.add(url, f"地区列表 {region}")
+        plan.note("地区列表页中的选手链接要在运行时才能确定，未计入估算")
+        
+        # 2. HLTV 统计表分页 + 上次统计结果中的选手
+        top_n = top_n or DATA_SOURCES['hltv']['top_n']
+        ingestor = HLTVStatsIngestor(self._make_request, stats_url=f"{self.hltv_url}/stats/players")
+        for url in ingestor.page_urls(top_n):
+            plan.add(url, "HLTV统计表")
+        if os.path.exists(default_stats_file()):
+            hltv_config = DATA_SOURCES['hltv']
+            stats = HLTVStatsTable.load(default_stats_file())
+            names = clean_texts(stats.filter_names(
+                min_rating=hltv_config['min_rating'], min_maps=hltv_config['min_maps'], limit=top_n))
+            self._plan_player_names(plan, [name for name in names if name])
+            plan.note("HLTV选手按上次保存的统计表估算")
+        else:
+            plan.note("没有已保存的HLTV统计表，HLTV选手页面未计入估算")
+        
+        # 3. 知名选手
+        self._plan_player_names(plan, DATA_SOURCES['famous_players']['players'])
+        return plan
+    
+    def _plan_player_names(self, plan: FetchPlan, names: List[str]):
+        """按 _process_player_names / _get_player_info_by_name 的流程规划请求"""
+        names = [name for name in names if self._in_shard(name)]
+        for batch in self.title_resolver.batches(names):
+            plan.add(self.title_resolver.query_url(batch), f"标题解析 ({len(batch)} 个)")
+        
+        for name in names:
+            url = self.title_resolver.page_url(name)
+            entry = self.title_resolver.lookup(name)
+            # Liquipedia 没有结果时才会查询HLTV
+            fallback = 'fetch'
+            if entry and (entry['missing'] or entry['disambiguation']):
+                plan.add(url, name, 'skipped', "消歧义页面" if entry['disambiguation'] else "Liquipedia 不存在该页面")
+            elif self.negative_cache.contains(url, record_hit=False):
+                plan.add(url, name, 'cached', "已知缺失页面")
+            else:
+                plan.add(url, name)
+                fallback = 'conditional'
+            
+            search_url = f"{self.hltv_url}/search?query={name}"
+            if self.negative_cache.contains(search_url, record_hit=False):
+                plan.add(search_url, f"{name} (HLTV搜索)", 'cached', "已知无搜索结果")
+            else:
+                plan.add(search_url, f"{name} (HLTV搜索)", fallback, "Liquipedia 没有结果时" if fallback == 'conditional' else "")
+                plan.add(f"{self.hltv_url}/player/<id>/{name}", f"{name} (HLTV选手页面)", 'conditional', "搜索到选手时")
+    
     def save_to_csv(self, players: List[PlayerInfo], filename: str):
-        """保存选手信息到CSV文件"""
+        """保存选手信息到CSV文件 (文件中已有的选手保留旧记录)，按姓名排序写出以便流式合并"""
         if not players:
             logger.warning("没有选手数据可保存")
             return
@@ -382,53 +573,136 @@ class CS2PlayerCrawler:
         filepath = output_dir / filename
         
         # 检查已存在的数据
+        rows = []
         existing_players = set()
+        fieldnames = CSV_FIELDNAMES
         if filepath.exists():
             with open(filepath, 'r', encoding='utf-8') as file:
                 reader = csv.DictReader(file)
                 for row in reader:
                     existing_players.add(row['姓名'])
-        
-        # 写入新数据
-        with open(filepath, 'a', newline='', encoding='utf-8') as file:
-            fieldnames = ['姓名', '队伍', '国籍', '年龄', '游戏内位置']
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-            
-            # 如果文件为空，写入表头
-            if filepath.stat().st_size == 0:
-                writer.writeheader()
-            
-            new_count = 0
-            for player in players:
-                if player.name not in existing_players:
-                    writer.writerow(player.to_dict())
-                    new_count += 1
-                    existing_players.add(player.name)
-            
-            logger.info(f"保存了 {new_count} 个新选手信息到 {filepath}")
+                    rows.append(row)
+                # 沿用旧文件的表头 (旧文件可能没有出生日期/来源列)
+                fieldnames = reader.fieldnames or fieldnames
+        
+        new_count = 0
+        for player in players:
+            if player.name not in existing_players:
+                rows.append(player.to_dict())
+                new_count += 1
+                existing_players.add(player.name)
+        rows.sort(key=lambda row: normalize_title(row['姓名']))
+        
+        # 写临时文件后替换
+        tmp_file = output_dir / f"{filename}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(tmp_file, filepath)
+        
+        logger.info(f"保存了 {new_count} 个新选手信息到 {filepath}")
+    
+    def load_from_csv(self, filepath: Path) -> List[PlayerInfo]:
+        """读取 save_to_csv 写出的文件 (用于合并分片输出)"""
+        # 空单元格使用 PlayerInfo 的默认值，没有来源列时以文件名作为来源
+        return load_records(filepath, PlayerInfo, skip_empty=True, source=filepath.name)
+    
+    def iter_from_csv(self, filepath: Path):
+        """与 load_from_csv 相同，但逐行读取"""
+        return iter_records(filepath, PlayerInfo, skip_empty=True, source=filepath.name)
     
     def merge_and_deduplicate(self, players_list: List[List[PlayerInfo]]) -> List[PlayerInfo]:
-        """合并并去重选手信息"""
-        all_players = {}
-        
-        for players in players_list:
-            for player in players:
-                if player.name not in all_players:
-                    all_players[player.name] = player
-                else:
-                    # 如果已存在，选择信息更完整的版本
-                    existing = all_players[player.name]
-                    if (player.age != "未知年龄" and existing.age == "未知年龄") or \
-                       (player.team != "自由选手" and existing.team == "自由选手"):
-                        all_players[player.name] = player
-        
-        return list(all_players.values())
+        """合并并去重选手信息：同名选手按字段合并 (有效值 > 来源优先级 > 先出现的来源)"""
+        return merge_lists(players_list)
+
+def merge_shards(filename: str = OUTPUT_CONFIG['filename'], shard_count: Optional[int] = None):
+    """
+    K路归并所有分片的输出文件 (以及已有的合并结果)，同名选手按字段合并
+    分片文件已按姓名排序，归并时每个文件只保留当前一行
+    shard_count: 只合并分片总数为K的文件；不指定时输出目录中不能混有不同K的分片文件
+    """
+    try:
+        shard_files = find_shard_files(OUTPUT_CONFIG['output_dir'], filename, shard_count)
+    except ValueError as e:
+        logger.error(f"拒绝合并: {e}")
+        return
+    if not shard_files:
+        logger.error(f"没有找到 {filename} 的分片文件")
+        return
+    count = shard_count or int(shard_files[0].stem.rsplit('-of-', 1)[-1])
+    if len(shard_files) < count:
+        logger.warning(f"只找到 {len(shard_files)}/{count} 个分片文件，合并结果不完整")
+    
+    crawler = CS2PlayerCrawler()
+    output_path = Path(OUTPUT_CONFIG['output_dir']) / filename
+    input_files = shard_files + ([output_path] if output_path.exists() else [])
+    
+    sources = []
+    for input_file in input_files:
+        if is_sorted(crawler.iter_from_csv(input_file)):
+            sources.append(crawler.iter_from_csv(input_file))
+        else:
+            # 旧版本追加写入的文件没有排序，只能整体读入后排序
+            logger.warning(f"{input_file.name} 没有按姓名排序，读入内存排序")
+            sources.append(sorted(crawler.load_from_csv(input_file), key=merge_key))
+    
+    merger = FieldMerger()
+    merged = merge_sorted(sources, fetched_at=[f.stat().st_mtime for f in input_files],
+                          labels=[f.name for f in input_files], merger=merger)
+    
+    # 边归并边写出和统计，不在内存中保留全部选手
+    stats = StatsAggregator()
+    tmp_file = Path(f"{output_path}.{os.getpid()}.tmp")
+    with open(tmp_file, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=CSV_FIELDNAMES, extrasaction='ignore')
+        writer.writeheader()
+        for player in merged:
+            writer.writerow(player.to_dict())
+            stats.add(player)
+    os.replace(tmp_file, output_path)
+    
+    logger.info(f"合并 {len(shard_files)} 个分片后共有 {stats.total} 个唯一选手 "
+                f"(合并重复 {merger.merged} 个，补全字段 {merger.fields_filled} 个)，已保存到 {output_path}")
+    write_report(stats)
 
 def main():
     """主函数"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="CS2选手信息爬虫")
+    parser.add_argument('--shard', type=parse_shard_spec, default=None,
+                        help="分片模式：只处理第i个分片(共K个，i从0开始)，格式 i/K")
+    parser.add_argument('--merge', nargs='?', type=int, const=0, default=None, metavar='K',
+                        help="合并分片的输出文件并去重；输出目录中有不同分片数的文件时需指定K")
+    parser.add_argument('--liquipedia-url', default=DATA_SOURCES['liquipedia']['base_url'],
+                        help="Liquipedia地址 (可指向本地替身服务器)")
+    parser.add_argument('--hltv-url', default=DATA_SOURCES['hltv']['base_url'],
+                        help="HLTV地址 (可指向本地替身服务器)")
+    parser.add_argument('--plan', action='store_true',
+                        help="试运行：只列出将要发送的请求并估算耗时，不访问网络")
+    parser.add_argument('--deadline', type=float, default=TIMEOUT_CONFIG['run_deadline'], metavar='SECONDS',
+                        help="整次运行最多花费的秒数，到时后停止请求并保存已获得的数据")
+    parser.add_argument('--max-rss', type=float, default=MEMORY_CONFIG['max_rss_mb'], metavar='MB',
+                        help="内存受限模式：常驻内存超过MB时暂停解析地区列表页，并统计各阶段的内存分配峰值")
+    args = parser.parse_args()
+    
+    setup_logging(LOGGING_CONFIG['log_file'])
+    
+    if args.merge is not None:
+        merge_shards(shard_count=args.merge or None)
+        return
+    
     logger.info("开始CS2选手信息爬取")
     
-    crawler = CS2PlayerCrawler()
+    crawler = CS2PlayerCrawler(args.shard, args.liquipedia_url, args.hltv_url, args.deadline, args.max_rss)
+    
+    if args.plan:
+        print(crawler.build_fetch_plan().render())
+        return
+    
+    # tracemalloc 会拖慢分配，只在内存受限模式下开启
+    tracker = PeakTracker(enabled=args.max_rss is not None)
     
     # 爬取不同来源的数据
     all_players = []
@@ -436,7 +710,8 @@ def main():
     # 1. 爬取Liquipedia地区数据
     try:
         logger.info("开始爬取Liquipedia地区数据...")
-        liquipedia_players = crawler.crawl_liquipedia_by_region()
+        with tracker.stage('Liquipedia地区'):
+            liquipedia_players = crawler.crawl_liquipedia_by_region()
         all_players.append(liquipedia_players)
         logger.info(f"Liquipedia地区数据爬取完成，获得 {len(liquipedia_players)} 个选手")
     except Exception as e:
@@ -445,7 +720,8 @@ def main():
     # 2. 爬取HLTV Top 500
     try:
         logger.info("开始爬取HLTV Top 500数据...")
-        hltv_players = crawler.crawl_hltv_top500()
+        with tracker.stage('HLTV'):
+            hltv_players = crawler.crawl_hltv_top500()
         all_players.append(hltv_players)
         logger.info(f"HLTV Top 500数据爬取完成，获得 {len(hltv_players)} 个选手")
     except Exception as e:
@@ -454,7 +730,8 @@ def main():
     # 3. 爬取知名选手
     try:
         logger.info("开始爬取知名选手数据...")
-        famous_players = crawler.crawl_famous_players()
+        with tracker.stage('知名选手'):
+            famous_players = crawler.crawl_famous_players()
         all_players.append(famous_players)
         logger.info(f"知名选手数据爬取完成，获得 {len(famous_players)} 个选手")
     except Exception as e:
@@ -464,63 +741,61 @@ def main():
     final_players = crawler.merge_and_deduplicate(all_players)
     logger.info(f"合并后共有 {len(final_players)} 个唯一选手")
     
-    # 保存数据
-    crawler.save_to_csv(final_players, "cs2_players_optimized.csv")
-    
-    # 生成统计报告
-    generate_report(final_players)
+    # 用Liquipedia重定向合并队伍别名 (如 NAVI -> Natus Vincere)
+    crawler.team_registry.learn_redirects(crawler.team_resolver)
+    crawler.team_registry.canonicalize(final_players)
+    
+    # 保存数据 (分片模式写入单独的分片文件，由 --merge 统一合并)
+    filename = OUTPUT_CONFIG['filename']
+    if args.shard:
+        filename = shard_filename(filename, *args.shard)
+    crawler.save_to_csv(final_players, filename)
+    crawler.negative_cache.save()
+    crawler.title_resolver.save()
+    crawler.team_resolver.save()
+    crawler.team_registry.save()
+    logger.info(f"负缓存命中 {crawler.negative_cache.hits} 次，熔断跳过 {crawler.circuit_breaker.skipped} 次请求")
+    logger.info(f"重复页面合并 {crawler.page_flight.shared} 次")
+    tracker.stop()
+    
+    # 生成统计报告 (分片模式在合并后生成)
+    if not args.shard:
+        generate_report(final_players, {
+            '负缓存命中': crawler.negative_cache.hits,
+            '熔断跳过请求': crawler.circuit_breaker.skipped,
+            '本地角色库': crawler.role_database.stats(),
+            '自适应超时': crawler.timeouts.stats(),
+            '合并重复页面': crawler.page_flight.shared,
+            '内存': {**crawler.memory_guard.stats(), '阶段分配峰值MB': tracker.stats()},
+        })
     
     logger.info("爬取任务完成")
 
-def generate_report(players: List[PlayerInfo]):
-    """生成数据统计报告"""
+def generate_report(players: List[PlayerInfo], run_metrics: Optional[Dict] = None):
+    """生成数据统计报告 (文本 + JSON)，单遍累计所有计数和分布"""
     if not players:
         return
     
-    # 统计信息
-    total_players = len(players)
-    players_with_age = sum(1 for p in players if p.age != "未知年龄")
-    players_with_team = sum(1 for p in players if p.team != "自由选手")
-    players_with_role = sum(1 for p in players if p.role != "未知位置")
-    
-    # 国籍统计
-    nationality_count = {}
-    for player in players:
-        nationality = player.nationality
-        nationality_count[nationality] = nationality_count.get(nationality, 0) + 1
-    
-    # 角色统计
-    role_count = {}
+    stats = StatsAggregator()
     for player in players:
-        role = player.role
-        role_count[role] = role_count.get(role, 0) + 1
-    
-    # 生成报告
-    report = f"""
-CS2选手数据统计报告
-==================
-总选手数: {total_players}
-有年龄信息的选手: {players_with_age} ({players_with_age/total_players*100:.1f}%)
-有队伍信息的选手: {players_with_team} ({players_with_team/total_players*100:.1f}%)
-有角色信息的选手: {players_with_role} ({players_with_role/total_players*100:.1f}%)
+        stats.add(player)
+    write_report(stats, run_metrics)
 
-国籍分布 (Top 10):
-"""
-    
-    # 按数量排序国籍
-    sorted_nationalities = sorted(nationality_count.items(), key=lambda x: x[1], reverse=True)
-    for nationality, count in sorted_nationalities[:10]:
-        report += f"{nationality}: {count} ({count/total_players*100:.1f}%)\n"
+def write_report(stats: StatsAggregator, run_metrics: Optional[Dict] = None):
+    """输出已累计好的统计报告"""
+    if not stats.total:
+        return
+    if run_metrics:
+        stats.run_metrics.update(run_metrics)
     
-    report += "\n角色分布:\n"
-    for role, count in role_count.items():
-        report += f"{role}: {count} ({count/total_players*100:.1f}%)\n"
+    report = stats.render_text("CS2选手数据统计报告", [f"总选手数: {stats.total}"])
     
     # 保存报告
-    with open("output/statistics_report.txt", "w", encoding="utf-8") as f:
-        f.write(report)
+    report_file = os.path.join(OUTPUT_CONFIG['output_dir'], OUTPUT_CONFIG['report_filename'])
+    json_file = str(Path(report_file).with_suffix('.json'))
+    stats.save(report_file, report, json_file)
     
-    logger.info("统计报告已生成: output/statistics_report.txt")
+    logger.info("统计报告已生成: %s, %s", report_file, json_file)
     print(report)
 
 if __name__ == "__main__":
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解析结果缓存
+1. ParseCache: 以 正文哈希 + 解析器版本 为键缓存提取结果，页面内容没变时不再构建 BeautifulSoup；
+   解析器版本由提取函数的源码计算，修改提取逻辑后旧缓存自动失效
+2. SingleFlight: 同一个URL同时只发送一个请求，其他调用方等待并共用结果；
+   remember=True 时一次运行内完成的结果也保留 (多个名字重定向到同一页面时只抓取一次)
+"""
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from config import CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def extractor_version(*parts) -> str:
+    """根据提取代码 (模块/函数/类的源码) 及其他参数计算解析器版本"""
+    digest = hashlib.sha1()
+    for part in parts:
+        if inspect.ismodule(part) or inspect.isclass(part) or inspect.isfunction(part):
+            try:
+                part = inspect.getsource(part)
+            except (OSError, TypeError):
+                # 只有字节码 (.pyc) 时退回名称
+                part = part.__name__
+        digest.update(repr(part).encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+class ParseCache:
+    """{sha256(版本 + 正文): 提取结果}，按最近使用淘汰，结果必须可以JSON序列化"""
+
+    def __init__(self, version: str, cache_file: Optional[str] = None,
+                 max_entries: int = CACHE_CONFIG['parse_cache_max_entries']):
+        if cache_file is None:
+            cache_file = os.path.join(CACHE_CONFIG['cache_dir'], CACHE_CONFIG['parse_cache_file'])
+        self.cache_file = Path(cache_file)
+        self.version = version
+        self.max_entries = max_entries
+        self.entries: 'OrderedDict[str, Any]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        if not self.cache_file.exists():
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("解析缓存读取失败，将重新建立: %s", e)
+            return
+        if data.get('version') != self.version:
+            logger.info("解析器已修改，丢弃 %s 条旧的解析缓存", len(data.get('entries', {})))
+            return
+        self.entries = OrderedDict(data['entries'])
+        logger.info("加载了 %s 条解析缓存", len(self.entries))
+
+    def save(self):
+        """原子写入缓存文件"""
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = Path(f"{self.cache_file}.{os.getpid()}.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'entries': self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_file, self.cache_file)
+
+    def get_or_parse(self, body: bytes, parse: Callable[[], Any]) -> Any:
+        """正文与之前解析过的某个页面完全相同时直接返回当时的结果，否则调用 parse()"""
+        key = hashlib.sha256(self.version.encode('ascii') + body).hexdigest()
+        result = self.entries.get(key, _MISSING)
+        if result is not _MISSING:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        result = parse()
+        self.entries[key] = result
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {'命中': self.hits, '未命中': self.misses, '条目': len(self.entries)}
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    合并同一个键的并发调用：第一个调用方执行，其余等待并得到同一个结果
+    remember: 成功的结果保留到 reset()，之后的调用直接返回 (出错的调用不保留，下次重新执行)
+    """
+
+    def __init__(self, remember: bool = False):
+        self.remember = remember
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._results: Dict[str, Any] = {}
+        self.shared = 0
+
+    def reset(self):
+        """丢弃保留的结果 (如守护进程开始新一轮刷新)"""
+        with self._lock:
+            self._results.clear()
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._results:
+                self.shared += 1
+                return self._results[key]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if self.remember and call.error is None:
+                    self._results[key] = call.result
+            call.done.set()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地只读数据服务
+把更新器输出的快照 (output/updated_players.csv) 加载到内存索引 (姓名/队伍/国籍/角色)，
+通过 HTTP/JSON 提供查询；快照文件更新后在后台重建索引并整体替换，请求不会读到一半的数据。
+支持 ETag / If-None-Match (304)。
+
+GET /players?team=&nationality=&role=&limit=&offset=
+GET /players/<姓名>
+GET /teams
+GET /health
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+from config import API_CONFIG
+from csv_loader import load_records
+from players_updater import PlayerInfo
+from sharding import normalize_title
+from team_registry import TeamRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class PlayerIndex:
+    """
+    一个快照的只读索引，建好后不再修改
+    队伍ID来自索引自己的队伍维度表 (从已保存的维度表加载后加入快照中的队伍)，
+    不与其他线程共用，后台重建索引时不影响正在处理的请求
+    """
+
+    def __init__(self, players: List[PlayerInfo], etag: str, team_registry: Optional[TeamRegistry] = None):
+        self.players = players
+        self.etag = etag
+        self.team_registry = team_registry or TeamRegistry()
+        self.loaded_at = time.time()
+        self.by_name: Dict[str, int] = {}
+        self.by_team: Dict[int, List[int]] = {}
+        self.by_nationality: Dict[str, List[int]] = {}
+        self.by_role: Dict[str, List[int]] = {}
+        # 快照中的队伍名原样保留，只分配ID用于按队伍查询
+        self.team_registry.assign(players)
+        for position, player in enumerate(players):
+            self.by_name.setdefault(normalize_title(player.name), position)
+            self.by_team.setdefault(player.team_id, []).append(position)
+            self.by_nationality.setdefault(player.nationality.casefold(), []).append(position)
+            self.by_role.setdefault(player.role.casefold(), []).append(position)
+
+    @classmethod
+    def from_snapshot(cls, snapshot_file: str) -> 'PlayerIndex':
+        with open(snapshot_file, 'rb') as f:
+            etag = '"' + hashlib.sha1(f.read()).hexdigest()[:16] + '"'
+        return cls(load_records(snapshot_file, PlayerInfo), etag)
+
+    def get(self, name: str) -> Optional[PlayerInfo]:
+        position = self.by_name.get(normalize_title(name))
+        return None if position is None else self.players[position]
+
+    def filter(self, team: Optional[str] = None, nationality: Optional[str] = None,
+               role: Optional[str] = None) -> List[PlayerInfo]:
+        """按条件筛选，取各条件对应位置列表的交集，保持快照中的顺序"""
+        candidates = []
+        if team is not None:
+            candidates.append(self.by_team.get(self.team_registry.find(team), []))
+        if nationality is not None:
+            candidates.append(self.by_nationality.get(nationality.casefold(), []))
+        if role is not None:
+            candidates.append(self.by_role.get(role.casefold(), []))
+        if not candidates:
+            return self.players
+
+        candidates.sort(key=len)
+        positions = candidates[0]
+        for other in candidates[1:]:
+            other = set(other)
+            positions = [position for position in positions if position in other]
+        return [self.players[position] for position in positions]
+
+    def team_counts(self) -> Dict[str, int]:
+        counts = Counter()
+        for team_id, positions in self.by_team.items():
+            counts[self.team_registry.name_of(team_id)] += len(positions)
+        return dict(counts.most_common())
+
+
+def player_to_json(player: PlayerInfo) -> Dict:
+    return {
+        'name': player.name,
+        'team': player.team,
+        'team_id': player.team_id,
+        'nationality': player.nationality,
+        'age': player.current_age(),
+        'role': player.role,
+        'birth_date': player.birth_date,
+    }
+
+
+class PlayerStore:
+    """持有当前索引；快照文件变化时重建索引并替换引用"""
+
+    def __init__(self, snapshot_file: str = API_CONFIG['snapshot_file'],
+                 check_interval: float = API_CONFIG['reload_check_interval']):
+        self.snapshot_file = snapshot_file
+        self.check_interval = check_interval
+        self.index: Optional[PlayerIndex] = None
+        self.mtime: Optional[float] = None
+        self._stop = threading.Event()
+
+    def reload(self) -> bool:
+        """快照有变化时重建索引，返回是否发生了替换"""
+        try:
+            mtime = os.path.getmtime(self.snapshot_file)
+        except OSError:
+            if self.index is None:
+                logger.warning("快照文件不存在: %s", self.snapshot_file)
+            return False
+        if mtime == self.mtime:
+            return False
+
+        try:
+            index = PlayerIndex.from_snapshot(self.snapshot_file)
+        except Exception as e:
+            # 读取失败时继续使用旧索引
+            logger.error("快照加载失败，继续使用旧数据: %s", e)
+            return False
+        # 单次赋值替换引用，正在处理的请求仍使用它拿到的旧索引
+        self.index, self.mtime = index, mtime
+        logger.info("已加载快照 %s: %s 个选手, ETag %s", self.snapshot_file, len(index.players), index.etag)
+        return True
+
+    def watch(self):
+        """后台线程：定期检查快照文件"""
+        def run():
+            while not self._stop.wait(self.check_interval):
+                self.reload()
+        thread = threading.Thread(target=run, name='snapshot-watcher', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+
+
+class PlayerAPIHandler(BaseHTTPRequestHandler):
+    store: PlayerStore = None
+
+    def do_GET(self):
+        index = self.store.index
+        if index is None:
+            self._send_json(503, {'error': '快照尚未加载'})
+            return
+
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        path = url.path.rstrip('/')
+
+        if path == '/players':
+            players = index.filter(query.get('team'), query.get('nationality'), query.get('role'))
+            try:
+                offset = int(query.get('offset', 0))
+                limit = int(query.get('limit', len(players)))
+            except ValueError:
+                self._send_json(400, {'error': 'offset/limit 必须是整数'})
+                return
+            if offset < 0 or limit < 0:
+                # 负数会变成从末尾开始的切片
+                self._send_json(400, {'error': 'offset/limit 不能小于0'})
+                return
+            page = players[offset:offset + limit]
+            self._send_json(200, {'count': len(players), 'players': [player_to_json(p) for p in page]},
+                            index.etag)
+        elif path.startswith('/players/'):
+            player = index.get(unquote(path[len('/players/'):]))
+            if player is None:
+                self._send_json(404, {'error': '选手不存在'})
+            else:
+                self._send_json(200, player_to_json(player), index.etag)
+        elif path == '/teams':
+            self._send_json(200, index.team_counts(), index.etag)
+        elif path == '/health':
+            self._send_json(200, {'players': len(index.players), 'etag': index.etag,
+                                  'loaded_at': index.loaded_at})
+        else:
+            self._send_json(404, {'error': '未知路径'})
+
+    def _send_json(self, status: int, data, etag: Optional[str] = None):
+        if etag and etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+            # 快照没有变化，客户端缓存仍然有效
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def create_server(store: PlayerStore, host: str = API_CONFIG['host'],
+                  port: int = API_CONFIG['port']) -> ThreadingHTTPServer:
+    handler = type('BoundPlayerAPIHandler', (PlayerAPIHandler,), {'store': store})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    """主函数"""
+    import argparse
+    from log_setup import setup_logging
+
+    parser = argparse.ArgumentParser(description="CS2选手数据只读服务")
+    parser.add_argument('--host', default=API_CONFIG['host'])
+    parser.add_argument('--port', type=int, default=API_CONFIG['port'])
+    parser.add_argument('--snapshot', default=API_CONFIG['snapshot_file'],
+                        help="players_updater.py 输出的CSV快照")
+    args = parser.parse_args()
+
+    setup_logging('player_api.log')
+
+    store = PlayerStore(args.snapshot)
+    store.reload()
+    store.watch()
+
+    server = create_server(store, args.host, args.port)
+    logger.info("数据服务已启动: http://%s:%s", args.host, server.server_address[1])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.stop()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,24 +8,39 @@ CS2选手信息更新器 (修复版)
 import requests
 import cloudscraper  # 新增：用于绕过Cloudflare
 from bs4 import BeautifulSoup
-from datetime import datetime
 import time
 import csv
-import re
+import os
 import logging
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('players_updater.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+from urllib.parse import urlencode
+
+from request_guard import NegativeCache, CircuitBreaker, AdaptiveTimeout, DeadlineExceeded
+from title_resolver import TitleResolver
+from scheduler import RefreshHistory, RefreshScheduler, load_rankings
+from hltv_stats import default_stats_file
+from download_stats import DownloadStats
+from stats_aggregator import StatsAggregator
+from birth_dates import parse_birth_date, age_text
+from csv_loader import load_records
+from cookie_store import CookieStore
+from fetch_plan import FetchPlan
+from role_database import default_role_database
+from sharding import normalize_title
+from team_registry import default_team_registry
+import infobox
+from infobox import extract_infobox_fields, read_infobox_stream
+from parse_cache import ParseCache, SingleFlight, extractor_version
+from text_cleaning import clean_text
+from team_roster import RosterEntry, group_by_team, match_roster, parse_team_roster
+from transfer_feed import TransferFeed, index_roster, parse_transfer_page
+from warc_archive import WarcWriter
+from log_setup import setup_logging
+from config import CACHE_CONFIG, DATA_SOURCES, FETCH_CONFIG, LOGGING_CONFIG, TEAM_ROSTER_CONFIG, TIMEOUT_CONFIG, WARC_CONFIG
+
+# 日志在 main() 中通过 setup_logging 配置 (队列 + 后台线程写入轮转文件)
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -36,14 +51,25 @@ class PlayerInfo:
     nationality: str = "未知国籍"
     age: str = "未知年龄"
     role: str = "未知位置"
+    # ISO格式出生日期 (只知道年份时为 YYYY)，有出生日期时年龄在导出时计算
+    birth_date: str = ""
+    # 队伍维度表中的ID (0 表示没有队伍，-1 表示尚未分配)，由 TeamRegistry.assign / canonicalize 显式分配
+    team_id: int = field(default=-1, compare=False)
+
+    def current_age(self) -> str:
+        """按今天的日期计算年龄，没有出生日期时使用已保存的年龄"""
+        if self.birth_date:
+            return age_text(self.birth_date)
+        return str(self.age)
 
     def to_dict(self) -> Dict[str, str]:
         return {
             '姓名': self.name,
             '队伍': self.team,
             '国籍': self.nationality,
-            '年龄': str(self.age),
-            '游戏内位置': self.role
+            '年龄': self.current_age(),
+            '游戏内位置': self.role,
+            '出生日期': self.birth_date
         }
 
     def merge_old_data(self, old_info: 'PlayerInfo'):
@@ -61,31 +87,34 @@ class PlayerInfo:
         # 2. 国籍
         if self.nationality == "未知国籍" and old_info.nationality != "未知国籍":
             self.nationality = old_info.nationality
-            logger.info(f"  └─ [{self.name}] 国籍获取失败，保留旧数据: {self.nationality}")
+            logger.info("  └─ [%s] 国籍获取失败，保留旧数据: %s", self.name, self.nationality)
 
-        # 3. 年龄
+        # 3. 出生日期/年龄
+        if not self.birth_date and old_info.birth_date:
+            self.birth_date = old_info.birth_date
+            logger.info("  └─ [%s] 出生日期获取失败，保留旧数据: %s", self.name, self.birth_date)
         if self.age == "未知年龄" and old_info.age != "未知年龄":
             self.age = old_info.age
-            logger.info(f"  └─ [{self.name}] 年龄获取失败，保留旧数据: {self.age}")
+            logger.info("  └─ [%s] 年龄获取失败，保留旧数据: %s", self.name, self.age)
 
         # 4. 角色
         if self.role == "未知位置" and old_info.role != "未知位置":
             self.role = old_info.role
-            logger.info(f"  └─ [{self.name}] 角色获取失败，保留旧数据: {self.role}")
+            logger.info("  └─ [%s] 角色获取失败，保留旧数据: %s", self.name, self.role)
 
 class PlayersUpdater:
     """选手信息更新器"""
 
-    def __init__(self):
+    def __init__(self, lean_fetch: bool = FETCH_CONFIG['lean_fetch'], archive: Optional[WarcWriter] = None,
+                 run_deadline: Optional[float] = TIMEOUT_CONFIG['run_deadline']):
+        # 按主机延迟自适应的连接/读取超时，以及整次运行的截止时间
+        self.timeouts = AdaptiveTimeout(run_deadline)
+
         # 修改点1：使用 cloudscraper 替换 requests.Session
-        # 它可以自动处理 Cloudflare 的 JS 验证
-        self.scraper = cloudscraper.create_scraper(
-            browser={
-                'browser': 'chrome',
-                'platform': 'windows',
-                'desktop': True
-            }
-        )
+        # 它可以自动处理 Cloudflare 的 JS 验证，验证得到的Cookie跨运行复用
+        self.cookie_store = CookieStore()
+        self.scraper = self._create_scraper()
+        self.cookie_store.load_into(self.scraper.cookies)
 
         # 修改点2：Liquipedia 要求 User-Agent 包含联系方式，否则容易被封
         # 请将 your_email@example.com 替换为你真实的邮箱，或者保持原样试试
@@ -100,10 +129,66 @@ class PlayersUpdater:
 
         # 请求控制
         self.request_count = 0
+        # 剩余请求预算 (--budget)，None表示不限；所有经 _make_request 发出的请求都从中扣除
+        self.request_budget: Optional[int] = None
         self.last_request_time = 0
         # 修改点3：增加延迟，避免触发 429 Too Many Requests
         self.min_delay = 2.0
 
+        # 已知缺失页面缓存 + 按主机熔断
+        self.negative_cache = NegativeCache()
+        self.circuit_breaker = CircuitBreaker()
+
+        # 规范标题/重定向解析缓存
+        self.title_resolver = TitleResolver(self._make_request)
+
+        # 刷新历史 (用于优先级调度)
+        self.refresh_history = RefreshHistory()
+
+        # 精简抓取：只请求信息框所在的首段，并统计下载字节数
+        self.lean_fetch = lean_fetch
+        self.download_stats = DownloadStats()
+
+        # 本地角色库 (与其他爬虫共用)
+        self.role_database = default_role_database()
+
+        # 队伍维度表 (与其他爬虫共用)
+        self.team_registry = default_team_registry()
+        # 队伍页面的标题解析单独缓存，不与选手标题混在一起
+        self.team_resolver = TitleResolver(
+            self._make_request, os.path.join(CACHE_CONFIG['cache_dir'], CACHE_CONFIG['team_title_cache_file']))
+
+        # 本次更新的统计汇总 (update_players_info 中逐条累计)
+        self.stats: Optional[StatsAggregator] = None
+
+        # 抓取存档 (--warc)：成功的响应写入WARC，修复解析器后用 reparse.py 离线重新解析
+        self.archive = archive
+
+        # 解析缓存：页面正文没变时直接取上次提取的信息框字段 (修改 infobox.py 后自动失效)
+        self.parse_cache = ParseCache(extractor_version(infobox))
+        # 多个名字重定向到同一页面时，本次运行只抓取一次
+        self.page_flight = SingleFlight(remember=True)
+
+        # 转会动态的高水位 (--transfers)
+        self.transfer_feed = TransferFeed()
+
+    def _create_scraper(self):
+        scraper = cloudscraper.create_scraper(
+            browser={
+                'browser': 'chrome',
+                'platform': 'windows',
+                'desktop': True
+            }
+        )
+        # 记录建连耗时，用于计算连接超时
+        return self.timeouts.instrument(scraper)
+
+    def _rechallenge(self):
+        """保存的验证Cookie失效 (403)：清除Cookie并用新的 scraper 重新做验证"""
+        logger.warning("验证Cookie已失效，重新进行Cloudflare验证")
+        self.cookie_store.clear(self.scraper.cookies)
+        self.scraper = self._create_scraper()
+
     def _rate_limit(self):
         """请求频率控制"""
         current_time = time.time()
@@ -116,29 +201,72 @@ class PlayersUpdater:
         self.last_request_time = time.time()
         self.request_count += 1
 
-    def _make_request(self, url: str) -> Optional[requests.Response]:
+    def _charge_request(self) -> bool:
+        """从请求预算中扣除一次请求，预算已用完时返回False"""
+        if self.request_budget is None:
+            return True
+        if self.request_budget <= 0:
+            return False
+        self.request_budget -= 1
+        return True
+
+    @property
+    def budget_exhausted(self) -> bool:
+        return self.request_budget is not None and self.request_budget <= 0
+
+    def _make_request(self, url: str, stream: bool = False) -> Optional[requests.Response]:
         """安全的请求方法 (使用 cloudscraper)"""
+        # 超过运行截止时间后不再请求，剩余选手使用旧数据
+        if self.timeouts.expired():
+            return None
+        # 熔断打开时直接返回，不等待超时
+        if not self.circuit_breaker.allow_request(url):
+            logger.warning("主机熔断中，跳过请求: %s", url)
+            return None
+        if not self._charge_request():
+            logger.debug("请求预算已用完，跳过请求: %s", url)
+            return None
+
         try:
             self._rate_limit()
-            # 使用 scraper 发送请求
-            response = self.scraper.get(url, headers=self.headers, timeout=15)
+            # 使用 scraper 发送请求 (超时按该主机的观测延迟计算)
+            response = self.timeouts.request(self.scraper.get, url, headers=self.headers, stream=stream)
+            if response.status_code == 403 and len(self.scraper.cookies):
+                # 带着Cookie仍然403，多半是复用的验证Cookie过期，重新验证后重试一次 (同样计入预算)
+                response.close()
+                if not self._charge_request():
+                    logger.warning("请求预算已用完，不再重试: %s", url)
+                    return None
+                self._rechallenge()
+                self._rate_limit()
+                response = self.timeouts.request(self.scraper.get, url, headers=self.headers, stream=stream)
+            if response.status_code == 404:
+                # 主机正常响应，只是页面不存在：记入负缓存，不计入熔断
+                # 关闭响应，stream=True 时连接才会还给连接池
+                response.close()
+                self.circuit_breaker.record_success(url)
+                self.negative_cache.add(url)
+                logger.warning("页面不存在 %s", url)
+                return None
+            if not response.ok:
+                # 其他错误响应同样先释放连接
+                response.close()
             response.raise_for_status()
+            self.circuit_breaker.record_success(url)
+            self.negative_cache.discard(url)
+            if self.archive is not None and not stream:
+                self.archive.capture(response)
             return response
+        except DeadlineExceeded:
+            return None
         except Exception as e:
             # 捕获所有请求异常
-            logger.error(f"请求失败 {url}: {e}")
+            self.circuit_breaker.record_failure(url)
+            logger.error("请求失败 %s: %s", url, e)
             return None
 
-    def _clean_text(self, text: str) -> str:
-        """清理文本数据"""
-        if not text:
-            return ""
-        text = re.sub(r'\s+', ' ', text.strip())
-        text = re.sub(r'\[\[|\]\]', '', text)
-        text = re.sub(r'<[^>]+>', '', text)
-        return text
-
-    def _standardize_role(self, role: str) -> str:
+    @staticmethod
+    def _standardize_role(role: str) -> str:
         """标准化角色信息 (保持原有逻辑)"""
         if not role:
             return "未知位置"
@@ -163,578 +291,603 @@ class PlayersUpdater:
 
         return role.capitalize()
 
-    def _extract_age_from_birth_date(self, birth_date: str) -> str:
-        """从出生日期提取年龄"""
-        try:
-            year_patterns = [r'(\d{4})', r'born\s+(\d{4})', r'(\d{4})\s*年']
-            for pattern in year_patterns:
-                match = re.search(pattern, birth_date, re.IGNORECASE)
-                if match:
-                    birth_year = int(match.group(1))
-                    current_year = datetime.now().year
-                    age = current_year - birth_year
-                    if 15 <= age <= 50:
-                        return str(age)
-            return "未知年龄"
-        except (ValueError, TypeError):
-            return "未知年龄"
-
     def load_existing_players(self, csv_file: str = "players.csv") -> Dict[str, PlayerInfo]:
         """
         修改点：读取CSV并返回 {姓名: PlayerInfo对象} 的字典
         这样我们在更新时可以查阅旧数据
         """
-        existing_data = {}
-
         try:
-            # 使用 utf-8-sig 以兼容 Excel 保存的 CSV (带BOM)
-            with open(csv_file, 'r', encoding='utf-8-sig') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    name = row.get('姓名', '').strip()
-                    if name:
-                        existing_data[name] = PlayerInfo(
-                            name=name,
-                            team=row.get('队伍', 'Free Agent'),
-                            nationality=row.get('国籍', '未知国籍'),
-                            age=row.get('年龄', '未知年龄'),
-                            role=row.get('游戏内位置', '未知位置')
-                        )
-
-            logger.info(f"从 {csv_file} 加载了 {len(existing_data)} 条旧数据存档")
+            # 自动识别编码 (UTF-8/带BOM/GBK) 与表头写法，批量构造 PlayerInfo
+            existing_data = {player.name: player for player in load_records(csv_file, PlayerInfo)}
+
+            logger.info("从 %s 加载了 %s 条旧数据存档", csv_file, len(existing_data))
             return existing_data
         except FileNotFoundError:
-            logger.error(f"文件未找到: {csv_file}")
+            logger.error("文件未找到: %s", csv_file)
             return {}
         except Exception as e:
-            logger.error(f"读取CSV文件失败: {e}")
+            logger.error("读取CSV文件失败: %s", e)
             return {}
 
-    def get_player_info_from_liquipedia(self, name: str) -> Optional[PlayerInfo]:
-        """从Liquipedia获取选手最新信息"""
-        # 处理特殊名字，Liquipedia URL对空格敏感
-        url_name = name.replace(" ", "_")
-        url = f"https://liquipedia.net/counterstrike/{url_name}"
+    def _lead_section_url(self, title: str) -> str:
+        """页面标题对应的 action=parse&section=0 请求地址 (标题原样传入，由 urlencode 编码)"""
+        params = {
+            'action': 'parse',
+            'format': 'json',
+            'formatversion': '2',
+            'page': title,
+            'section': '0',
+            'prop': 'text',
+            'redirects': '1',
+            'disablelimitreport': '1',
+            'disableeditsection': '1',
+        }
+        return f"{self.title_resolver.base_url}/api.php?{urlencode(params)}"
+
+    def _fetch_lead_section(self, name: str, url: str) -> Tuple[Optional[Dict[str, str]], bool]:
+        """
+        通过 action=parse&section=0 只获取首段(信息框)渲染后的HTML并提取字段
+        返回 (字段, 是否值得退回完整页面)：请求本身失败或页面不存在时不再重试
+        """
+        response = self._make_request(self._lead_section_url(self.title_resolver.title_of(name)))
+        if not response:
+            return None, False
+        self.download_stats.record('lean', len(response.content))
+
+        try:
+            data = response.json()
+        except ValueError as e:
+            logger.warning("首段API响应不是有效JSON %s: %s", name, e)
+            return None, True
+
+        if 'error' in data:
+            if data['error'].get('code') == 'missingtitle':
+                self.negative_cache.add(url)
+                logger.warning("页面不存在 %s", url)
+                return None, False
+            logger.warning("首段API返回错误 %s: %s", name, data['error'].get('info'))
+            return None, True
+
+        html = data.get('parse', {}).get('text', '')
+        if isinstance(html, dict):
+            # formatversion=1 的返回格式
+            html = html.get('*', '')
+        fields = self.parse_cache.get_or_parse(
+            html.encode('utf-8'), lambda: extract_infobox_fields(BeautifulSoup(html, 'html.parser')))
+        return fields, False
+
+    def _stream_full_page(self, name: str, url: str) -> Optional[Dict[str, str]]:
+        """流式下载完整页面，信息框字段齐全后立即断开连接"""
+        response = self._make_request(url, stream=True)
+        if not response:
+            return None
+
+        parser, bytes_read = read_infobox_stream(response, FETCH_CONFIG['stream_chunk_size'])
+        if parser.error is not None:
+            # 读取中途断开：按请求失败处理，调用方保留旧数据
+            self.circuit_breaker.record_failure(url)
+            logger.error("页面读取中断 %s: %s", url, parser.error)
+            return None
+        self.download_stats.record('stream', bytes_read)
+
+        # 简单校验页面有效性
+        if "Liquipedia" not in parser.title:
+            logger.warning("页面解析异常: %s", name)
+            return None
+        return parser.fields
+
+    def _fetch_infobox_fields(self, name: str, url: str) -> Optional[Dict[str, str]]:
+        """获取信息框字段：优先精简抓取首段，失败时退回流式读取完整页面"""
+        if self.lean_fetch:
+            fields, retry_full = self._fetch_lead_section(name, url)
+            if not retry_full:
+                return fields
+            logger.info("首段抓取失败，改为抓取完整页面: %s", name)
+
+        # 存档模式下读取完整页面，WARC中不保存截断的正文
+        if FETCH_CONFIG['stream_full_page'] and self.archive is None:
+            return self._stream_full_page(name, url)
 
         response = self._make_request(url)
         if not response:
             return None
+        self.download_stats.record('full', len(response.content))
 
-        soup = BeautifulSoup(response.text, 'html.parser')
+        fields = self.parse_cache.get_or_parse(response.content, lambda: self._parse_full_page(response.text))
+        if fields is None:
+            logger.warning("页面解析异常: %s", name)
+        return fields
 
+    @staticmethod
+    def _parse_full_page(html: str) -> Optional[Dict[str, str]]:
+        soup = BeautifulSoup(html, 'html.parser')
         # 简单校验页面有效性
-        if "Liquipedia" not in soup.title.string:
-            logger.warning(f"页面解析异常: {name}")
+        if not soup.title or "Liquipedia" not in (soup.title.string or ''):
             return None
+        return extract_infobox_fields(soup)
 
-        try:
-            # 提取姓名 (保持原名)
-
-            # 提取队伍
-            team_elem = soup.find('div', class_='infobox-cell-2', string='Team:')
-            team = "Free Agent"
-            if team_elem:
-                team_div = team_elem.find_next('div')
-                if team_div:
-                    team = self._clean_text(team_div.text)
-
-            # 提取国籍
-            nationality_elem = soup.find('div', class_='infobox-cell-2', string='Nationality:')
-            nationality = "未知国籍"
-            if nationality_elem:
-                nationality_div = nationality_elem.find_next('div')
-                if nationality_div:
-                    nationality = self._clean_text(nationality_div.text)
-
-            # 提取年龄
-            birth_elem = soup.find('div', class_='infobox-cell-2', string='Born:')
-            age = "未知年龄"
-            if birth_elem:
-                birth_div = birth_elem.find_next('div')
-                if birth_div:
-                    birth_date = self._clean_text(birth_div.text)
-                    age = self._extract_age_from_birth_date(birth_date)
-
-            # 提取角色
-            role_elem = soup.find('div', class_='infobox-cell-2', string='Role:')
-            role = "未知位置"
-            if role_elem:
-                role_div = role_elem.find_next('div')
-                if role_div:
-                    raw_role = self._clean_text(role_div.text)
-                    role = self._standardize_role(raw_role)
-
-            # 如果Liquipedia没找到角色，尝试本地逻辑（为了代码简洁，去掉了HLTV请求，因为HLTV反爬更严）
-            if role == "未知位置":
-                local_role = self._get_role_from_local_database(name)
-                if local_role:
-                    role = local_role
-
-            return PlayerInfo(name=name, team=team, nationality=nationality, age=age, role=role)
+    def get_player_info_from_liquipedia(self, name: str) -> Optional[PlayerInfo]:
+        """从Liquipedia获取选手最新信息"""
+        # 使用解析后的规范标题，避免大小写/改名导致的重定向
+        entry = self.title_resolver.lookup(name)
+        if entry and entry['missing']:
+            logger.warning("Liquipedia 不存在该页面，跳过: %s", name)
+            return None
+        if entry and entry['disambiguation']:
+            logger.warning("%s 指向消歧义页面 %s，跳过", name, entry['title'])
+            return None
+        url = self.title_resolver.page_url(name)
+
+        if self.negative_cache.contains(url):
+            logger.info("已知缺失页面，跳过请求: %s", name)
+            return None
 
+        fields = self.page_flight.do(url, lambda: self._fetch_infobox_fields(name, url))
+        if fields is None:
+            return None
+
+        try:
+            return self.player_from_fields(name, fields, self._get_role_from_local_database)
         except Exception as e:
-            logger.error(f"解析选手信息失败 {name}: {e}")
+            logger.error("解析选手信息失败 %s: %s", name, e)
             return None
-    
+
+    @classmethod
+    def player_from_fields(cls, name: str, fields: Dict[str, str],
+                           role_lookup: Callable[[str], Optional[str]]) -> PlayerInfo:
+        """
+        信息框字段 -> PlayerInfo (不访问网络，reparse.py 离线重新解析时也使用)
+        role_lookup: 页面上没有角色时查询本地角色库
+        """
+        # 提取队伍
+        team = "Free Agent"
+        if 'Team:' in fields:
+            team = clean_text(fields['Team:'])
+
+        # 提取国籍
+        nationality = "未知国籍"
+        if 'Nationality:' in fields:
+            nationality = clean_text(fields['Nationality:'])
+
+        # 提取年龄
+        age = "未知年龄"
+        birth_date = ""
+        if 'Born:' in fields:
+            birth_date = parse_birth_date(clean_text(fields['Born:']))
+            age = age_text(birth_date)
+
+        # 提取角色
+        role = "未知位置"
+        if 'Role:' in fields:
+            raw_role = clean_text(fields['Role:'])
+            role = cls._standardize_role(raw_role)
+
+        # 如果Liquipedia没找到角色，尝试本地逻辑（为了代码简洁，去掉了HLTV请求，因为HLTV反爬更严）
+        if role == "未知位置":
+            local_role = role_lookup(name)
+            if local_role:
+                role = local_role
+
+        return PlayerInfo(name=name, team=team, nationality=nationality, age=age, role=role,
+                          birth_date=birth_date)
+
     def _get_role_from_local_database(self, name: str) -> Optional[str]:
-        """从本地角色数据库获取选手角色信息"""
-        # 知名选手的角色数据库
-        player_roles = {
-            # 顶级AWPer
-            "s1mple": "AWPer",
-            "ZywOo": "AWPer", 
-            "sh1ro": "AWPer",
-            "broky": "AWPer",
-            "torzsi": "AWPer",
-            "m0NESY": "AWPer",
-            "Jame": "AWPer",
-            "SunPayus": "AWPer",
-            "w0nderful": "AWPer",
-            "nicoodoz": "AWPer",
-            "acoR": "AWPer",
-            "syrsoN": "AWPer",
-            "kennyS": "AWPer",
-            "GuardiaN": "AWPer",
-            "JW": "AWPer",
-            "Skadoodle": "AWPer",
-            "FalleN": "AWPer",
-            "HEN1": "AWPer",
-            "saffee": "AWPer",
-            "Gratisfaction": "AWPer",
-            "oskar": "AWPer",
-            "allu": "AWPer",
-            "ottoNd": "AWPer",
-            "phzy": "AWPer",
-            "story": "AWPer",
-            "Jee": "AWPer",
-            "sl3nd": "AWPer",
-            "910": "AWPer",
-            "WorldEdit": "AWPer",
-            
-            # 顶级Rifler
-            "NiKo": "Rifler",
-            "dev1ce": "AWPer",  # 虽然主要是AWPer，但也会用步枪
-            "electronic": "Rifler",
-            "b1t": "Rifler",
-            "ropz": "Rifler",
-            "rain": "Rifler",
-            "karrigan": "Rifler",  # IGL
-            "tabseN": "Rifler",
-            "stavn": "Rifler",
-            "cadiaN": "Rifler",  # IGL
-            "TeSeS": "Rifler",
-            "sjuush": "Rifler",
-            "refrezh": "Rifler",
-            "blameF": "Rifler",
-            "k0nfig": "Rifler",
-            "valde": "Rifler",
-            "jabbi": "Rifler",
-            "Spinx": "Rifler",
-            "flamie": "Rifler",
-            "sdy": "Rifler",
-            "degster": "AWPer",
-            "patsi": "Rifler",
-            "r1nkle": "AWPer",
-            "headtr1ck": "AWPer",
-            "Mir": "Rifler",
-            "FL1T": "Rifler",
-            "Qikert": "Rifler",
-            "Buster": "Rifler",
-            "Edward": "Rifler",
-            "TaZ": "Coach",
-            "pasha": "Rifler",
-            "byali": "Rifler",
-            "fer": "Rifler",
-            "TACO": "Rifler",
-            "fnx": "Rifler",
-            "LUCAS1": "Rifler",
-            "kscerato": "Rifler",
-            "yuurih": "Rifler",
-            "arT": "Rifler",
-            "VINI": "Rifler",
-            "drop": "Rifler",
-            "chelo": "Rifler",
-            "biguzera": "Rifler",
-            "felps": "Rifler",
-            "Boltz": "Rifler",
-            "MalbsMd": "Rifler",
-            "chrisJ": "AWPer",
-            "STYKO": "Rifler",
-            "ISSAA": "Rifler",
-            "woxic": "AWPer",
-            "XANTARES": "Rifler",
-            "Calyx": "Rifler",
-            "MAJ3R": "Rifler",
-            "hampus": "Rifler",
-            "nawwk": "AWPer",
-            "Golden": "Coach",
-            "REZ": "Rifler",
-            "Brollan": "Rifler",
-            "es3tag": "Rifler",
-            "allu": "AWPer",
-            "sergej": "Rifler",
-            "Aleksib": "Rifler",  # IGL
-            "suNny": "Rifler",
-            "jks": "Rifler",
-            "AZR": "Rifler",
-            "Liazz": "Rifler",
-            "INS": "Rifler",
-            "BnTeT": "Rifler",
-            "LETN1": "Coach",
-            "RUSH": "Rifler",
-            "Ex6TenZ": "Coach",
-            "SmithZz": "Coach",
-            "RpK": "Rifler",
-            "bodyy": "Rifler",
-            "NBK": "Rifler",
-            "apEX": "Rifler",
-            "Happy": "Rifler",
-            "KioShiMa": "Rifler",
-            "Zonic": "Coach",
-            "dennis": "Rifler",
-            "twist": "Rifler",
-            "Lekr0": "Rifler",
-            "aizy": "Rifler",
-            "MSL": "Rifler",
-            "cajunb": "Rifler",
-            "TenZ": "Rifler",
-            "s0m": "Rifler",
-            "smooya": "AWPer",
-            "Grim": "Rifler",
-            "floppy": "Rifler",
-            "oSee": "AWPer",
-            "junior": "AWPer",
-            "ztr": "Rifler",
-            "frozen": "Rifler",
-            "huNter": "Rifler",
-            "NertZ": "Rifler",
-            "jL": "Rifler",
-            "Summer": "Rifler",
-            "Starry": "Rifler",
-            "EliGE": "Rifler",
-            "magixx": "Rifler",
-            "chopper": "Rifler",
-            "zont1x": "Rifler",
-            "siuhy": "Rifler",
-            "bLitz": "Rifler",
-            "Techno": "Rifler",
-            "Senzu": "Rifler",
-            "mzinho": "Rifler",
-            "Wicadia": "Rifler",
-            "HeavyGod": "Rifler",
-            "flameZ": "Rifler",
-            "mezii": "Rifler",
-            "jottAAA": "Rifler",
-            "iM": "Rifler",
-            "kyxsan": "Rifler",
-            "Maka": "Rifler",
-            "Staehr": "Rifler",
-            "FL4MUS": "Rifler",
-            "fame": "Rifler",
-            "ICY": "AWPer",
-            "ultimate": "AWPer",
-            "snow": "Rifler",
-            "nqz": "AWPer",
-            "Tauson": "Rifler",
-            "PR": "Rifler",
-            "skullz": "Rifler",
-            "exit": "Rifler",
-            "Lucaozy": "Rifler",
-            "brnz4n": "Rifler",
-            "insani": "Rifler",
-            "JBa": "Rifler",
-            "LNZ": "Rifler",
-            "JDC": "Rifler",
-            "fear": "Rifler",
-            "somebody": "Rifler",
-            "CYPHER": "Rifler",
-            "jkaem": "Rifler",
-            "kaze": "AWPer",
-            "ChildKing": "Rifler",
-            "L1haNg": "Rifler",
-            "Attacker": "Rifler",
-            "JamYoung": "Rifler",
-            "Mercury": "Rifler",
-            "Moseyuh": "Rifler",
-            "Westmelon": "Rifler",
-            "z4kr": "Rifler",
-            "EmiliaQAQ": "Rifler",
-            "C4LLM3SU3": "Rifler",
-            "xertioN": "Rifler",
-            
-            # 经典选手
-            "coldzera": "Rifler",
-            "f0rest": "Rifler",
-            "GeT_RiGhT": "Rifler",
-            "olofmeister": "Rifler",
-            "Snax": "Rifler",
-            "shox": "Rifler",
-            "KRIMZ": "Rifler",
-            "flusha": "Rifler",
-            "Xyp9x": "Coach",
-            "dupreeh": "Rifler",
-            "gla1ve": "Rifler",
-            "magisk": "Rifler",
-            "Boombl4": "Rifler",
-            "Perfecto": "Rifler",
-            "donk": "Rifler",
-            "Ax1Le": "Rifler",
-            "nafany": "Rifler",
-            "Stewie2K": "Rifler",
-            "twistzz": "Rifler",
-            "NAF": "Rifler",
-            "nitr0": "Rifler",
-            "tarik": "Rifler",
-            "autimatic": "Rifler",
-            "Hiko": "Rifler",
-            "daps": "Coach",
-            "stanislaw": "Rifler",
-            "Brehze": "Rifler",
-            "Ethan": "Rifler",
-            "dycha": "Rifler",
-            "hades": "AWPer",
-            "mantuu": "AWPer",
-            "gade": "Rifler",
-            "valde": "Rifler",
-            "acoR": "AWPer",
-            "jabbi": "Rifler",
-            "nicoodoz": "AWPer",
-            "flamie": "Rifler",
-            "sdy": "Rifler",
-            "degster": "AWPer",
-            "patsi": "Rifler",
-            "r1nkle": "AWPer",
-            "headtr1ck": "AWPer",
-            "Mir": "Rifler",
-            "Jame": "AWPer",
-            "FL1T": "Rifler",
-            "Qikert": "Rifler",
-            "Buster": "Rifler",
-            "WorldEdit": "AWPer",
-            "Edward": "Rifler",
-            "pasha": "Rifler",
-            "byali": "Rifler",
-            "FalleN": "AWPer",
-            "fer": "Rifler",
-            "TACO": "Rifler",
-            "fnx": "Rifler",
-            "LUCAS1": "Rifler",
-            "HEN1": "AWPer",
-            "kscerato": "Rifler",
-            "yuurih": "Rifler",
-            "arT": "Rifler",
-            "VINI": "Rifler",
-            "saffee": "AWPer",
-            "drop": "Rifler",
-            "chelo": "Rifler",
-            "biguzera": "Rifler",
-            "felps": "Rifler",
-            "zews": "Coach",
-            "Boltz": "Rifler",
-            "MalbsMd": "Rifler",
-            "chrisJ": "AWPer",
-            "oskar": "AWPer",
-            "STYKO": "Rifler",
-            "ISSAA": "Rifler",
-            "woxic": "AWPer",
-            "XANTARES": "Rifler",
-            "Calyx": "Rifler",
-            "MAJ3R": "Rifler",
-            "hampus": "Rifler",
-            "nawwk": "AWPer",
-            "Golden": "Coach",
-            "REZ": "Rifler",
-            "Brollan": "Rifler",
-            "es3tag": "Rifler",
-            "ottoNd": "AWPer",
-            "allu": "AWPer",
-            "sergej": "Rifler",
-            "suNny": "Rifler",
-            "jks": "Rifler",
-            "AZR": "Rifler",
-            "Gratisfaction": "AWPer",
-            "Liazz": "Rifler",
-            "INS": "Rifler",
-            "BnTeT": "Rifler",
-            "LETN1": "Coach",
-            "RUSH": "Rifler",
-            "Ex6TenZ": "Coach",
-            "SmithZz": "Coach",
-            "RpK": "Rifler",
-            "bodyy": "Rifler",
-            "NBK": "Rifler",
-            "apEX": "Rifler",
-            "Happy": "Rifler",
-            "KioShiMa": "Rifler",
-            "Zonic": "Coach",
-            "dennis": "Rifler",
-            "twist": "Rifler",
-            "Lekr0": "Rifler",
-            "aizy": "Rifler",
-            "MSL": "Rifler",
-            "cajunb": "Rifler",
-            "TenZ": "Rifler",
-            "s0m": "Rifler",
-            "smooya": "AWPer",
-            "Grim": "Rifler",
-            "floppy": "Rifler",
-            "oSee": "AWPer",
-            "junior": "AWPer",
-            "ztr": "Rifler",
-            "frozen": "Rifler",
-            "huNter": "Rifler",
-            "NertZ": "Rifler",
-            "SunPayus": "AWPer",
-            "jL": "Rifler",
-            "Summer": "Rifler",
-            "Starry": "Rifler",
-            "EliGE": "Rifler",
-            "magixx": "Rifler",
-            "chopper": "Rifler",
-            "zont1x": "Rifler",
-            "siuhy": "Rifler",
-            "bLitz": "Rifler",
-            "Techno": "Rifler",
-            "Senzu": "Rifler",
-            "mzinho": "Rifler",
-            "Wicadia": "Rifler",
-            "HeavyGod": "Rifler",
-            "flameZ": "Rifler",
-            "mezii": "Rifler",
-            "jottAAA": "Rifler",
-            "iM": "Rifler",
-            "w0nderful": "AWPer",
-            "kyxsan": "Rifler",
-            "Maka": "Rifler",
-            "Staehr": "Rifler",
-            "FL4MUS": "Rifler",
-            "fame": "Rifler",
-            "ICY": "AWPer",
-            "ultimate": "AWPer",
-            "snow": "Rifler",
-            "nqz": "AWPer",
-            "Tauson": "Rifler",
-            "sl3nd": "AWPer",
-            "PR": "Rifler",
-            "story": "AWPer",
-            "skullz": "Rifler",
-            "exit": "Rifler",
-            "Lucaozy": "Rifler",
-            "brnz4n": "Rifler",
-            "insani": "Rifler",
-            "phzy": "AWPer",
-            "JBa": "Rifler",
-            "nicoodoz": "AWPer",
-            "LNZ": "Rifler",
-            "JDC": "Rifler",
-            "fear": "Rifler",
-            "somebody": "Rifler",
-            "CYPHER": "Rifler",
-            "jkaem": "Rifler",
-            "kaze": "AWPer",
-            "ChildKing": "Rifler",
-            "L1haNg": "Rifler",
-            "Attacker": "Rifler",
-            "JamYoung": "Rifler",
-            "Jee": "AWPer",
-            "Mercury": "Rifler",
-            "Moseyuh": "Rifler",
-            "Westmelon": "Rifler",
-            "z4kr": "Rifler",
-            "EmiliaQAQ": "Rifler",
-            "C4LLM3SU3": "Rifler",
-            "xertioN": "Rifler",
-        }
-        
-        # 查找选手角色
-        if name in player_roles:
-            role = player_roles[name]
-            logger.info(f"从本地数据库获取角色: {name} - {role}")
-            return role
-        
-        return None
+        """从本地角色库 (player_roles.json) 获取选手角色信息"""
+        role = self.role_database.lookup(name)
+        if role:
+            logger.info("从本地数据库获取角色: %s - %s", name, role)
+        return role
+
+    def _estimate_request_cost(self, name: str) -> int:
+        """估算刷新一个选手需要的请求数 (已知缺失/消歧义的页面不发请求)"""
+        entry = self.title_resolver.lookup(name)
+        if entry and (entry['missing'] or entry['disambiguation']):
+            return 0
+        if self.negative_cache.contains(self.title_resolver.page_url(name), record_hit=False):
+            return 0
+        return 1
+
+    def plan_refresh(self, existing_data: Dict[str, PlayerInfo], max_players: int = None,
+                     budget: int = None) -> List[str]:
+        """按优先级(过期程度/变化频率/活跃队伍/HLTV排名)挑选本次要刷新的选手"""
+        scheduler = RefreshScheduler(self.refresh_history, load_rankings(default_stats_file()))
+        teams = {name: info.team for name, info in existing_data.items()}
+
+        if budget is not None:
+            # 预留标题解析的API请求 (每50个名字一次)
+            pending = len(self.title_resolver.pending(teams))
+            budget = max(0, budget - (min(pending, budget) + 49) // 50)
+
+        return scheduler.plan(teams, budget=budget, max_players=max_players,
+                              cost_func=self._estimate_request_cost)
+
+    def build_fetch_plan(self, existing_data: Dict[str, PlayerInfo], max_players: int = None,
+                         budget: int = None) -> FetchPlan:
+        """试运行：按当前缓存列出本次刷新会发送的请求，不访问网络"""
+        plan = FetchPlan(lambda i: self.min_delay)
+        player_names = self.plan_refresh(existing_data, max_players, budget)
+
+        for batch in self.title_resolver.batches(player_names):
+            plan.add(self.title_resolver.query_url(batch), f"标题解析 ({len(batch)} 个)")
+
+        for name in player_names:
+            url = self.title_resolver.page_url(name)
+            entry = self.title_resolver.lookup(name)
+            if entry and entry['missing']:
+                plan.add(url, name, 'skipped', "Liquipedia 不存在该页面")
+            elif entry and entry['disambiguation']:
+                plan.add(url, name, 'skipped', "消歧义页面")
+            elif self.negative_cache.contains(url, record_hit=False):
+                plan.add(url, name, 'cached', "已知缺失页面")
+            elif self.lean_fetch:
+                plan.add(self._lead_section_url(self.title_resolver.title_of(name)), name)
+                plan.add(url, name, 'conditional', "首段抓取失败时抓取完整页面")
+            else:
+                plan.add(url, name)
 
-    def update_players_info(self, existing_data: Dict[str, PlayerInfo], output_file: str = "updated_players.csv", max_players: int = None) -> List[PlayerInfo]:
-        """更新选手信息 (带合并逻辑)"""
-        updated_players_list = []
-        player_names = list(existing_data.keys())
+        skipped = len(existing_data) - len(player_names)
+        if skipped:
+            plan.note(f"{skipped} 个选手不在本次刷新范围内，沿用旧数据")
+        return plan
 
-        if max_players:
-            player_names = player_names[:max_players]
+    def refresh_player(self, name: str, old_info: Optional[PlayerInfo]) -> Optional[PlayerInfo]:
+        """
+        刷新一个选手，结果计入 self.stats
+        返回合并后的新数据；抓取失败时返回旧数据，没有旧数据时返回None
+        """
+        # 1. 获取新数据
+        return self._apply_refresh(name, old_info, self.get_player_info_from_liquipedia(name))
+
+    def _apply_refresh(self, name: str, old_info: Optional[PlayerInfo],
+                       new_info: Optional[PlayerInfo]) -> Optional[PlayerInfo]:
+        # 2. 如果获取成功，进行合并
+        if new_info:
+            # 核心步骤：如果新数据是"未知"，则使用旧数据
+            new_info.merge_old_data(old_info)
+            self.refresh_history.record(name, old_info is None or new_info.to_dict() != old_info.to_dict())
+            if self.stats is not None:
+                self.stats.add(new_info)
+                self.stats.count('refreshed')
+            logger.info("✓ 更新成功: %s -> %s", name, new_info.team)
+            return new_info
+
+        # 3. 如果完全抓取失败（比如404），直接使用旧数据（如果存在）
+        if old_info:
+            if self.stats is not None:
+                self.stats.add(old_info)
+                self.stats.count('fallback')
+            logger.warning("✗ 抓取失败，使用旧数据存档: %s", name)
+            return old_info
+
+        if self.stats is not None:
+            self.stats.count('failed')
+        logger.error("✗ 抓取失败且无旧数据: %s", name)
+        return None
 
-        total_players = len(player_names)
-        logger.info(f"开始更新 {total_players} 个选手的信息...")
+    def _fetch_team_roster(self, team: str) -> Optional[List[RosterEntry]]:
+        """请求队伍页面并解析现役阵容，页面不存在或请求失败时返回None"""
+        entry = self.team_resolver.lookup(team)
+        if entry and (entry['missing'] or entry['disambiguation']):
+            logger.info("队伍没有对应的Liquipedia页面: %s", team)
+            return None
+        url = self.team_resolver.page_url(team)
+        if self.negative_cache.contains(url):
+            return None
 
-        for i, name in enumerate(player_names, 1):
-            logger.info(f"正在处理 ({i}/{total_players}): {name}")
+        response = self._make_request(url)
+        if not response:
+            return None
+        self.download_stats.record('team', len(response.content))
 
-            # 1. 获取新数据
-            new_info = self.get_player_info_from_liquipedia(name)
+        roster = parse_team_roster(BeautifulSoup(response.text, 'html.parser'))
+        if not roster:
+            logger.warning("队伍页面中没有找到现役阵容: %s", team)
+        return roster
 
-            # 2. 如果获取成功，进行合并
-            if new_info:
-                old_info = existing_data.get(name)
-                # 核心步骤：如果新数据是"未知"，则使用旧数据
-                new_info.merge_old_data(old_info)
+    def refresh_by_team(self, player_names: List[str],
+                        existing_data: Dict[str, PlayerInfo]) -> Tuple[List[PlayerInfo], List[str]]:
+        """
+        按队伍刷新：每支队伍的页面只请求一次，阵容中列出的选手直接用阵容表的国籍/位置更新
+        返回 (已更新的选手, 仍需逐个刷新的选手)：自由选手、阵容中找不到的选手 (可能已转会) 逐个刷新
+        """
+        self.team_registry.assign(existing_data[name] for name in player_names if name in existing_data)
+        groups, remaining = group_by_team(existing_data, player_names, TEAM_ROSTER_CONFIG['min_players'])
+        teams = {team_id: self.team_registry.name_of(team_id) for team_id in groups}
+        self.team_resolver.resolve(teams.values())
+
+        updated = []
+        for team_id, members in groups.items():
+            team = teams[team_id]
+            if self.budget_exhausted:
+                # 预算用完：剩下的队伍交给逐个刷新 (同样会因预算用完而沿用旧数据)
+                remaining.extend(members)
+                continue
+            roster = self._fetch_team_roster(team)
+            if not roster:
+                remaining.extend(members)
+                continue
+
+            found = 0
+            for name in members:
+                entry = self.title_resolver.lookup(name)
+                title = entry['title'] if entry and not entry['missing'] else None
+                roster_entry = match_roster(roster, name, title)
+                if roster_entry is None:
+                    remaining.append(name)
+                    continue
 
-                updated_players_list.append(new_info)
-                logger.info(f"✓ 更新成功: {name} -> {new_info.team}")
-            else:
-                # 3. 如果完全抓取失败（比如404），直接使用旧数据（如果存在）
                 old_info = existing_data.get(name)
+                new_info = self.player_from_fields(name, roster_entry.infobox_fields(team),
+                                                   self._get_role_from_local_database)
                 if old_info:
-                    updated_players_list.append(old_info)
-                    logger.warning(f"✗ 抓取失败，使用旧数据存档: {name}")
-                else:
-                    logger.error(f"✗ 抓取失败且无旧数据: {name}")
+                    # 阵容表没有出生日期
+                    new_info.birth_date = old_info.birth_date
+                    new_info.age = old_info.age or new_info.age
+                updated.append(self._apply_refresh(name, old_info, new_info))
+                found += 1
+            logger.info("队伍 %s: 阵容中找到 %s/%s 个选手", team, found, len(members))
+
+        logger.info("按队伍刷新: 请求 %s 个队伍页面，更新 %s 个选手，%s 个选手逐个刷新",
+                    len(groups), len(updated), len(remaining))
+        if self.stats is not None:
+            self.stats.run_metrics['按队伍刷新'] = {
+                '队伍页面': len(groups), '阵容更新': len(updated), '逐个刷新': len(remaining)}
+        return updated, remaining
+
+    def update_from_transfers(self, existing_data: Dict[str, PlayerInfo]) -> Optional[List[PlayerInfo]]:
+        """
+        根据转会门户页面更新：高水位之后的转会直接改写选手的队伍，只重新抓取这些选手
+        返回完整名单 (未转会的选手保留旧数据)；转会页面请求失败时返回None
+        """
+        self.stats = StatsAggregator()
+        transfers = []
+        for page in DATA_SOURCES['liquipedia']['transfer_pages']:
+            response = self._make_request(f"{self.title_resolver.base_url}/{page}")
+            if not response:
+                # 页面不全时不推进高水位，下次重新处理
+                logger.error("转会页面获取失败: %s", page)
+                return None
+            self.download_stats.record('transfers', len(response.content))
+            transfers.extend(parse_transfer_page(BeautifulSoup(response.text, 'html.parser')))
+
+        feed = self.transfer_feed
+        if feed.has_gap(transfers):
+            logger.warning("转会页面上最早的记录也晚于上次处理到的 %s，期间的转会可能有遗漏，建议全量刷新一次",
+                           feed.high_water_mark)
+        new_transfers = feed.new_transfers(transfers)
+        logger.info("转会页面共 %s 条记录，其中 %s 条是 %s 之后的新记录", len(transfers), len(new_transfers),
+                    feed.high_water_mark or "首次运行")
+
+        # 先批量解析名单的规范标题 (每50个名字一次请求)，名字与页面标题不同的选手也能匹配
+        self.title_resolver.resolve(list(existing_data))
+        index = index_roster(existing_data, self.title_resolver.lookup)
+        moved: Dict[str, PlayerInfo] = {}
+        for transfer in new_transfers:
+            name = index.get(normalize_title(transfer.title)) or index.get(normalize_title(transfer.player))
+            if name is None:
+                continue
+            info = moved.get(name, existing_data[name])
+            team = transfer.to_team or "Free Agent"
+            moved[name] = replace(info, team=team, team_id=self.team_registry.team_id(team))
+            logger.info("转会: %s %s -> %s (%s)", name, transfer.from_team or "无队伍",
+                        moved[name].team, transfer.date)
+
+        # 只重新抓取转会的选手 (位置等信息可能随转会变化)，抓取失败时保留已写入的新队伍
+        players = []
+        for name, info in existing_data.items():
+            if name in moved:
+                info = self.refresh_player(name, moved[name])
+            else:
+                self.stats.add(info)
+                self.stats.count('not_scheduled')
+            players.append(info)
+
+        # 与 update_players_info 相同：合并队伍别名并统一队伍ID
+        self.team_registry.learn_redirects(self.team_resolver)
+        self.team_registry.canonicalize(players)
+
+        feed.advance(transfers)
+        self.stats.run_metrics['转会动态'] = {
+            '转会记录': len(transfers), '新记录': len(new_transfers), '重新抓取': len(moved),
+            '高水位': feed.high_water_mark}
+        return players
+
+    def update_players_info(self, existing_data: Dict[str, PlayerInfo], output_file: str = "updated_players.csv",
+                            max_players: int = None, budget: int = None, by_team: bool = False) -> List[PlayerInfo]:
+        """
+        更新选手信息 (带合并逻辑)
+        budget: 请求预算模式，只刷新优先级最高的选手，其余选手原样输出旧数据；
+                预算是发送请求数的硬上限 (含标题解析、队伍页面、退回完整页面和403重试)，用完后停止刷新
+        by_team: 先按队伍页面批量刷新有队伍的选手，剩下的再逐个刷新
+        """
+        updated_players_list = []
+        player_names = self.plan_refresh(existing_data, max_players, budget)
+        # 边更新边统计，报告不再重新扫描数据
+        self.stats = StatsAggregator()
+        self.request_budget = budget
+
+        logger.info("开始更新 %s 个选手的信息...", len(player_names))
+
+        # 批量解析规范标题 (每50个名字一次API请求)
+        self.title_resolver.resolve(player_names)
+
+        if by_team:
+            updated_players_list, player_names = self.refresh_by_team(player_names, existing_data)
+
+        total_players = len(player_names)
+        for i, name in enumerate(player_names, 1):
+            if self.budget_exhausted:
+                logger.warning("请求预算已用完，剩余 %s 个选手沿用旧数据", total_players - i + 1)
+                break
+            logger.info("正在处理 (%s/%s): %s", i, total_players, name)
+
+            info = self.refresh_player(name, existing_data.get(name))
+            if info:
+                updated_players_list.append(info)
 
             if i % 10 == 0:
-                logger.info(f"进度: {i}/{total_players} ({i/total_players*100:.1f}%)")
+                logger.info("进度: %s/%s (%.1f%%)", i, total_players, i/total_players*100)
+
+        if budget is None:
+            # 用Liquipedia重定向合并队伍别名 (预算模式不额外发请求)
+            self.team_registry.learn_redirects(self.team_resolver)
+        self.team_registry.canonicalize(updated_players_list)
+
+        logger.info("负缓存命中 %s 次，熔断跳过 %s 次请求", self.negative_cache.hits, self.circuit_breaker.skipped)
+        logger.info(self.download_stats.summary())
+        logger.info("解析缓存命中 %s 次，重复页面合并 %s 次", self.parse_cache.hits, self.page_flight.shared)
+        self.stats.run_metrics.update({
+            '下载量': self.download_stats.to_dict(),
+            '负缓存命中': self.negative_cache.hits,
+            '熔断跳过请求': self.circuit_breaker.skipped,
+            '本地角色库': self.role_database.stats(),
+            '自适应超时': self.timeouts.stats(),
+            '解析缓存': {**self.parse_cache.stats(), '合并重复页面': self.page_flight.shared},
+        })
+
+        # 按优先级处理，但输出保持原CSV顺序
+        refreshed = {player.name: player for player in updated_players_list}
+        if budget is not None:
+            # 预算模式输出完整名单：未刷新的选手保留旧数据
+            output = []
+            for name, info in existing_data.items():
+                if name not in refreshed:
+                    self.stats.add(info)
+                    self.stats.count('not_scheduled')
+                output.append(refreshed.get(name, info))
+            updated_players_list = output
+        else:
+            updated_players_list = [refreshed[name] for name in existing_data if name in refreshed]
 
         return updated_players_list
 
-    def save_updated_players(self, players: List[PlayerInfo], filename: str):
+    @staticmethod
+    def save_updated_players(players: List[PlayerInfo], filename: str):
         """保存更新后的选手信息"""
         output_dir = Path("output")
         output_dir.mkdir(exist_ok=True)
         filepath = output_dir / filename
 
-        with open(filepath, 'w', newline='', encoding='utf-8-sig') as file:
-            fieldnames = ['姓名', '队伍', '国籍', '年龄', '游戏内位置']
+        # 先写临时文件再替换，读取快照的服务 (player_api.py) 不会读到写了一半的文件
+        tmp_file = output_dir / f"{filename}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', newline='', encoding='utf-8-sig') as file:
+            fieldnames = ['姓名', '队伍', '国籍', '年龄', '游戏内位置', '出生日期']
             writer = csv.DictWriter(file, fieldnames=fieldnames)
             writer.writeheader()
             for player in players:
                 writer.writerow(player.to_dict())
-        logger.info(f"已保存 {len(players)} 个选手信息到 {filepath}")
-
-    # ... (generate_update_report 方法保持不变，可以直接复制原来的) ...
-    def generate_update_report(self, original_count: int, updated_count: int, players: List[PlayerInfo]):
-        # 为了简洁，这里省略代码，逻辑与你原代码一致
-        pass
+        os.replace(tmp_file, filepath)
+        logger.info("已保存 %s 个选手信息到 %s", len(players), filepath)
+
+    def save_state(self):
+        """保存各类缓存、刷新历史与验证Cookie，下次运行 (或守护进程重启后) 继续使用"""
+        self.negative_cache.save()
+        self.title_resolver.save()
+        self.team_resolver.save()
+        self.refresh_history.save()
+        self.download_stats.save()
+        self.cookie_store.save(self.scraper.cookies)
+        self.team_registry.save()
+        self.parse_cache.save()
+        self.transfer_feed.save()
+
+    def generate_update_report(self, original_count: int, updated_count: int, players: List[PlayerInfo],
+                               report_file: str = "output/update_report.txt"):
+        """生成更新报告 (文本 + JSON)，统计数据来自更新循环中累计的 self.stats"""
+        stats = self.stats
+        if stats is None or stats.total != updated_count:
+            # 未经过 update_players_info (如直接传入列表)，单遍统计一次
+            stats = StatsAggregator()
+            for player in players:
+                stats.add(player)
+
+        success_rate = stats.counters['refreshed'] / original_count * 100 if original_count else 0
+        summary = [
+            f"原始选手数: {original_count}",
+            f"输出选手数: {updated_count}",
+            f"成功更新数: {stats.counters['refreshed']}",
+            f"更新成功率: {success_rate:.1f}%",
+        ]
+        if stats.counters['fallback'] or stats.counters['failed']:
+            summary.append(f"抓取失败: {stats.counters['fallback'] + stats.counters['failed']} "
+                           f"(其中 {stats.counters['fallback']} 个使用旧数据)")
+        if stats.counters['not_scheduled']:
+            summary.append(f"本次未刷新 (预算外): {stats.counters['not_scheduled']}")
+
+        report = stats.render_text("CS2选手信息更新报告", summary)
+        json_file = str(Path(report_file).with_suffix('.json'))
+        stats.save(report_file, report, json_file)
+        logger.info(report)
+        logger.info("报告已保存到: %s, %s", report_file, json_file)
 
 def main():
     """主函数"""
-    import sys
-
-    max_players = None
-    if len(sys.argv) > 1:
-        try:
-            max_players = int(sys.argv[1])
-        except ValueError:
-            pass
-
-    updater = PlayersUpdater()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="CS2选手信息更新器")
+    parser.add_argument('max_players', nargs='?', type=int, default=None,
+                        help="只更新优先级最高的前N个选手 (用于测试)")
+    parser.add_argument('--budget', type=int, default=None,
+                        help="最多发送N个请求，优先刷新最可能发生变化的选手")
+    parser.add_argument('--full-page', action='store_true',
+                        help="抓取完整页面，而不是只通过API获取信息框所在的首段")
+    parser.add_argument('--log-json', action='store_true',
+                        help="日志文件使用JSON Lines结构化格式")
+    parser.add_argument('--plan', action='store_true',
+                        help="试运行：只列出将要发送的请求并估算耗时，不访问网络")
+    parser.add_argument('--warc', nargs='?', const=WARC_CONFIG['directory'], default=None, metavar='DIR',
+                        help="把抓取到的页面存档为WARC (默认目录 %s)，之后可用 reparse.py 离线重新解析" % WARC_CONFIG['directory'])
+    parser.add_argument('--deadline', type=float, default=TIMEOUT_CONFIG['run_deadline'], metavar='SECONDS',
+                        help="整次运行最多花费的秒数，到时后剩余选手使用旧数据")
+    parser.add_argument('--by-team', action='store_true',
+                        help="按队伍刷新：每个队伍页面一次请求更新整支阵容，阵容中找不到的选手再逐个刷新")
+    parser.add_argument('--transfers', action='store_true',
+                        help="只处理转会门户页面上次运行之后的新转会，更新并重新抓取转会的选手")
+    parser.add_argument('--daemon', action='store_true',
+                        help="常驻运行：持续均匀地刷新选手并定期写出快照 (SIGHUP重新读取名单，SIGUSR1立即刷新)")
+    parser.add_argument('--cycle-hours', type=float, default=None,
+                        help="守护进程模式下每轮全量刷新的目标时长(小时)")
+    args = parser.parse_args()
+
+    setup_logging('players_updater.log', json_format=args.log_json or LOGGING_CONFIG['json_format'])
+
+    archive = WarcWriter(args.warc, prefix='players_updater') if args.warc else None
+    updater = PlayersUpdater(lean_fetch=not args.full_page, archive=archive, run_deadline=args.deadline)
 
     # 1. 加载已有数据 (现在返回的是字典)
     existing_data = updater.load_existing_players("players.csv")
     if not existing_data:
         return
 
+    if args.plan:
+        print(updater.build_fetch_plan(existing_data, args.max_players, args.budget).render())
+        return
+
+    if args.daemon:
+        from updater_daemon import UpdaterDaemon
+        daemon = UpdaterDaemon(updater, "players.csv")
+        if args.cycle_hours:
+            daemon.cycle_seconds = args.cycle_hours * 3600
+        daemon.install_signal_handlers()
+        daemon.run()
+        return
+
+    if args.transfers:
+        updated_players = updater.update_from_transfers(existing_data)
+        if updated_players is None:
+            return
+        updater.save_updated_players(updated_players, "updated_players.csv")
+        updater.save_state()
+        updater.generate_update_report(len(existing_data), len(updated_players), updated_players)
+        return
+
     # 2. 更新信息 (传入整个字典以便合并)
-    updated_players = updater.update_players_info(existing_data, "updated_players.csv", max_players)
+    updated_players = updater.update_players_info(existing_data, "updated_players.csv", args.max_players, args.budget,
+                                                  by_team=args.by_team)
 
     # 3. 保存
     updater.save_updated_players(updated_players, "updated_players.csv")
+    updater.save_state()
 
     # 4. 报告 (此处稍微调整参数匹配)
     updater.generate_update_report(len(existing_data), len(updated_players), updated_players)
@@ -6,9 +6,16 @@ import csv
 import random
 import os
 
+from request_guard import AdaptiveTimeout
+
 # 设置请求头，模拟浏览器
 headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
 
+# 请求超时按主机观测延迟计算 (之前没有超时，卡住的连接会一直等待)
+timeouts = AdaptiveTimeout()
+session = timeouts.instrument(requests.Session())
+session.headers.update(headers)
+
 # 定义所有地区的URL
 region_urls = {
     "Europe": "https://liquipedia.net/counterstrike/Portal:Players/Europe",
@@ -25,7 +32,7 @@ all_player_links = []
 # 遍历每个地区
 for region, url in region_urls.items():
     print(f"正在处理地区: {region}")
-    response = requests.get(url, headers=headers)
+    response = timeouts.request(session.get, url)
     soup = BeautifulSoup(response.text, 'html.parser')
 
     tables = soup.find_all('table', class_='wikitable')
@@ -73,7 +80,7 @@ with open(csv_file, 'a', newline='', encoding='utf-8') as file:
         print(f"正在访问: {player_url}")
 
         try:
-            player_response = requests.get(player_url, headers=headers)
+            player_response = timeouts.request(session.get, player_url)
             player_soup = BeautifulSoup(player_response.text, 'html.parser')
 
             if not player_soup.find('div', class_='infobox-cell-2', string='Nationality:'):
@@ -4,20 +4,32 @@ from datetime import datetime
 import csv
 import time
 
+from hltv_stats import HLTVStatsIngestor
+from request_guard import AdaptiveTimeout
+
 # 设置请求头，模拟浏览器
 headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/91.0.4472.124'}
+session = requests.Session()
+session.headers.update(headers)
+# 按主机观测延迟计算超时，慢主机不会每次都等满固定超时
+timeouts = AdaptiveTimeout()
+timeouts.instrument(session)
+
+
+def fetch(url, stream=False):
+    """统计表分页请求"""
+    try:
+        response = timeouts.request(session.get, url, stream=stream)
+        response.raise_for_status()
+        return response
+    except requests.exceptions.RequestException as e:
+        print(f"请求错误: {e}")
+        return None
 
-# 从HLTV获取Top 500选手
-hltv_url = "https://www.hltv.org/stats/players?start=0&limit=500"  # 前500名
-response = requests.get(hltv_url, headers=headers)
-soup = BeautifulSoup(response.text, 'html.parser')
 
-player_links = []
-for row in soup.select('table.stats-table tbody tr'):
-    name_elem = row.find('a', class_='player-nick')
-    if name_elem:
-        name = name_elem.text.strip()
-        player_links.append(name)
+# 从HLTV获取Top 500选手 (分页流式解析)
+stats = HLTVStatsIngestor(fetch).ingest(500)
+player_links = [name.strip() for name in stats.filter_names()]
 
 print(f"从HLTV找到 {len(player_links)} 个Top选手")
 
@@ -51,7 +63,7 @@ with open(csv_file, 'a', newline='', encoding='utf-8') as file:
         print(f"正在访问: {player_url}")
 
         try:
-            response = requests.get(player_url, headers=headers, timeout=10)
+            response = timeouts.request(session.get, player_url)
             soup = BeautifulSoup(response.text, 'html.parser')
 
             if not soup.find('div', class_='infobox-cell-2', string='Nationality:'):
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多来源选手记录合并
+1. 按字段合并：每个字段分别取 有效值 > 来源优先级高 > 数据更新 的记录，
+   不会因为另一条记录的队伍/年龄更完整就丢掉这条记录里的国籍或角色
+2. 流式合并：各来源的记录按姓名规范键排序后用 heapq.merge 做K路归并，
+   内存中只保留每个来源的当前记录和同名的一组记录
+"""
+import heapq
+import logging
+from itertools import groupby
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from config import MERGE_CONFIG
+from sharding import normalize_title
+from team_registry import is_free_agent
+
+logger = logging.getLogger(__name__)
+
+# 参与合并的字段 (姓名是合并键，队伍ID随队伍一起取)
+MERGE_FIELDS = ('team', 'nationality', 'age', 'role', 'birth_date')
+# 各爬虫使用的"未知"占位值
+UNKNOWN_VALUES = {'', '未知国籍', '未知年龄', '未知位置', '未知', 'unknown'}
+
+
+def merge_key(record) -> str:
+    return normalize_title(record.name)
+
+
+def source_rank(source: str) -> int:
+    """来源优先级，未配置的来源 (如旧分片文件名) 为0"""
+    return MERGE_CONFIG['source_precedence'].get(source, 0)
+
+
+def has_value(record, field: str) -> bool:
+    if field == 'team':
+        return not is_free_agent(record.team)
+    return str(getattr(record, field)).strip() not in UNKNOWN_VALUES
+
+
+class FieldMerger:
+    """把同一选手的多条记录按字段合并为一条，记录从其他记录补全的字段数"""
+
+    def __init__(self):
+        self.merged = 0
+        self.fields_filled = 0
+
+    def merge(self, group: Sequence[Tuple[object, float]]):
+        """
+        group: [(记录, 抓取时间), ...]，顺序靠前的在完全相同时优先
+        返回合并后的新记录 (以优先级最高的记录为基础)
+        """
+        if len(group) == 1:
+            return group[0][0]
+        self.merged += 1
+
+        def priority(item: Tuple[int, Tuple[object, float]], field: Optional[str] = None):
+            position, (record, fetched_at) = item
+            known = has_value(record, field) if field else True
+            return known, source_rank(getattr(record, 'source', '')), fetched_at, -position
+
+        ranked = list(enumerate(group))
+        base = max(ranked, key=priority)[1][0]
+        values = {}
+        for field in MERGE_FIELDS:
+            winner = max(ranked, key=lambda item: priority(item, field))[1][0]
+            if winner is not base and has_value(winner, field) and not has_value(base, field):
+                self.fields_filled += 1
+            values[field] = getattr(winner, field)
+            if field == 'team':
+                values['team_id'] = winner.team_id
+
+        fields = dict(vars(base))
+        fields.update(values)
+        return type(base)(**fields)
+
+
+def _keyed(records: Iterable, index: int, fetched_at: float, label: str) -> Iterator[Tuple[str, int, object, float]]:
+    """给记录加上归并用的键，并检查输入确实按键排序"""
+    previous = None
+    for record in records:
+        key = merge_key(record)
+        if previous is not None and key < previous:
+            raise ValueError(f"{label} 没有按姓名排序: {previous!r} 之后出现 {key!r}")
+        previous = key
+        yield key, index, record, fetched_at
+
+
+def merge_sorted(sources: Sequence[Iterable], fetched_at: Optional[Sequence[float]] = None,
+                 labels: Optional[Sequence[str]] = None,
+                 merger: Optional[FieldMerger] = None) -> Iterator:
+    """
+    K路归并已按 merge_key 排序的各来源记录，逐个返回合并后的选手
+    fetched_at: 各来源的抓取时间 (同优先级时取较新的)；labels 用于错误信息
+    """
+    fetched_at = fetched_at or [0.0] * len(sources)
+    labels = labels or [f"来源{i}" for i in range(len(sources))]
+    merger = merger or FieldMerger()
+
+    streams = [_keyed(records, i, fetched_at[i], labels[i]) for i, records in enumerate(sources)]
+    # 键相同时按来源顺序排列 (元组第二项)，之后才比较记录本身
+    merged = heapq.merge(*streams, key=lambda item: item[:2])
+    for _, items in groupby(merged, key=lambda item: item[0]):
+        yield merger.merge([(record, time) for _, _, record, time in items])
+
+
+def merge_lists(players_list: Sequence[List], fetched_at: Optional[Sequence[float]] = None) -> List:
+    """合并内存中的多个来源列表 (各列表先排序)，按字段合并同名选手"""
+    merger = FieldMerger()
+    sources = [sorted(players, key=merge_key) for players in players_list]
+    merged = list(merge_sorted(sources, fetched_at, merger=merger))
+    if merger.merged:
+        logger.info("合并了 %s 个重复选手，从其他来源补全了 %s 个字段", merger.merged, merger.fields_filled)
+    return merged
+
+
+def is_sorted(records: Iterable) -> bool:
+    """流式检查记录是否已按 merge_key 排序"""
+    previous = None
+    for record in records:
+        key = merge_key(record)
+        if previous is not None and key < previous:
+            return False
+        previous = key
+    return True
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线重新解析WARC存档
+修复解析器后，不再重新抓取，直接对 --warc 存档中的页面重新运行提取逻辑：
+  - players_updater.py 的首段API响应 (action=parse&prop=text) 和完整页面
+  - famouspro.py 的 wikitext API响应 (action=parse&prop=wikitext)
+存档按记录边界切成若干段 (每段 reparse_chunk_records 条记录) 分给各进程，
+即使只有一个WARC文件也能用满所有CPU核心；同一选手有多次抓取时取最新的一次。
+
+python reparse.py cache/warc --players players.csv --output reparsed_players.csv
+"""
+import json
+import logging
+import multiprocessing
+import os
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+from bs4 import BeautifulSoup
+
+import famouspro
+from csv_loader import load_records
+from infobox import extract_infobox_fields
+from players_updater import PlayerInfo, PlayersUpdater
+from role_database import default_role_database
+from sharding import normalize_title
+from title_resolver import TitleResolver
+from config import WARC_CONFIG
+from warc_archive import find_warc_files, iter_warc_records, record_spans
+
+logger = logging.getLogger(__name__)
+
+# 重新解析结果中保存的字段 (不含队伍ID：各进程的队伍维度表互相独立，由主进程重新分配)
+RESULT_FIELDS = ('name', 'team', 'nationality', 'age', 'role', 'birth_date')
+
+# ([(规范键, 抓取时间, 字段), ...], 记录总数, [解析失败的说明])
+ChunkResult = Tuple[List[Tuple[str, str, Dict[str, str]]], int, List[str]]
+
+
+def extract_player(url: str, body: bytes) -> Optional[PlayerInfo]:
+    """按URL判断响应类型并提取选手信息，不是选手页面时返回None"""
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+
+    if parsed.path.endswith('/api.php'):
+        if query.get('action') != ['parse']:
+            # 标题解析等其他API请求
+            return None
+        data = json.loads(body)
+        if 'error' in data or 'parse' not in data:
+            return None
+        title = data['parse'].get('title') or query.get('page', [''])[0]
+        if 'wikitext' in query.get('prop', [''])[0]:
+            info = famouspro.parse_player_data(title, data)
+            return PlayerInfo(name=title, team=str(info['队伍']), nationality=str(info['国籍']),
+                              age=str(info['年龄']), role=str(info['游戏内位置']))
+        html = data['parse'].get('text', '')
+        if isinstance(html, dict):
+            # formatversion=1 的返回格式
+            html = html.get('*', '')
+        soup = BeautifulSoup(html, 'html.parser')
+    else:
+        title = unquote(parsed.path.rsplit('/', 1)[-1]).replace('_', ' ')
+        soup = BeautifulSoup(body, 'html.parser')
+        if not soup.title or "Liquipedia" not in (soup.title.string or ''):
+            return None
+
+    fields = extract_infobox_fields(soup)
+    if not fields:
+        return None
+    return PlayersUpdater.player_from_fields(title, fields, default_role_database().lookup)
+
+
+def split_archives(files, chunk_records: int = WARC_CONFIG['reparse_chunk_records']) -> List[Tuple[str, int, int]]:
+    """把存档按记录边界切成 (文件, 起始字节, 结束字节) 的段，每段最多 chunk_records 条记录"""
+    chunks = []
+    for path in files:
+        spans = list(record_spans(path))
+        for i in range(0, len(spans), chunk_records):
+            chunks.append((str(path), spans[i][0], spans[min(i + chunk_records, len(spans)) - 1][1]))
+    return chunks
+
+
+def reparse_file(path) -> ChunkResult:
+    """重新解析一个完整的WARC文件"""
+    return reparse_chunk((path, 0, None))
+
+
+def reparse_chunk(chunk: Tuple[str, int, Optional[int]]) -> ChunkResult:
+    """重新解析存档中的一段 (文件, 起始字节, 结束字节)，在工作进程中运行，错误汇总后由主进程记录日志"""
+    path, start, end = chunk
+    results = []
+    errors = []
+    total = 0
+    for record in iter_warc_records(path, start, end):
+        total += 1
+        if record.status != 200:
+            continue
+        try:
+            player = extract_player(record.url, record.body)
+        except Exception as e:
+            errors.append(f"{record.url}: {e}")
+            continue
+        if player is not None:
+            results.append((normalize_title(player.name), record.date,
+                            {field: getattr(player, field) for field in RESULT_FIELDS}))
+    return results, total, errors
+
+
+def reparse_archives(paths: List[str], workers: Optional[int] = None,
+                     chunk_records: int = WARC_CONFIG['reparse_chunk_records']) -> Dict[str, PlayerInfo]:
+    """并行重新解析所有存档，返回 {规范键: 最新一次抓取解析出的选手}"""
+    files = find_warc_files(paths)
+    chunks = split_archives(files, chunk_records)
+    if not chunks:
+        return {}
+
+    latest: Dict[str, Tuple[str, Dict[str, str]]] = {}
+    total = 0
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    with multiprocessing.Pool(workers) as pool:
+        for results, count, errors in pool.imap_unordered(reparse_chunk, chunks):
+            total += count
+            for error in errors:
+                logger.warning("解析失败 %s", error)
+            for key, date, fields in results:
+                # WARC-Date 是ISO格式，可以直接按字符串比较
+                if key not in latest or date >= latest[key][0]:
+                    latest[key] = (date, fields)
+
+    logger.info("重新解析了 %s 个存档文件 (%s 段) 中的 %s 条响应 (%s 个进程)，得到 %s 个选手",
+                len(files), len(chunks), total, workers, len(latest))
+    return {key: PlayerInfo(**fields) for key, (_, fields) in latest.items()}
+
+
+def apply_to_roster(reparsed: Dict[str, PlayerInfo], players_file: str) -> List[PlayerInfo]:
+    """
+    把重新解析的结果套用到名单上 (保持名单顺序和名字)
+    名单中的名字先通过标题缓存映射为页面标题；新数据为"未知"的字段保留名单中的旧数据
+    """
+    resolver = TitleResolver(lambda url: None)
+    players = []
+    applied = 0
+    for old_info in load_records(players_file, PlayerInfo):
+        entry = resolver.lookup(old_info.name)
+        title = entry['title'] if entry and not entry.get('missing') else old_info.name
+        new_info = reparsed.get(normalize_title(title))
+        if new_info is None:
+            players.append(old_info)
+            continue
+        fields = {field: getattr(new_info, field) for field in RESULT_FIELDS}
+        fields['name'] = old_info.name
+        player = PlayerInfo(**fields)
+        player.merge_old_data(old_info)
+        players.append(player)
+        applied += 1
+    logger.info("名单中 %s/%s 个选手使用了重新解析的数据", applied, len(players))
+    return players
+
+
+def main():
+    """主函数"""
+    import argparse
+    from log_setup import setup_logging
+
+    parser = argparse.ArgumentParser(description="对WARC存档重新运行解析，不访问网络")
+    parser.add_argument('archives', nargs='*', default=[WARC_CONFIG['directory']],
+                        help="WARC文件或目录 (默认 %s)" % WARC_CONFIG['directory'])
+    parser.add_argument('--players', default=None,
+                        help="把结果套用到该名单 (如 players.csv)，名单外的选手不输出")
+    parser.add_argument('--output', default='reparsed_players.csv', help="输出到 output/ 下的文件名")
+    parser.add_argument('--workers', type=int, default=None, help="进程数 (默认CPU核数)")
+    args = parser.parse_args()
+
+    setup_logging('reparse.log')
+
+    reparsed = reparse_archives(args.archives, args.workers)
+    if not reparsed:
+        logger.error("没有可重新解析的存档")
+        return
+
+    if args.players:
+        players = apply_to_roster(reparsed, args.players)
+    else:
+        players = sorted(reparsed.values(), key=lambda player: normalize_title(player.name))
+    PlayersUpdater.save_updated_players(players, args.output)
+
+
+if __name__ == "__main__":
+    main()
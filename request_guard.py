@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求保护工具
+1. NegativeCache: 记录已确认不存在的页面(404)，在TTL内不再重复请求
+2. CircuitBreaker: 按主机统计连续失败次数，超过阈值后熔断，冷却期内直接跳过请求
+3. AdaptiveTimeout: 按主机观测到的延迟分位数计算连接/读取超时，并执行整次运行的截止时间
+"""
+import json
+import logging
+import math
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Deque, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from config import CACHE_CONFIG, ERROR_HANDLING, TIMEOUT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class NegativeCache:
+    """已知缺失页面的缓存 (TTL随确认次数指数增长)"""
+
+    def __init__(self, cache_file: Optional[str] = None,
+                 base_ttl: float = CACHE_CONFIG['negative_ttl'],
+                 max_ttl: float = CACHE_CONFIG['negative_max_ttl']):
+        if cache_file is None:
+            cache_file = os.path.join(CACHE_CONFIG['cache_dir'], CACHE_CONFIG['negative_cache_file'])
+        self.cache_file = Path(cache_file)
+        self.base_ttl = base_ttl
+        self.max_ttl = max_ttl
+        self.entries: Dict[str, Dict[str, float]] = {}
+        self.hits = 0
+        self._load()
+
+    def _load(self):
+        """从磁盘加载缓存，忽略已过期的条目"""
+        if not self.cache_file.exists():
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("负缓存文件读取失败，将重新建立: %s", e)
+            return
+
+        now = time.time()
+        self.entries = {key: entry for key, entry in data.items() if entry.get('expires_at', 0) > now}
+        logger.info("加载了 %s 条已知缺失页面记录", len(self.entries))
+
+    def save(self):
+        """原子写入缓存文件"""
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = Path(f"{self.cache_file}.{os.getpid()}.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_file, self.cache_file)
+
+    def contains(self, key: str, record_hit: bool = True) -> bool:
+        """判断key是否为已知缺失 (未过期)；record_hit=False 时只查询不计入命中统计"""
+        entry = self.entries.get(key)
+        if not entry:
+            return False
+        if entry['expires_at'] <= time.time():
+            # 过期后不立即删除，保留misses以便再次确认时继续延长TTL
+            return False
+        if record_hit:
+            self.hits += 1
+        return True
+
+    def add(self, key: str):
+        """记录一次缺失确认，每次确认TTL翻倍"""
+        now = time.time()
+        entry = self.entries.get(key, {'misses': 0})
+        misses = int(entry['misses']) + 1
+        ttl = min(self.base_ttl * (2 ** (misses - 1)), self.max_ttl)
+        self.entries[key] = {'misses': misses, 'last_seen': now, 'expires_at': now + ttl}
+
+    def discard(self, key: str):
+        """页面重新出现时移除记录"""
+        self.entries.pop(key, None)
+
+
+class CircuitBreaker:
+    """按主机的熔断器"""
+
+    def __init__(self, max_failures: int = ERROR_HANDLING['max_consecutive_errors'],
+                 cooldown: float = ERROR_HANDLING['error_cooldown']):
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.failures: Dict[str, int] = {}
+        self.opened_at: Dict[str, float] = {}
+        self.skipped = 0
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlparse(url).netloc
+
+    def allow_request(self, url: str) -> bool:
+        """熔断打开时返回False；冷却期结束后放行一次试探请求(半开状态)"""
+        host = self.host_of(url)
+        opened_at = self.opened_at.get(host)
+        if opened_at is None:
+            return True
+        if time.time() - opened_at >= self.cooldown:
+            # 半开：放行一次，失败则重新计时
+            self.opened_at[host] = time.time()
+            logger.info("熔断冷却结束，试探请求: %s", host)
+            return True
+        self.skipped += 1
+        return False
+
+    def is_open(self, url: str) -> bool:
+        host = self.host_of(url)
+        opened_at = self.opened_at.get(host)
+        return opened_at is not None and time.time() - opened_at < self.cooldown
+
+    def record_success(self, url: str):
+        host = self.host_of(url)
+        if host in self.opened_at:
+            logger.info("主机恢复，关闭熔断: %s", host)
+        self.failures[host] = 0
+        self.opened_at.pop(host, None)
+
+    def record_failure(self, url: str):
+        host = self.host_of(url)
+        self.failures[host] = self.failures.get(host, 0) + 1
+        if self.failures[host] >= self.max_failures and host not in self.opened_at:
+            self.opened_at[host] = time.time()
+            logger.error("%s 连续失败 %s 次，熔断 %s 秒", host, self.failures[host], self.cooldown)
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """整次运行的截止时间已到，不再发送请求"""
+
+
+class AdaptiveTimeout:
+    """
+    按主机记录建连耗时和首字节时间，超时取 p百分位 x 倍数，并限制在上下限之间
+    样本不足时使用默认超时；设置了截止时间时超时不超过剩余时间
+    """
+
+    KINDS = ('connect', 'read')
+
+    def __init__(self, run_deadline: Optional[float] = TIMEOUT_CONFIG['run_deadline'],
+                 config: Dict = TIMEOUT_CONFIG):
+        """run_deadline: 从现在起整次运行最多花费的秒数 (None表示不限)"""
+        self.default = dict(zip(self.KINDS, config['default']))
+        self.floor = dict(zip(self.KINDS, config['floor']))
+        self.ceiling = dict(zip(self.KINDS, config['ceiling']))
+        self.percentile = config['percentile']
+        self.multiplier = config['multiplier']
+        self.min_samples = config['min_samples']
+        self.window = config['window']
+        self.deadline = time.monotonic() + run_deadline if run_deadline else None
+        # 主机名 -> {'connect': 最近的样本, 'read': 最近的样本}
+        self.samples: Dict[str, Dict[str, Deque[float]]] = {}
+        self.timeouts_hit = 0
+        self._deadline_logged = False
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        # 连接对象只知道主机名 (不含端口)，两种样本统一按主机名记录
+        return urlparse(url).hostname or ''
+
+    def record(self, host: str, kind: str, seconds: float):
+        entry = self.samples.setdefault(host, {k: deque(maxlen=self.window) for k in self.KINDS})
+        entry[kind].append(seconds)
+
+    def _quantile(self, values) -> float:
+        ordered = sorted(values)
+        rank = max(1, math.ceil(self.percentile / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+    def _bound(self, host: str, kind: str) -> float:
+        values = self.samples.get(host, {}).get(kind)
+        if not values or len(values) < self.min_samples:
+            return self.default[kind]
+        value = self._quantile(values) * self.multiplier
+        return min(self.ceiling[kind], max(self.floor[kind], value))
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        if remaining is None or remaining > 0:
+            return False
+        if not self._deadline_logged:
+            logger.warning("已到运行截止时间，不再发送请求")
+            self._deadline_logged = True
+        return True
+
+    def timeout(self, url: str) -> Tuple[float, float]:
+        """返回 (连接超时, 读取超时)"""
+        host = self.host_of(url)
+        connect, read = self._bound(host, 'connect'), self._bound(host, 'read')
+        remaining = self.remaining()
+        if remaining is not None:
+            connect, read = min(connect, remaining), min(read, remaining)
+        return connect, read
+
+    def request(self, get: Callable, url: str, **kwargs):
+        """
+        用自适应超时调用 get(url, timeout=..., **kwargs) 并记录首字节时间
+        超时的请求按超时值记为一个样本 (实际延迟至少这么长)，慢主机的超时会逐步放宽到上限
+        """
+        if self.expired():
+            raise DeadlineExceeded(f"已到运行截止时间: {url}")
+        host = self.host_of(url)
+        connect, read = self.timeout(url)
+        try:
+            response = get(url, timeout=(connect, read), **kwargs)
+        except requests.exceptions.ConnectTimeout:
+            self.record(host, 'connect', connect)
+            self.timeouts_hit += 1
+            raise
+        except requests.exceptions.ReadTimeout:
+            self.record(host, 'read', read)
+            self.timeouts_hit += 1
+            raise
+        # elapsed: 发出请求到收到响应头的时间
+        self.record(host, 'read', response.elapsed.total_seconds())
+        return response
+
+    def instrument(self, session: requests.Session):
+        """给会话的连接池换上记录建连耗时(含TLS握手)的连接类"""
+        tracker = self
+        pool_classes = {}
+        for scheme, pool_cls in (('http', HTTPConnectionPool), ('https', HTTPSConnectionPool)):
+            class TimedConnection(pool_cls.ConnectionCls):
+                def connect(self):
+                    start = time.monotonic()
+                    super().connect()
+                    tracker.record(self.host, 'connect', time.monotonic() - start)
+
+            pool_classes[scheme] = type(f"Timed{pool_cls.__name__}", (pool_cls,), {'ConnectionCls': TimedConnection})
+        for adapter in session.adapters.values():
+            # PoolManager 默认引用模块级的字典，这里整体替换而不是修改
+            adapter.poolmanager.pool_classes_by_scheme = pool_classes
+        return session
+
+    def stats(self) -> Dict:
+        hosts = {}
+        for host, entry in self.samples.items():
+            hosts[host] = {f"{kind}_timeout": round(self._bound(host, kind), 2) for kind in self.KINDS}
+            hosts[host]['samples'] = len(entry['read'])
+        return {'超时次数': self.timeouts_hit, '主机': hosts}
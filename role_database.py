@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地选手角色库
+角色数据保存在 player_roles.json，加载一次后建立忽略大小写/空格下划线差异的索引，
+支持别名 (改名、常见写法)，文件被修改后自动重新加载。所有爬虫共用同一个实例。
+"""
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+from config import ROLE_DATABASE_CONFIG
+from sharding import normalize_title
+
+logger = logging.getLogger(__name__)
+
+_default_database: Optional['RoleDatabase'] = None
+
+
+class RoleDatabase:
+    """{选手: 角色} 索引，记录命中/未命中次数"""
+
+    def __init__(self, db_file: str = ROLE_DATABASE_CONFIG['file'],
+                 check_interval: float = ROLE_DATABASE_CONFIG['reload_check_interval']):
+        # 相对路径按代码所在目录解析，数据文件随代码一起分发
+        self.db_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), db_file)
+        # 两次检查文件修改时间的最小间隔(秒)
+        self.check_interval = check_interval
+        self.index: Dict[str, str] = {}
+        self.mtime: Optional[float] = None
+        self.last_check = 0.0
+        self.hits = 0
+        self.misses = 0
+        self._reload_if_changed(force=True)
+
+    def _reload_if_changed(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self.last_check < self.check_interval:
+            return
+        self.last_check = now
+
+        try:
+            mtime = os.path.getmtime(self.db_file)
+        except OSError:
+            if self.mtime is not None or force:
+                logger.warning("角色库文件不存在: %s", self.db_file)
+            self.index, self.mtime = {}, None
+            return
+        if mtime == self.mtime:
+            return
+
+        try:
+            with open(self.db_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            # 文件正在编辑或格式错误时保留旧索引
+            logger.error("角色库读取失败，继续使用旧数据: %s", e)
+            return
+
+        index = {normalize_title(name): role for name, role in data.get('players', {}).items()}
+        for alias, name in data.get('aliases', {}).items():
+            role = index.get(normalize_title(name))
+            if role:
+                index[normalize_title(alias)] = role
+            else:
+                logger.warning("角色库别名 %s 指向的选手 %s 不存在", alias, name)
+
+        if self.mtime is not None:
+            logger.info("角色库已更新，重新加载 %s 条记录", len(index))
+        self.index, self.mtime = index, mtime
+
+    def lookup(self, name: str) -> Optional[str]:
+        """查找选手角色，找不到返回None"""
+        self._reload_if_changed()
+        role = self.index.get(normalize_title(name))
+        if role:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return role
+
+    def stats(self) -> Dict[str, int]:
+        return {'命中': self.hits, '未命中': self.misses, '条目': len(self.index)}
+
+
+def default_role_database() -> RoleDatabase:
+    """所有爬虫共用的角色库实例"""
+    global _default_database
+    if _default_database is None:
+        _default_database = RoleDatabase()
+    return _default_database
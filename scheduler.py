@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+刷新优先级调度
+根据 距上次刷新时间、历史变化频率、是否在活跃队伍、HLTV排名 给选手打分，
+按分数排序，并在请求预算内优先刷新最可能发生变化的选手。
+"""
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from config import CACHE_CONFIG, SCHEDULER_CONFIG
+from hltv_stats import HLTVStatsTable
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshHistory:
+    """每个选手的刷新历史: 上次刷新时间、刷新次数、发生变化的次数"""
+
+    def __init__(self, history_file: Optional[str] = None):
+        if history_file is None:
+            history_file = os.path.join(CACHE_CONFIG['cache_dir'], CACHE_CONFIG['refresh_history_file'])
+        self.history_file = Path(history_file)
+        self.entries: Dict[str, Dict] = {}
+        if self.history_file.exists():
+            try:
+                with open(self.history_file, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("刷新历史读取失败: %s", e)
+
+    def get(self, name: str) -> Dict:
+        return self.entries.get(name, {'last_refreshed': 0, 'refreshes': 0, 'changes': 0})
+
+    def record(self, name: str, changed: bool):
+        entry = dict(self.get(name))
+        entry['last_refreshed'] = time.time()
+        entry['refreshes'] += 1
+        entry['changes'] += 1 if changed else 0
+        self.entries[name] = entry
+
+    def save(self):
+        self.history_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = Path(f"{self.history_file}.{os.getpid()}.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_file, self.history_file)
+
+
+class RefreshScheduler:
+    """按优先级排序选手，并在请求预算内挑选要刷新的选手"""
+
+    def __init__(self, history: RefreshHistory, rankings: Optional[Dict[str, int]] = None,
+                 config: Dict = SCHEDULER_CONFIG):
+        self.history = history
+        self.rankings = rankings or {}
+        self.weights = config['weights']
+        self.horizon = config['staleness_horizon']
+        self.inactive_teams = config['inactive_teams']
+
+    def score(self, name: str, team: str) -> float:
+        """分数越高越应该优先刷新"""
+        entry = self.history.get(name)
+
+        # 从未刷新过的选手视为完全过期
+        if entry['last_refreshed']:
+            staleness = min(1.0, (time.time() - entry['last_refreshed']) / self.horizon)
+        else:
+            staleness = 1.0
+
+        # 拉普拉斯平滑，没有历史的选手取0.5
+        change_rate = (entry['changes'] + 1) / (entry['refreshes'] + 2)
+
+        active = 0.0 if (team or '').strip().lower() in self.inactive_teams else 1.0
+
+        rank = self.rankings.get(name)
+        ranking = 1.0 - (rank - 1) / len(self.rankings) if rank else 0.0
+
+        return (self.weights['staleness'] * staleness +
+                self.weights['change_rate'] * change_rate +
+                self.weights['active_team'] * active +
+                self.weights['ranking'] * ranking)
+
+    def order(self, teams: Dict[str, str]) -> List[str]:
+        """返回按优先级从高到低排序的选手名 ({选手名: 当前队伍})"""
+        scores = {name: self.score(name, team) for name, team in teams.items()}
+        # sorted是稳定排序，同分时保持CSV中的原有顺序
+        return sorted(teams, key=lambda name: scores[name], reverse=True)
+
+    def plan(self, teams: Dict[str, str], budget: Optional[int] = None,
+             max_players: Optional[int] = None,
+             cost_func: Callable[[str], int] = lambda name: 1) -> List[str]:
+        """
+        按优先级挑选要刷新的选手
+        budget: 最多花费的请求数 (None表示不限)
+        cost_func: 估算刷新某个选手需要的请求数
+        """
+        selected = []
+        spent = 0
+        for name in self.order(teams):
+            if max_players is not None and len(selected) >= max_players:
+                break
+            cost = cost_func(name)
+            if budget is not None and spent + cost > budget:
+                continue
+            selected.append(name)
+            spent += cost
+
+        if budget is not None:
+            logger.info("请求预算 %s，计划刷新 %s 个选手，预计 %s 次请求", budget, len(selected), spent)
+        return selected
+
+
+def load_rankings(stats_file: str) -> Dict[str, int]:
+    """从HLTV统计表缓存读取排名，不存在时返回空字典"""
+    if not os.path.exists(stats_file):
+        return {}
+    try:
+        return HLTVStatsTable.load(stats_file).rankings()
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("HLTV排名读取失败: %s", e)
+        return {}
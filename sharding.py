@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分片爬取工具
+把选手标题确定性地哈希到K个分片，多个进程/机器各自处理一个分片 (--shard i/K)，
+各分片输出到单独的文件，最后由合并步骤统一去重。
+"""
+import argparse
+import hashlib
+import re
+from pathlib import Path
+from typing import List, Optional, Tuple
+from urllib.parse import unquote
+
+
+def normalize_title(title: str) -> str:
+    """统一大小写与空格，保证同一选手的不同写法落在同一分片"""
+    return title.strip().replace(' ', '_').casefold()
+
+
+def shard_key(title: str) -> str:
+    """分片键：页面链接末尾 (百分号编码) 与原始姓名得到相同的键"""
+    return normalize_title(unquote(title))
+
+
+def shard_of(title: str, shard_count: int) -> int:
+    """返回标题所属的分片编号 (0 ~ shard_count-1)，与进程和Python哈希种子无关"""
+    digest = hashlib.md5(shard_key(title).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % shard_count
+
+
+def parse_shard_spec(spec: str) -> Tuple[int, int]:
+    """解析 'i/K' 形式的分片参数，i 从0开始 (供 argparse 的 type 使用，错误信息原样显示)"""
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d+)\s*', spec)
+    if not match:
+        raise argparse.ArgumentTypeError(f"分片参数格式应为 i/K，例如 0/4: {spec}")
+    index, count = int(match.group(1)), int(match.group(2))
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"分片编号超出范围: {spec}")
+    return index, count
+
+
+def shard_filename(filename: str, index: int, count: int) -> str:
+    """cs2_players_optimized.csv -> cs2_players_optimized.shard-0-of-4.csv"""
+    path = Path(filename)
+    return f"{path.stem}.shard-{index}-of-{count}{path.suffix}"
+
+
+def find_shard_files(output_dir: str, filename: str, count: Optional[int] = None) -> List[Path]:
+    """
+    查找某个输出文件的分片文件，按分片编号排序
+    count: 只取分片总数为K的文件；不指定时目录中只能有一种K，否则抛出ValueError (避免混入旧运行的分片)
+    """
+    path = Path(filename)
+    pattern = re.compile(re.escape(path.stem) + r'\.shard-(\d+)-of-(\d+)' + re.escape(path.suffix))
+    shards = []
+    for shard_file in Path(output_dir).glob(f"{path.stem}.shard-*-of-*{path.suffix}"):
+        match = pattern.fullmatch(shard_file.name)
+        if match and (count is None or int(match.group(2)) == count):
+            shards.append((int(match.group(2)), int(match.group(1)), shard_file))
+
+    counts = sorted({shard_count for shard_count, _, _ in shards})
+    if len(counts) > 1:
+        raise ValueError(f"{output_dir} 中有不同分片数的 {filename} 分片文件 (K={counts})，请指定要合并的K")
+    return [shard_file for _, _, shard_file in sorted(shards)]
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+单遍统计汇总
+更新/爬取循环每产出一条选手记录就调用一次 add()，所有计数和分布在同一遍中累计，
+结束时直接输出文本报告和JSON报告，不需要再扫描一遍数据。
+"""
+import json
+import os
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from team_registry import FREE_AGENT_ID, TeamRegistry, default_team_registry, team_key
+
+# 表示"没有该信息"的取值 (两个爬虫的默认值不同)
+UNKNOWN_AGE = "未知年龄"
+UNKNOWN_ROLE = "未知位置"
+UNKNOWN_NATIONALITY = "未知国籍"
+
+
+class StatsAggregator:
+    """增量统计选手数据的完整度与分布"""
+
+    def __init__(self, team_registry: Optional[TeamRegistry] = None):
+        self.total = 0
+        self.counters: Counter = Counter()
+        self.nationalities: Counter = Counter()
+        self.roles: Counter = Counter()
+        # 按队伍ID计数，输出时才换成队伍名称；维度表中没有的队伍按规范键计数
+        self.team_registry = team_registry or default_team_registry()
+        self.team_counts: Counter = Counter()
+        self.unknown_teams: Dict[str, str] = {}
+        self.ages: Counter = Counter()
+        # 附加的运行指标 (下载量、缓存命中等)，原样写入报告
+        self.run_metrics: Dict[str, Any] = {}
+
+    def add_record(self, team: str, nationality: str, age: Any, role: str, team_id: Optional[int] = None):
+        """
+        累计一条记录 (已分配队伍ID时传入 team_id，不再查找队伍名；未分配的 -1 按队伍名查找)
+        只查找不分配：生成报告不会往共用的队伍维度表中添加队伍
+        """
+        self.total += 1
+        age = str(age)
+        if age != UNKNOWN_AGE and age:
+            self.counters['with_age'] += 1
+            self.ages[age] += 1
+        team_slot: Union[int, str] = team_id
+        if team_id is None or team_id < 0:
+            team_slot = self.team_registry.find(team)
+            if team_slot is None:
+                team_slot = team_key(team.strip())
+                self.unknown_teams.setdefault(team_slot, team.strip())
+        if team_slot != FREE_AGENT_ID:
+            self.counters['with_team'] += 1
+        if role != UNKNOWN_ROLE and role:
+            self.counters['with_role'] += 1
+        if nationality != UNKNOWN_NATIONALITY and nationality:
+            self.counters['with_nationality'] += 1
+        self.nationalities[nationality] += 1
+        self.roles[role] += 1
+        self.team_counts[team_slot] += 1
+
+    def add(self, player):
+        """累计一个 PlayerInfo (两个爬虫的 PlayerInfo 都可以)，年龄按导出时的值统计"""
+        self.add_record(player.team, player.nationality, player.current_age(), player.role, player.team_id)
+
+    def teams(self) -> Counter:
+        """{队伍名称: 人数}，通过重定向合并的队伍计入同一个规范名称"""
+        merged: Counter = Counter()
+        for team_slot, count in self.team_counts.items():
+            if isinstance(team_slot, str):
+                merged[self.unknown_teams[team_slot]] += count
+            else:
+                merged[self.team_registry.name_of(team_slot)] += count
+        return merged
+
+    def count(self, key: str, amount: int = 1):
+        """累计自定义计数 (如 refreshed / fallback / valid / invalid)"""
+        self.counters[key] += amount
+
+    def _percent(self, count: int) -> str:
+        return f"{count / self.total * 100:.1f}%" if self.total else "0.0%"
+
+    def render_text(self, title: str, summary_lines: List[str]) -> str:
+        """生成文本报告，summary_lines 为标题下方的概要行"""
+        report = f"\n{title}\n==================\n"
+        report += "\n".join(summary_lines) + "\n"
+        report += f"""
+数据完整性:
+- 有年龄信息的选手: {self.counters['with_age']} ({self._percent(self.counters['with_age'])})
+- 有队伍信息的选手: {self.counters['with_team']} ({self._percent(self.counters['with_team'])})
+- 有角色信息的选手: {self.counters['with_role']} ({self._percent(self.counters['with_role'])})
+
+国籍分布 (Top 10):
+"""
+        for nationality, count in self.nationalities.most_common(10):
+            report += f"{nationality}: {count} ({self._percent(count)})\n"
+
+        report += "\n队伍分布 (Top 10):\n"
+        for team, count in self.teams().most_common(10):
+            report += f"{team}: {count} ({self._percent(count)})\n"
+
+        report += "\n角色分布:\n"
+        for role, count in self.roles.most_common():
+            report += f"{role}: {count} ({self._percent(count)})\n"
+
+        if self.run_metrics:
+            report += "\n运行指标:\n"
+            for key, value in self.run_metrics.items():
+                if isinstance(value, dict):
+                    value = ", ".join(f"{k}={v}" for k, v in value.items())
+                report += f"- {key}: {value}\n"
+
+        return report
+
+    def to_dict(self) -> Dict[str, Any]:
+        """机器可读的报告"""
+        return {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'total': self.total,
+            'counters': dict(self.counters),
+            'distributions': {
+                'nationality': dict(self.nationalities.most_common()),
+                'team': dict(self.teams().most_common()),
+                'role': dict(self.roles.most_common()),
+                'age': dict(sorted(self.ages.items())),
+            },
+            'run_metrics': self.run_metrics,
+        }
+
+    def save(self, text_file: str, text: str, json_file: Optional[str] = None):
+        """写出文本报告，以及可选的JSON报告"""
+        Path(text_file).parent.mkdir(parents=True, exist_ok=True)
+        with open(text_file, 'w', encoding='utf-8') as f:
+            f.write(text)
+        if json_file:
+            tmp_file = Path(f"{json_file}.{os.getpid()}.tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, json_file)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+队伍维度表
+把各种写法的队伍名 ("NAVI" / "Natus Vincere"、"Team Vitality" / "Vitality" 等) 映射到同一个整数ID，
+选手记录只保存ID，按队伍分组统计时直接对整数计数。
+别名索引来自两部分: 去掉大小写/标点/通用前后缀后的规范键，以及Liquipedia的重定向。
+选手记录的ID由 assign / canonicalize 显式分配，构造记录时不会修改队伍名。
+"""
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from config import CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# ID 0 表示没有队伍 (两个爬虫分别使用 "Free Agent" 和 "自由选手")
+FREE_AGENT_ID = 0
+FREE_AGENT_NAME = "自由选手"
+NO_TEAM_NAMES = {'', 'free agent', '自由选手', '无队伍', '活跃选手', '未找到', 'none', 'tba', '-'}
+# 计算规范键时忽略的通用词 ("Team Liquid" 与 "Liquid"、"FaZe Clan" 与 "FaZe")
+TEAM_AFFIXES = {'team', 'esports', 'esport', 'gaming', 'clan', 'club'}
+
+_default_registry: Optional['TeamRegistry'] = None
+
+
+def is_free_agent(name: str) -> bool:
+    """队伍名是否表示没有队伍"""
+    name = (name or '').strip()
+    return not team_key(name) or name.casefold() in NO_TEAM_NAMES
+
+
+def team_key(name: str) -> str:
+    """队伍名的规范键：忽略大小写、空格和标点，去掉通用前后缀"""
+    words = re.findall(r'[^\W_]+', name.casefold())
+    core = [word for word in words if word not in TEAM_AFFIXES]
+    return ''.join(core or words)
+
+
+class TeamRegistry:
+    """队伍ID <-> 规范名称，以及 规范键 -> ID 的别名索引"""
+
+    def __init__(self, registry_file: Optional[str] = None):
+        if registry_file is None:
+            registry_file = os.path.join(CACHE_CONFIG['cache_dir'], CACHE_CONFIG['team_registry_file'])
+        self.registry_file = Path(registry_file)
+        self.names: List[str] = [FREE_AGENT_NAME]
+        # 通过重定向合并的队伍指向目标ID (并查集)
+        self.parent: List[int] = [FREE_AGENT_ID]
+        self.aliases: Dict[str, int] = {}
+        # 已经查询过Liquipedia重定向的ID
+        self.checked = {FREE_AGENT_ID}
+        # 名称就是Liquipedia页面标题的ID，canonicalize 只把选手的队伍名改成这些名称
+        self.titled: Set[int] = set()
+        self._load()
+
+    def _load(self):
+        if not self.registry_file.exists():
+            return
+        try:
+            with open(self.registry_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.names = data['names']
+            self.parent = data['parent']
+            self.aliases = data['aliases']
+            self.checked = set(data['checked'])
+            self.titled = set(data.get('titled', []))
+            logger.info("加载了 %s 个队伍", len(self.names) - 1)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("队伍维度表读取失败，重新建立: %s", e)
+
+    def save(self):
+        self.registry_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = Path(f"{self.registry_file}.{os.getpid()}.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'names': self.names, 'parent': self.parent, 'aliases': self.aliases,
+                       'checked': sorted(self.checked), 'titled': sorted(self.titled)}, f, ensure_ascii=False)
+        os.replace(tmp_file, self.registry_file)
+
+    def canonical(self, team_id: int) -> int:
+        while self.parent[team_id] != team_id:
+            team_id = self.parent[team_id]
+        return team_id
+
+    def team_id(self, name: str) -> int:
+        """返回队伍ID，第一次出现的队伍分配新ID"""
+        if is_free_agent(name):
+            return FREE_AGENT_ID
+        key = team_key(name.strip())
+        team_id = self.aliases.get(key)
+        if team_id is None:
+            team_id = len(self.names)
+            self.names.append(name.strip())
+            self.parent.append(team_id)
+            self.aliases[key] = team_id
+        return self.canonical(team_id)
+
+    def find(self, name: str) -> Optional[int]:
+        """查找已知队伍的ID，不分配新ID (用于查询参数等外部输入)"""
+        if is_free_agent(name):
+            return FREE_AGENT_ID
+        team_id = self.aliases.get(team_key(name.strip()))
+        return None if team_id is None else self.canonical(team_id)
+
+    def name_of(self, team_id: int) -> str:
+        return self.names[self.canonical(team_id)]
+
+    def learn_redirects(self, resolver) -> int:
+        """
+        用Liquipedia重定向合并同一支队伍的不同写法 (如 NAVI -> Natus Vincere)
+        resolver: 队伍页面专用的 TitleResolver (不与选手标题共用缓存)；返回发出的API请求数
+        """
+        pending = [team_id for team_id in range(len(self.names))
+                   if team_id not in self.checked and self.canonical(team_id) == team_id]
+        if not pending:
+            return 0
+
+        request_count = resolver.resolve(self.names[team_id] for team_id in pending)
+        merged = 0
+        for team_id in pending:
+            entry = resolver.lookup(self.names[team_id])
+            if entry is None:
+                # 请求失败，下次再试
+                continue
+            self.checked.add(team_id)
+            if entry['missing'] or entry['disambiguation']:
+                continue
+
+            title = entry['title']
+            target = self.team_id(title)
+            if target == FREE_AGENT_ID:
+                continue
+            self.checked.add(target)
+            if target != team_id:
+                self.parent[team_id] = target
+                merged += 1
+            # 以Liquipedia页面标题作为规范名称
+            self.names[target] = title
+            self.titled.add(target)
+
+        if merged:
+            logger.info("根据Liquipedia重定向合并了 %s 个队伍别名", merged)
+        return request_count
+
+    def assign(self, players: Iterable):
+        """给还没有队伍ID (team_id < 0) 的选手记录分配ID，不修改队伍名"""
+        for player in players:
+            if player.team_id < 0:
+                player.team_id = self.team_id(player.team)
+
+    def canonicalize(self, players: Iterable):
+        """
+        运行结束时统一处理：分配/合并选手记录的队伍ID，
+        队伍名只改为Liquipedia页面标题 (其他情况保留记录中原来的写法)
+        """
+        for player in players:
+            team_id = self.team_id(player.team) if player.team_id < 0 else player.team_id
+            player.team_id = self.canonical(team_id)
+            if player.team_id in self.titled:
+                player.team = self.names[player.team_id]
+
+
+def default_team_registry() -> TeamRegistry:
+    """所有爬虫共用的队伍维度表"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = TeamRegistry()
+    return _default_registry
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Liquipedia 队伍页面阵容解析
+队伍页面的阵容表 (table.roster-card) 一次列出所有现役选手的ID、国籍 (国旗) 和位置，
+按队伍刷新时一个请求即可更新整支队伍 (players_updater.py --by-team)。
+前成员 (Former) / 不活跃 (Inactive) 表以及带离队日期的表不计入现役阵容。
+"""
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sharding import normalize_title
+from team_registry import FREE_AGENT_ID
+from text_cleaning import clean_text
+
+logger = logging.getLogger(__name__)
+
+# 阵容表标题/表头中出现这些词时跳过整张表
+INACTIVE_MARKERS = ('former', 'inactive', 'leave date', 'loan')
+
+
+@dataclass
+class RosterEntry:
+    """阵容表中的一名选手"""
+    name: str  # 显示的ID
+    title: str  # 选手页面标题 (链接目标)
+    nationality: str = ""
+    role: str = ""
+
+    def infobox_fields(self, team: str) -> Dict[str, str]:
+        """转换为与选手页面信息框相同的字段，复用 PlayersUpdater.player_from_fields"""
+        fields = {'Team:': team}
+        if self.nationality:
+            fields['Nationality:'] = self.nationality
+        if self.role:
+            fields['Role:'] = self.role
+        return fields
+
+
+def _is_active_table(table) -> bool:
+    header_text = ' '.join(row.get_text(' ') for row in table.find_all('tr') if row.find('th')).lower()
+    caption = table.find('caption')
+    if caption:
+        header_text += ' ' + caption.get_text(' ').lower()
+    return not any(marker in header_text for marker in INACTIVE_MARKERS)
+
+
+def _cell_text(cell) -> str:
+    # 窄屏时显示的 "Position:" 等标签
+    for label in cell.select('.MobileStuff'):
+        label.decompose()
+    return clean_text(cell.get_text(' ')).strip('()')
+
+
+def parse_team_roster(soup) -> List[RosterEntry]:
+    """解析队伍页面中所有现役阵容表的选手"""
+    entries = []
+    seen = set()
+    for table in soup.select('table.roster-card'):
+        if not _is_active_table(table):
+            continue
+        for row in table.select('tr.Player'):
+            id_cell = row.select_one('td.ID')
+            if id_cell is None:
+                continue
+            # 国旗也是链接 (指向国家页面)，选手链接是国旗之外的第一个链接
+            link = next((a for a in id_cell.find_all('a', href=True) if not a.find_parent(class_='flag')), None)
+            if link is None:
+                continue
+            name = clean_text(link.get_text())
+            title = clean_text(link.get('title') or name)
+            if not name or normalize_title(title) in seen:
+                continue
+            seen.add(normalize_title(title))
+
+            flag = id_cell.select_one('.flag img') or id_cell.select_one('.flag a')
+            nationality = clean_text(flag.get('title') or flag.get('alt') or '') if flag else ""
+            position = row.select_one('td.Position')
+            role = _cell_text(position) if position else ""
+            entries.append(RosterEntry(name=name, title=title, nationality=nationality, role=role))
+    return entries
+
+
+def group_by_team(players: Dict[str, object], names: Iterable[str],
+                  min_players: int = 1) -> Tuple[Dict[int, List[str]], List[str]]:
+    """
+    按队伍ID分组要刷新的选手
+    返回 ({队伍ID: [选手]}, 不按队伍刷新的选手)：自由选手和跟踪人数少于 min_players 的队伍逐个刷新
+    """
+    groups: Dict[int, List[str]] = defaultdict(list)
+    individual = []
+    for name in names:
+        info = players.get(name)
+        if info is None or info.team_id == FREE_AGENT_ID:
+            individual.append(name)
+        else:
+            groups[info.team_id].append(name)
+
+    for team_id in [team_id for team_id, members in groups.items() if len(members) < min_players]:
+        individual.extend(groups.pop(team_id))
+    return dict(groups), individual
+
+
+def match_roster(entries: List[RosterEntry], name: str, title: Optional[str] = None) -> Optional[RosterEntry]:
+    """按选手名或其规范页面标题在阵容中查找 (不区分大小写)"""
+    keys = {normalize_title(name)}
+    if title:
+        keys.add(normalize_title(title))
+    for entry in entries:
+        if normalize_title(entry.title) in keys or normalize_title(entry.name) in keys:
+            return entry
+    return None
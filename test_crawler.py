@@ -249,6 +249,1509 @@ def test_csv_operations():
     
     return True
 
+def test_request_guard():
+    """测试负缓存与熔断器"""
+    logger.info("开始测试负缓存与熔断器...")
+    
+    import tempfile
+    from request_guard import NegativeCache, CircuitBreaker
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_file = os.path.join(tmp_dir, "negative_cache.json")
+        url = "https://liquipedia.net/counterstrike/NoSuchPlayer"
+        
+        cache = NegativeCache(cache_file, base_ttl=60, max_ttl=100)
+        cache.add(url)
+        cache.add(url)
+        if not cache.contains(url) or cache.entries[url]['misses'] != 2:
+            logger.error("✗ 负缓存记录失败")
+            return False
+        cache.save()
+        
+        # 重新加载后仍然有效
+        if not NegativeCache(cache_file).contains(url):
+            logger.error("✗ 负缓存持久化失败")
+            return False
+    
+    breaker = CircuitBreaker(max_failures=3, cooldown=60)
+    for _ in range(3):
+        breaker.record_failure("https://www.hltv.org/search?query=a")
+    if breaker.allow_request("https://www.hltv.org/player/1/b"):
+        logger.error("✗ 熔断器未打开")
+        return False
+    if not breaker.allow_request("https://liquipedia.net/counterstrike/s1mple"):
+        logger.error("✗ 熔断器错误地影响了其他主机")
+        return False
+    
+    # 页面存在但信息框里没有国籍：不是选手页面，但不能记入负缓存
+    from types import SimpleNamespace
+    page = ('<html><head><title>Device - Liquipedia</title></head><body><h1 class="firstHeading">Device</h1>'
+            '<div class="fo-nttax-infobox"><div class="infobox-cell-2">Team:</div><div class="infobox-cell-2">Astralis</div>'
+            '</div></body></html>').encode('utf-8')
+    crawler = CS2PlayerCrawler()
+    crawler._make_request = lambda url, **kwargs: SimpleNamespace(
+        encoding='utf-8', iter_content=lambda chunk_size: iter([page]), close=lambda: None)
+    url = "https://liquipedia.net/counterstrike/Device"
+    if crawler._fetch_player_page(url) is not None or crawler.negative_cache.contains(url):
+        logger.error("✗ 缺少国籍的页面不应记入负缓存")
+        return False
+    
+    logger.info("✓ 负缓存与熔断器测试通过")
+    return True
+
+def test_title_resolver():
+    """测试标题批量解析：分批、重定向链、缺失/消歧义标记与缓存"""
+    logger.info("开始测试标题解析...")
+    
+    import tempfile
+    from types import SimpleNamespace
+    from urllib.parse import parse_qs, urlparse
+    from title_resolver import TitleResolver, MAX_TITLES_PER_QUERY
+    
+    # R0 -> R1 -> ... -> R7 的重定向链，超过5跳后停止跟随
+    redirects = [{'from': f"R{i}", 'to': f"R{i + 1}"} for i in range(7)]
+    redirects.append({'from': "Zywoo", 'to': "ZywOo"})
+    requested = []
+    def fake_request(url):
+        titles = parse_qs(urlparse(url).query)['titles'][0].split('|')
+        requested.append(titles)
+        pages = [{'title': "ZywOo"}, {'title': "Smith", 'pageprops': {'disambiguation': ''}},
+                 {'title': "Ghost", 'missing': True}, {'title': "R5"}]
+        pages += [{'title': f"Player{i}"} for i in range(60)]
+        return SimpleNamespace(json=lambda: {'query': {
+            'normalized': [{'from': "zywoo", 'to': "Zywoo"}],
+            'redirects': redirects,
+            'pages': pages,
+        }})
+    
+    names = ["zywoo", "Smith", "Ghost", "R0"] + [f"Player{i}" for i in range(60)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_file = os.path.join(tmp_dir, "titles.json")
+        resolver = TitleResolver(fake_request, cache_file, base_url="https://liquipedia.net/counterstrike")
+        if resolver.resolve(names + ["zywoo"]) != 2 or [len(batch) for batch in requested] != [MAX_TITLES_PER_QUERY, 14]:
+            logger.error(f"✗ 标题分批错误: {[len(batch) for batch in requested]}")
+            return False
+    
+        zywoo, smith, ghost, chain = (resolver.lookup(name) for name in ["zywoo", "Smith", "Ghost", "R0"])
+        if zywoo['title'] != "ZywOo" or resolver.page_url("zywoo") != "https://liquipedia.net/counterstrike/ZywOo":
+            logger.error(f"✗ 规范化后的重定向没有跟随: {zywoo}")
+            return False
+        if chain['title'] != "R5" or chain['missing']:
+            logger.error(f"✗ 重定向链没有在5跳后停止: {chain}")
+            return False
+        if not smith['disambiguation'] or smith['missing'] or not ghost['missing']:
+            logger.error(f"✗ 缺失/消歧义标记错误: {smith}, {ghost}")
+            return False
+        if resolver.page_url("Ghost") != "https://liquipedia.net/counterstrike/Ghost":
+            logger.error("✗ 缺失页面应退回原始名字")
+            return False
+        resolver.save()
+    
+        # 重新加载后缓存仍然有效，不再发请求
+        reloaded = TitleResolver(fake_request, cache_file)
+        if reloaded.lookup("zywoo") != zywoo or reloaded.resolve(names) != 0 or len(requested) != 2:
+            logger.error("✗ 标题缓存持久化失败")
+            return False
+    
+    logger.info("✓ 标题解析测试通过")
+    return True
+
+def test_refresh_scheduler():
+    """测试刷新优先级排序、请求预算与输出顺序"""
+    logger.info("开始测试刷新调度...")
+    
+    import tempfile
+    from unittest import mock
+    import scheduler
+    from scheduler import RefreshHistory, RefreshScheduler
+    from players_updater import PlayersUpdater, PlayerInfo as UpdaterPlayerInfo
+    
+    now = 1_800_000_000
+    hour, day = 3600, 24 * 3600
+    entries = {
+        "a": {'last_refreshed': now - hour, 'refreshes': 4, 'changes': 0},
+        "c": {'last_refreshed': now - 30 * day, 'refreshes': 4, 'changes': 4},
+        "d": {'last_refreshed': now - hour, 'refreshes': 4, 'changes': 0},
+    }
+    teams = {"a": "Free Agent", "b": "Astralis", "c": "Natus Vincere", "d": "FaZe Clan"}
+    
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir, mock.patch.object(scheduler.time, 'time', lambda: now):
+        history = RefreshHistory(os.path.join(tmp_dir, "history.json"))
+        history.entries = dict(entries)
+        refresh_scheduler = RefreshScheduler(history)
+    
+        # 过期且常变化 > 从未刷新 > 刚刷新过 > 刚刷新过且没有队伍
+        if refresh_scheduler.order(teams) != ["c", "b", "d", "a"]:
+            logger.error(f"✗ 优先级排序错误: {refresh_scheduler.order(teams)}")
+            return False
+        # 不发请求的选手不占预算
+        plan = refresh_scheduler.plan(teams, budget=2, cost_func=lambda name: 0 if name == "a" else 1)
+        if plan != ["c", "b", "a"] or refresh_scheduler.plan(teams, max_players=1) != ["c"]:
+            logger.error(f"✗ 预算内挑选错误: {plan}")
+            return False
+    
+        os.chdir(tmp_dir)
+        try:
+            updater = PlayersUpdater()
+            updater._make_request = lambda url, stream=False: None
+            updater.refresh_history.entries = dict(entries)
+            existing = {name: UpdaterPlayerInfo(name=name, team=team) for name, team in teams.items()}
+    
+            # 4个标题待解析，预算3中先扣除1次标题API请求
+            if updater.plan_refresh(existing, budget=3) != ["c", "b"]:
+                logger.error(f"✗ 标题解析请求没有计入预算: {updater.plan_refresh(existing, budget=3)}")
+                return False
+    
+            # 按优先级刷新，输出仍保持原CSV顺序
+            updater.title_resolver.resolve = lambda names: 0
+            updater.refresh_player = lambda name, old_info: old_info
+            updated = updater.update_players_info(existing, max_players=2)
+        finally:
+            os.chdir(cwd)
+    
+    if [player.name for player in updated] != ["b", "c"]:
+        logger.error(f"✗ 输出没有保持原CSV顺序: {[player.name for player in updated]}")
+        return False
+    
+    # 预算是请求数的硬上限：首段抓取失败退回完整页面时，第二个请求同样计入预算
+    import io
+    import requests
+    
+    class StubScraper:
+        def __init__(self):
+            self.cookies = requests.cookies.RequestsCookieJar()
+            self.urls = []
+        def get(self, url, **kwargs):
+            self.urls.append(url)
+            response = requests.Response()
+            response.status_code = 200
+            response.encoding = 'utf-8'
+            body = '<html>Service unavailable</html>' if 'api.php' in url else (
+                '<html><head><title>Liquipedia</title></head><body><div class="infobox-cell-2">Nationality:</div>'
+                '<div class="infobox-cell-2">Ukraine</div></body></html>')
+            response.raw = io.BytesIO(body.encode('utf-8'))
+            return response
+    
+    with tempfile.TemporaryDirectory() as tmp_dir, mock.patch.object(scheduler.time, 'time', lambda: now):
+        os.chdir(tmp_dir)
+        try:
+            updater = PlayersUpdater(lean_fetch=True)
+            updater.min_delay = 0
+            updater.scraper = StubScraper()
+            updater.title_resolver.resolve = lambda names: 0
+            updater.refresh_history.entries = dict(entries)
+            existing = {name: UpdaterPlayerInfo(name=name, team=team) for name, team in teams.items()}
+            budgeted = updater.update_players_info(existing, budget=3)
+        finally:
+            os.chdir(cwd)
+    
+    fallback_urls = [url for url in updater.scraper.urls if 'api.php' not in url]
+    if updater.request_count > 3 or not fallback_urls:
+        logger.error(f"✗ 预算模式发送了 {updater.request_count} 个请求: {updater.scraper.urls}")
+        return False
+    if len(budgeted) != len(teams):
+        logger.error("✗ 预算用完后没有输出完整名单")
+        return False
+    
+    logger.info("✓ 刷新调度测试通过")
+    return True
+
+def test_sharding():
+    """测试分片分配、分片参数解析与分片合并"""
+    logger.info("开始测试分片爬取...")
+    
+    import argparse
+    import csv
+    import tempfile
+    from optimized_crawler import merge_shards
+    from sharding import find_shard_files, parse_shard_spec, shard_filename, shard_of
+    
+    # 与进程和哈希种子无关的固定结果，不同写法落在同一分片
+    if shard_of("s1mple", 4) != 1 or shard_of(" S1mple ", 4) != 1 or shard_of("Natus Vincere", 7) != 3:
+        logger.error("✗ 分片分配不是确定性的")
+        return False
+    # 页面链接末尾 (百分号编码、下划线) 与原始姓名落在同一分片
+    if any(shard_of(encoded, 7) != shard_of(name, 7)
+           for encoded, name in [("Ex%C3%B6", "Exö"), ("Natus_Vincere", "Natus Vincere"), ("S1mple", "s1mple")]):
+        logger.error("✗ 链接与姓名的分片键不一致")
+        return False
+    titles = [f"Player{i}" for i in range(200)]
+    counts = [sum(shard_of(title, 4) == index for title in titles) for index in range(4)]
+    if sum(counts) != len(titles) or min(counts) == 0:
+        logger.error(f"✗ 分片没有覆盖所有选手: {counts}")
+        return False
+    
+    if parse_shard_spec(" 2 / 3 ") != (2, 3):
+        logger.error("✗ 分片参数解析错误")
+        return False
+    for spec in ["3/3", "0/0", "-1/3", "1of3"]:
+        try:
+            parse_shard_spec(spec)
+        except argparse.ArgumentTypeError:
+            continue
+        logger.error(f"✗ 非法分片参数没有报错: {spec}")
+        return False
+    
+    filename = OUTPUT_CONFIG['filename']
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            crawler = CS2PlayerCrawler()
+            crawler.save_to_csv([PlayerInfo(name="b", team="Astralis", source="Liquipedia"),
+                                 PlayerInfo(name="a", source="Liquipedia")], shard_filename(filename, 0, 2))
+            crawler.save_to_csv([PlayerInfo(name="b", nationality="Denmark", source="HLTV")],
+                                shard_filename(filename, 1, 2))
+            crawler.save_to_csv([PlayerInfo(name="z")], "other.shard-0-of-2.csv")
+            # 上一次 K=3 运行留下的分片：不指定K时拒绝合并，指定K时忽略
+            crawler.save_to_csv([PlayerInfo(name="stale", source="Liquipedia")], shard_filename(filename, 2, 3))
+            try:
+                find_shard_files("output", filename)
+                mixed_rejected = False
+            except ValueError:
+                mixed_rejected = True
+    
+            shard_files = [path.name for path in find_shard_files("output", filename, 2)]
+            merge_shards(filename, 2)
+            with open(Path("output") / filename, 'r', encoding='utf-8') as file:
+                rows = list(csv.DictReader(file))
+        finally:
+            os.chdir(cwd)
+    
+    if not mixed_rejected:
+        logger.error("✗ 不同分片数的文件混在一起时没有拒绝合并")
+        return False
+    if shard_files != [shard_filename(filename, 0, 2), shard_filename(filename, 1, 2)]:
+        logger.error(f"✗ 分片文件查找错误: {shard_files}")
+        return False
+    if [(row['姓名'], row['队伍'], row['国籍']) for row in rows] != [("a", "自由选手", "未知国籍"), ("b", "Astralis", "Denmark")]:
+        logger.error(f"✗ 分片合并结果错误: {rows}")
+        return False
+    
+    logger.info("✓ 分片爬取测试通过")
+    return True
+
+def _run_shard_worker(args):
+    """多进程分片测试的子进程：按地区列表和姓名两条路径抓取本分片的选手，写出分片文件"""
+    from sharding import shard_filename
+    
+    index, count, base_url, names = args
+    crawler = CS2PlayerCrawler((index, count), f"{base_url}/counterstrike", f"{base_url}/hltv")
+    crawler.min_delay = 0
+    by_region = crawler.crawl_liquipedia_by_region()
+    by_name = crawler._process_player_names(names, "Famous")
+    crawler.save_to_csv(crawler.merge_and_deduplicate([by_region, by_name]),
+                        shard_filename(OUTPUT_CONFIG['filename'], index, count))
+    return [player.name for player in by_region], [player.name for player in by_name]
+
+def test_shard_workers():
+    """测试多进程分片：K个进程对替身服务器抓取同一份名单，输出互不重叠且合并后完整"""
+    logger.info("开始测试多进程分片...")
+    
+    import csv
+    import multiprocessing
+    import tempfile
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import quote, unquote, urlparse
+    from optimized_crawler import merge_shards
+    from sharding import normalize_title
+    
+    names = ["s1mple", "ZywOo", "Exö", "m0NESY", "b1t?"] + [f"Player{i}" for i in range(19)]
+    pages = {normalize_title(name): name for name in names}
+    table = ''.join(f'<tr><td><a href="/counterstrike/{quote(name)}">{name}</a></td></tr>' for name in names)
+    
+    class StandInHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = unquote(urlparse(self.path).path)
+            title = path.rsplit('/', 1)[-1]
+            if path.startswith('/counterstrike/Portal:Players/'):
+                body = f'<html><body><table class="wikitable">{table}</table></body></html>'
+            elif path.startswith('/counterstrike/') and normalize_title(title) in pages:
+                name = pages[normalize_title(title)]
+                body = (f'<html><head><title>{name} - Liquipedia</title></head><body>'
+                        f'<h1 class="firstHeading">{name}</h1><div class="fo-nttax-infobox">'
+                        '<div class="infobox-cell-2">Nationality:</div><div class="infobox-cell-2">Denmark</div>'
+                        '</div></body></html>')
+            else:
+                self.send_error(404)
+                return
+            data = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+    
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    
+    count = 3
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            with multiprocessing.get_context('spawn').Pool(count) as pool:
+                results = pool.map(_run_shard_worker, [(index, count, base_url, names) for index in range(count)])
+            merge_shards(OUTPUT_CONFIG['filename'], count)
+            with open(Path("output") / OUTPUT_CONFIG['filename'], 'r', encoding='utf-8') as file:
+                merged = [row['姓名'] for row in csv.DictReader(file)]
+        finally:
+            os.chdir(cwd)
+            server.shutdown()
+            server.server_close()
+    
+    # 同一进程中两条路径按同一个键分片
+    for index, (by_region, by_name) in enumerate(results):
+        if set(by_region) != set(by_name):
+            logger.error(f"✗ 分片 {index} 中链接与姓名分到的选手不一致: {by_region} != {by_name}")
+            return False
+    shards = [set(by_name) for _, by_name in results]
+    if sum(len(shard) for shard in shards) != len(names) or set().union(*shards) != set(names):
+        logger.error(f"✗ 各分片有重叠或遗漏: {shards}")
+        return False
+    if sorted(merged) != sorted(names):
+        logger.error(f"✗ 合并结果不完整: {merged}")
+        return False
+    
+    logger.info(f"✓ 多进程分片测试通过: {[len(shard) for shard in shards]}")
+    return True
+
+def test_lead_section():
+    """测试首段API抓取、退回完整页面与下载量统计"""
+    logger.info("开始测试首段抓取...")
+    
+    import json
+    import tempfile
+    from types import SimpleNamespace
+    from download_stats import DownloadStats
+    from players_updater import PlayersUpdater
+    
+    cells = ''.join(
+        f'<div class="infobox-cell-2 infobox-description">{label}</div><div class="infobox-cell-2">{value}</div>'
+        for label, value in [('Nationality:', 'Ukraine'), ('Team:', 'Natus Vincere'), ('Role:', 'AWPer')])
+    infobox_html = f'<div class="fo-nttax-infobox">{cells}</div>'
+    page = f'<html><head><title>s1mple - Liquipedia</title></head><body>{infobox_html}</body></html>'.encode('utf-8')
+    url = "https://liquipedia.net/counterstrike/S1mple"
+    
+    api_body = {}
+    requested = []
+    def fake_request(request_url, stream=False):
+        requested.append(request_url)
+        if 'api.php' not in request_url:
+            return SimpleNamespace(encoding='utf-8', iter_content=lambda chunk_size: iter([page]), close=lambda: None)
+        body = api_body['text'].encode('utf-8')
+        return SimpleNamespace(content=body, json=lambda: json.loads(body))
+    
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            updater = PlayersUpdater(lean_fetch=True)
+            updater._make_request = fake_request
+            updater.title_resolver.entries["s1mple"] = {
+                'title': "S1mple", 'missing': False, 'disambiguation': False, 'resolved_at': time.time()}
+            results = {}
+            for version, text in [('2', json.dumps({'parse': {'text': infobox_html}})),
+                                  ('1', json.dumps({'parse': {'text': {'*': infobox_html}}}))]:
+                api_body['text'] = text
+                results[version] = updater._fetch_lead_section("s1mple", url)
+    
+            # 无效响应退回完整页面；页面不存在时不再重试并记入负缓存
+            api_body['text'] = '<html>Service unavailable</html>'
+            fallback = updater._fetch_infobox_fields("s1mple", url)
+            api_body['text'] = json.dumps({'error': {'code': 'missingtitle', 'info': "The page doesn't exist."}})
+            missing = updater._fetch_lead_section("Ghost", "https://liquipedia.net/counterstrike/Ghost")
+            # 首段请求直接使用解析后的标题，非ASCII和 '?' 由 urlencode 编码
+            encoded_url = updater._lead_section_url("Exö?")
+            stats = updater.download_stats
+        finally:
+            os.chdir(cwd)
+    
+    if 'section=0' not in requested[0] or 'formatversion=2' not in requested[0] or 'page=S1mple' not in requested[0]:
+        logger.error(f"✗ 首段请求参数错误: {requested[0]}")
+        return False
+    if 'page=Ex%C3%B6%3F&' not in encoded_url:
+        logger.error(f"✗ 首段请求标题编码错误: {encoded_url}")
+        return False
+    for version, (fields, retry_full) in results.items():
+        if retry_full or not fields or fields.get('Team:') != 'Natus Vincere':
+            logger.error(f"✗ formatversion={version} 的首段解析错误: {fields}")
+            return False
+    if not fallback or fallback.get('Nationality:') != 'Ukraine' or requested[-2] != url:
+        logger.error(f"✗ 首段无效时没有退回完整页面: {fallback}")
+        return False
+    if missing != (None, False) or not updater.negative_cache.contains("https://liquipedia.net/counterstrike/Ghost"):
+        logger.error(f"✗ 缺失页面处理错误: {missing}")
+        return False
+    if stats.requests.get('lean') != 4 or stats.requests.get('stream') != 1:
+        logger.error(f"✗ 下载量没有按抓取方式统计: {stats.requests}")
+        return False
+    
+    # 节省量 = 精简请求数 x 完整页面平均大小 - 精简下载量，平均大小跨运行保存
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        stats_file = os.path.join(tmp_dir, "download_stats.json")
+        stats = DownloadStats(stats_file)
+        stats.record('full', 1000)
+        stats.record('full', 3000)
+        stats.record('lean', 300)
+        stats.record('lean', 100)
+        if stats.full_page_avg != 2000 or stats.bytes_saved != 3600 or stats.total_bytes != 4400:
+            logger.error(f"✗ 下载量估算错误: {stats.to_dict()}")
+            return False
+        stats.save()
+        reloaded = DownloadStats(stats_file)
+        if reloaded.full_page_avg != 2000 or reloaded.full_page_samples != 2:
+            logger.error("✗ 完整页面平均大小没有保存")
+            return False
+    
+    logger.info("✓ 首段抓取测试通过")
+    return True
+
+def test_hltv_stats_parser():
+    """测试HLTV统计表流式解析"""
+    logger.info("开始测试HLTV统计表解析...")
+    
+    from hltv_stats import HLTVStatsTable, StatsTableParser
+    
+    html = (
+        '<table class="stats-table player-ratings-table"><thead><tr>'
+        '<th>Player</th><th class="teamCol">Team</th><th>Maps</th><th>Rounds</th>'
+        '<th>K-D Diff</th><th>K/D</th><th>Rating2.0</th></tr></thead><tbody>'
+        '<tr><td><img class="flag" alt="Ukraine"><a href="/stats/players/7998/s1mple">s1mple</a></td>'
+        '<td class="teamCol" data-sort="Natus Vincere"></td><td>1,234</td><td>32000</td>'
+        '<td>+1234</td><td>1.33</td><td>1.25</td></tr>'
+        '<tr><td><img class="flag" alt="France"><a href="/stats/players/11893/zywoo">ZywOo</a></td>'
+        '<td class="teamCol"><img alt="Vitality"></td><td>900</td><td>24000</td>'
+        '<td>-5</td><td>1.40</td><td>1.30</td></tr></tbody></table>'
+    )
+    
+    table = HLTVStatsTable()
+    parser = StatsTableParser(table.append)
+    # 分块喂入，模拟流式下载
+    for i in range(0, len(html), 50):
+        parser.feed(html[i:i + 50])
+    parser.close()
+    
+    if table.names != ['s1mple', 'ZywOo'] or table.maps[0] != 1234 or table.kd_diff[1] != -5:
+        logger.error(f"✗ 统计表解析错误: {table.names}")
+        return False
+    if table.filter_names(min_rating=1.28) != ['ZywOo']:
+        logger.error("✗ 统计筛选错误")
+        return False
+    
+    # 第二页读取中途断开：结束分页，之前各页和本页已解析的行都保留
+    import requests
+    from types import SimpleNamespace
+    from hltv_stats import HLTVStatsIngestor
+    
+    second_row = html.index('<tr>', html.index('<tbody>') + len('<tbody><tr>'))
+    def fake_request(url, stream=False):
+        def chunks(chunk_size):
+            if 'start=0' in url:
+                yield html.encode('utf-8')
+                return
+            page = html.replace('7998/s1mple">s1mple', '7592/device">dev1ce')
+            yield page[:second_row].encode('utf-8')
+            raise requests.exceptions.ChunkedEncodingError("Connection reset by peer")
+        return SimpleNamespace(encoding='utf-8', iter_content=chunks, close=lambda: None)
+    
+    ingested = HLTVStatsIngestor(fake_request, stats_url="https://www.hltv.org/stats/players", page_size=2).ingest(6)
+    if ingested.names != ['s1mple', 'ZywOo', 'dev1ce']:
+        logger.error(f"✗ 读取中断时丢失了已抓取的行: {ingested.names}")
+        return False
+    
+    logger.info(f"✓ 统计表解析成功: {table.names} {table.teams}")
+    return True
+
+def test_infobox_stream():
+    """测试流式信息框解析与BeautifulSoup提取结果一致"""
+    logger.info("开始测试流式信息框解析...")
+    
+    from bs4 import BeautifulSoup
+    from infobox import InfoboxStreamParser, extract_infobox_fields
+    
+    cells = ''.join(
+        f'<div class="infobox-cell-2 infobox-description">{label}</div>'
+        f'<div class="infobox-cell-2"><a href="/x">{value}</a></div>'
+        for label, value in [('Nationality:', 'Ukraine'), ('Born:', 'October 2, 1997 (age 28)'),
+                             ('Team:', 'Natus Vincere'), ('Role:', 'AWPer')]
+    )
+    html = (
+        '<html><head><title>s1mple - Liquipedia</title></head><body>'
+        '<h1 class="firstHeading">s1mple</h1>'
+        f'<div class="fo-nttax-infobox">{cells}</div>'
+        + '<p>match history</p>' * 1000 + '</body></html>'
+    )
+    
+    parser = InfoboxStreamParser()
+    fed = 0
+    for i in range(0, len(html), 64):
+        parser.feed(html[i:i + 64])
+        fed = i + 64
+        if parser.done:
+            break
+    
+    expected = extract_infobox_fields(BeautifulSoup(html, 'html.parser'))
+    if parser.fields != expected or parser.heading != 's1mple':
+        logger.error(f"✗ 流式解析结果不一致: {parser.fields} != {expected}")
+        return False
+    if fed >= len(html):
+        logger.error("✗ 信息框读完后没有提前结束")
+        return False
+    
+    # 读取中途连接重置：不抛出异常，调用方按请求失败处理，保留旧数据且不记入负缓存
+    import tempfile
+    from types import SimpleNamespace
+    import requests
+    from infobox import read_infobox_stream
+    from players_updater import PlayersUpdater
+    
+    def reset_response():
+        def chunks(chunk_size):
+            yield html[:200].encode('utf-8')
+            raise requests.exceptions.ChunkedEncodingError("Connection reset by peer")
+        closed = []
+        return SimpleNamespace(encoding='utf-8', iter_content=chunks, close=lambda: closed.append(True)), closed
+    
+    response, closed = reset_response()
+    broken, _ = read_infobox_stream(response)
+    if not isinstance(broken.error, requests.exceptions.ChunkedEncodingError) or not closed:
+        logger.error(f"✗ 读取中断没有被记录或连接没有关闭: {broken.error}")
+        return False
+    
+    url = "https://liquipedia.net/counterstrike/S1mple"
+    crawler = CS2PlayerCrawler()
+    crawler._make_request = lambda url, **kwargs: reset_response()[0]
+    if crawler._fetch_player_page(url) is not None or crawler.negative_cache.contains(url):
+        logger.error("✗ 爬虫没有把读取中断当作请求失败")
+        return False
+    if crawler.circuit_breaker.failures.get("liquipedia.net") != 1:
+        logger.error(f"✗ 读取中断没有计入熔断: {crawler.circuit_breaker.failures}")
+        return False
+    
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            updater = PlayersUpdater()
+            updater._make_request = lambda url, stream=False: reset_response()[0]
+            fields = updater._stream_full_page("s1mple", url)
+        finally:
+            os.chdir(cwd)
+    if fields is not None or updater.circuit_breaker.failures.get("liquipedia.net") != 1:
+        logger.error(f"✗ 更新器没有把读取中断当作请求失败: {fields}")
+        return False
+    
+    logger.info(f"✓ 流式解析成功，只读取了 {fed}/{len(html)} 个字符")
+    return True
+
+def test_stats_aggregator():
+    """测试单遍统计与验证报告复用批量验证结果"""
+    logger.info("开始测试统计汇总...")
+    
+    from stats_aggregator import StatsAggregator
+    from data_validator import DataValidator
+    from optimized_crawler import PlayerInfo
+    
+    stats = StatsAggregator()
+    for player in [
+        PlayerInfo(name="s1mple", team="Natus Vincere", nationality="Ukraine", age="26", role="AWPer"),
+        PlayerInfo(name="ZywOo", team="自由选手", nationality="France", age="未知年龄", role="AWPer"),
+    ]:
+        stats.add(player)
+    data = stats.to_dict()
+    if (stats.counters['with_age'], stats.counters['with_team']) != (1, 1) or data['distributions']['role'] != {'AWPer': 2}:
+        logger.error(f"✗ 统计结果错误: {data}")
+        return False
+    
+    validator = DataValidator()
+    players = [{'name': 's1mple', 'team': 'NAVI', 'nationality': 'Ukraine', 'age': '26', 'role': 'AWPer'}]
+    validated_stats = StatsAggregator()
+    validator.batch_validate(players, stats=validated_stats)
+    if validator.generate_validation_report(stats=validated_stats) != validator.generate_validation_report(players):
+        logger.error("✗ 复用批量验证统计的报告与单独生成的不一致")
+        return False
+    
+    # 未分配ID的记录只在维度表中查找，不往维度表里添加队伍；未知队伍按规范键合并计数
+    import tempfile
+    from team_registry import TeamRegistry
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        registry = TeamRegistry(os.path.join(tmp_dir, "teams.json"))
+        known = registry.team_id("Natus Vincere")
+        local_stats = StatsAggregator(registry)
+        for team in ["Natus Vincere", "Team Spirit", "Spirit", "自由选手"]:
+            local_stats.add_record(team, "Russia", 20, "Rifler")
+    if len(registry.names) != known + 1 or local_stats.teams() != {"Natus Vincere": 1, "Team Spirit": 2, "自由选手": 1}:
+        logger.error(f"✗ 统计修改了队伍维度表或计数错误: {registry.names} {local_stats.teams()}")
+        return False
+    if local_stats.counters['with_team'] != 3:
+        logger.error(f"✗ 有队伍的选手计数错误: {local_stats.counters}")
+        return False
+    
+    logger.info("✓ 统计汇总测试通过")
+    return True
+
+def test_birth_dates():
+    """测试出生日期解析与按日期计算年龄"""
+    logger.info("开始测试出生日期解析...")
+    
+    from datetime import date
+    from birth_dates import parse_birth_date, age_on
+    
+    cases = {
+        "October 2, 1997 (age 28)": "1997-10-02",
+        "2 October 1997": "1997-10-02",
+        "1997-10-02": "1997-10-02",
+        "1997年10月2日": "1997-10-02",
+        "10/02/1997": "1997-10-02",
+        "Born 1995": "1995",
+        "Invalid date": "",
+    }
+    for text, expected in cases.items():
+        if parse_birth_date(text) != expected:
+            logger.error(f"✗ 出生日期解析错误: '{text}' -> '{parse_birth_date(text)}'")
+            return False
+    
+    # 生日前后年龄变化，无需重新抓取
+    if age_on("1997-10-02", date(2025, 10, 1)) != 27 or age_on("1997-10-02", date(2025, 10, 2)) != 28:
+        logger.error("✗ 生日前后年龄计算错误")
+        return False
+    
+    logger.info("✓ 出生日期解析测试通过")
+    return True
+
+def test_csv_loader():
+    """测试自动识别编码与表头写法的CSV加载"""
+    logger.info("开始测试CSV批量加载...")
+    
+    import tempfile
+    from csv_loader import SNIFF_BLOCK_SIZE, iter_records, load_records
+    from players_updater import PlayerInfo
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gbk_file = Path(tmp_dir) / "gbk.csv"
+        gbk_file.write_bytes("选手,战队,国家,年龄\ns1mple,无队伍,乌克兰,28\n,空名字,,\n".encode('gbk'))
+        players = load_records(gbk_file, PlayerInfo)
+    
+        # 开头是UTF-8，识别编码的数据块之后追加了GBK内容：逐行读取时该行改用后备编码
+        mixed_file = Path(tmp_dir) / "mixed.csv"
+        rows = "姓名,队伍\n" + "".join(f"Player{i},Astralis\n" for i in range(SNIFF_BLOCK_SIZE // 16))
+        mixed_file.write_bytes(rows.encode('utf-8') + "donk,无队伍\n".encode('gbk'))
+        streamed = list(iter_records(mixed_file, PlayerInfo))
+    
+    if len(streamed) != SNIFF_BLOCK_SIZE // 16 + 1 or streamed[-1].team != "无队伍":
+        logger.error(f"✗ 后面追加的GBK内容读取错误: {streamed[-1:]}")
+        return False
+    
+    if len(players) != 1 or players[0].nationality != "乌克兰" or players[0].team != "无队伍":
+        logger.error(f"✗ GBK文件读取错误: {players}")
+        return False
+    if players[0].role != "未知位置":
+        logger.error("✗ 缺失的列没有使用默认值")
+        return False
+    
+    logger.info("✓ CSV批量加载测试通过")
+    return True
+
+def test_cookie_store():
+    """测试验证Cookie的保存/加载、会话Cookie过期与403后重新验证"""
+    logger.info("开始测试Cookie持久化...")
+    
+    import io
+    import tempfile
+    from datetime import timedelta
+    import requests
+    from requests.cookies import RequestsCookieJar, create_cookie
+    from cookie_store import CookieStore
+    from players_updater import PlayersUpdater
+    
+    def make_jar():
+        jar = RequestsCookieJar()
+        jar.set_cookie(create_cookie('cf_clearance', 'abc', domain='.liquipedia.net', expires=int(time.time()) + 3600))
+        jar.set_cookie(create_cookie('__cf_bm', 'xyz', domain='.liquipedia.net'))
+        return jar
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cookie_file = os.path.join(tmp_dir, "cookies.lwp")
+        CookieStore(cookie_file, session_cookie_ttl=600).save(make_jar())
+        loaded = RequestsCookieJar()
+        if CookieStore(cookie_file).load_into(loaded) != 2 or loaded.get('cf_clearance') != 'abc':
+            logger.error(f"✗ Cookie保存/加载失败: {loaded}")
+            return False
+    
+        # 会话Cookie超过保留时间后不再加载
+        CookieStore(cookie_file, session_cookie_ttl=-1).save(make_jar())
+        loaded = RequestsCookieJar()
+        if CookieStore(cookie_file).load_into(loaded) != 1 or '__cf_bm' in loaded:
+            logger.error("✗ 过期的会话Cookie仍被加载")
+            return False
+    
+        CookieStore(cookie_file).clear(loaded)
+        if len(loaded) or os.path.exists(cookie_file):
+            logger.error("✗ clear() 没有清除Cookie")
+            return False
+    
+    class StubScraper:
+        def __init__(self, status_codes):
+            self.status_codes = list(status_codes)
+            self.cookies = RequestsCookieJar()
+            self.calls = 0
+        def get(self, url, **kwargs):
+            self.calls += 1
+            response = requests.Response()
+            response.status_code = self.status_codes.pop(0)
+            response._content = b''
+            response.raw = io.BytesIO()
+            response.elapsed = timedelta(0)
+            return response
+    
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            updater = PlayersUpdater()
+            updater.min_delay = 0
+            # 带着复用的Cookie得到403：清除Cookie，换新的 scraper 重试一次
+            stale = StubScraper([403, 403])
+            stale.cookies.update(make_jar())
+            updater.cookie_store.save(stale.cookies)
+            updater.scraper = stale
+            fresh = StubScraper([200])
+            updater._create_scraper = lambda: fresh
+            response = updater._make_request("https://liquipedia.net/counterstrike/S1mple")
+            cookie_left = updater.cookie_store.cookie_file.exists()
+        finally:
+            os.chdir(cwd)
+    
+    if response is None or response.status_code != 200 or stale.calls != 1 or fresh.calls != 1:
+        logger.error(f"✗ 403后没有重新验证并重试一次: {stale.calls}, {fresh.calls}")
+        return False
+    if len(stale.cookies) or cookie_left:
+        logger.error("✗ 403后没有清除失效的Cookie")
+        return False
+    
+    logger.info("✓ Cookie持久化测试通过")
+    return True
+
+def test_fetch_plan():
+    """测试抓取计划的状态统计、按主机汇总与耗时估算"""
+    logger.info("开始测试抓取计划...")
+    
+    import tempfile
+    from fetch_plan import FetchPlan
+    
+    plan = FetchPlan(lambda i: 0.0 if i == 0 else 1.0, latency=0.5)
+    for i in range(3):
+        plan.add(f"https://liquipedia.net/counterstrike/Player{i}", f"Player{i}")
+    plan.add("https://liquipedia.net/counterstrike/Ghost", "Ghost", 'cached', "已知缺失页面")
+    plan.add("https://www.hltv.org/search?query=Ghost", "Ghost (HLTV搜索)", 'conditional')
+    plan.add("https://www.hltv.org/search?query=Smith", "Smith (HLTV搜索)", 'skipped', "消歧义页面")
+    
+    hosts = plan.by_host()
+    if dict(hosts['liquipedia.net']) != {'fetch': 3, 'cached': 1} or dict(hosts['www.hltv.org']) != {'conditional': 1, 'skipped': 1}:
+        logger.error(f"✗ 按主机汇总错误: {hosts}")
+        return False
+    # 第一个请求只算单次耗时，之后每个请求取 max(间隔, 单次耗时)
+    if plan.estimate_seconds() != 2.5 or plan.estimate_seconds(include_conditional=True) != 3.5:
+        logger.error(f"✗ 耗时估算错误: {plan.estimate_seconds()}, {plan.estimate_seconds(include_conditional=True)}")
+        return False
+    if "确定发送的请求: 3，最多: 4" not in plan.render(list_urls=False):
+        logger.error("✗ 计划汇总错误")
+        return False
+    
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            crawler = CS2PlayerCrawler()
+            crawler_plan = crawler.build_fetch_plan()
+        finally:
+            os.chdir(cwd)
+    
+    # 爬虫的请求间隔：每50个请求增加0.1秒，最多2秒，--plan 与实际频率控制使用同一个函数
+    if [crawler_plan.delay_func(i) for i in (0, 1, 50, 51, 1000)] != [0.0, 1.1, 1.1, 1.2, 2.0]:
+        logger.error("✗ 抓取计划的请求间隔与频率控制不一致")
+        return False
+    famous = DATA_SOURCES['famous_players']['players']
+    planned = {request.purpose for request in crawler_plan.requests}
+    if not set(famous) <= planned:
+        logger.error(f"✗ 抓取计划缺少知名选手: {set(famous) - planned}")
+        return False
+    
+    logger.info("✓ 抓取计划测试通过")
+    return True
+
+def test_role_database():
+    """测试本地角色库的大小写无关查找、别名与热加载"""
+    logger.info("开始测试本地角色库...")
+    
+    import json
+    import tempfile
+    from role_database import RoleDatabase
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_file = Path(tmp_dir) / "roles.json"
+        db_file.write_text(json.dumps({"players": {"dev1ce": "AWPer"}, "aliases": {"device": "dev1ce"}}),
+                           encoding='utf-8')
+        database = RoleDatabase(str(db_file), check_interval=0)
+        if database.lookup("Dev1ce") != "AWPer" or database.lookup("device") != "AWPer":
+            logger.error("✗ 大小写/别名查找失败")
+            return False
+        
+        db_file.write_text(json.dumps({"players": {"dev1ce": "Rifler"}}), encoding='utf-8')
+        os.utime(db_file, (time.time() + 10, time.time() + 10))
+        if database.lookup("DEV1CE") != "Rifler" or database.lookup("unknown") is not None:
+            logger.error("✗ 角色库修改后没有重新加载")
+            return False
+    
+    if (database.hits, database.misses) != (3, 1):
+        logger.error(f"✗ 命中统计错误: {database.stats()}")
+        return False
+    
+    logger.info("✓ 本地角色库测试通过")
+    return True
+
+def test_team_registry():
+    """测试队伍名规范化、重定向合并与按ID分组统计"""
+    logger.info("开始测试队伍维度表...")
+    
+    import tempfile
+    from team_registry import TeamRegistry, FREE_AGENT_ID
+    from stats_aggregator import StatsAggregator
+    from players_updater import PlayerInfo as UpdaterPlayerInfo
+    
+    class RedirectResolver:
+        """只返回固定重定向结果的标题解析器 (其他队伍视为请求失败)"""
+        redirects = {'NAVI': 'Natus Vincere'}
+        
+        def resolve(self, names):
+            list(names)
+            return 1
+        
+        def lookup(self, name):
+            if name not in self.redirects:
+                return None
+            return {'title': self.redirects[name], 'missing': False, 'disambiguation': False}
+    
+    # 选手记录是普通的值对象：构造时不分配ID，也不改写队伍名
+    players = [UpdaterPlayerInfo(name="x", team="NAVI"), UpdaterPlayerInfo(name="y", team="vitality")]
+    if [(p.team, p.team_id) for p in players] != [("NAVI", -1), ("vitality", -1)]:
+        logger.error(f"✗ 构造选手记录时修改了队伍: {players}")
+        return False
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        registry = TeamRegistry(str(Path(tmp_dir) / "teams.json"))
+        if registry.team_id("Team Vitality") != registry.team_id("vitality"):
+            logger.error("✗ 同一队伍的不同写法得到了不同ID")
+            return False
+        if registry.team_id("Free Agent") != FREE_AGENT_ID or registry.team_id("自由选手") != FREE_AGENT_ID:
+            logger.error("✗ 没有队伍的写法没有映射到ID 0")
+            return False
+        
+        navi, natus = registry.team_id("NAVI"), registry.team_id("Natus Vincere")
+        stats = StatsAggregator(registry)
+        for team_id in (navi, natus, FREE_AGENT_ID):
+            stats.add_record("", "Ukraine", "25", "AWPer", team_id=team_id)
+        registry.learn_redirects(RedirectResolver())
+        if registry.team_id("NAVI") != natus or stats.teams()["Natus Vincere"] != 2:
+            logger.error(f"✗ 重定向合并失败: {stats.teams()}")
+            return False
+        
+        # 运行结束时统一规范化：只改为Liquipedia页面标题，其他队伍保留原来的写法
+        registry.canonicalize(players)
+        if [(p.team, p.team_id) for p in players] != [("Natus Vincere", natus), ("vitality", registry.team_id("Team Vitality"))]:
+            logger.error(f"✗ 队伍规范化错误: {players}")
+            return False
+        
+        registry.save()
+        if TeamRegistry(str(Path(tmp_dir) / "teams.json")).name_of(navi) != "Natus Vincere":
+            logger.error("✗ 队伍维度表保存/加载失败")
+            return False
+    
+    logger.info("✓ 队伍维度表测试通过")
+    return True
+
+def test_player_api():
+    """测试只读数据服务的查询、ETag/304 与快照替换"""
+    logger.info("开始测试只读数据服务...")
+    
+    import json
+    import tempfile
+    import threading
+    import urllib.error
+    import urllib.request
+    from player_api import PlayerStore, create_server
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot = Path(tmp_dir) / "updated_players.csv"
+        snapshot.write_text("姓名,队伍,国籍,年龄,游戏内位置\ns1mple,Natus Vincere,Ukraine,26,AWPer\n"
+                            "ZywOo,Team Vitality,France,24,AWPer\n", encoding='utf-8')
+        store = PlayerStore(str(snapshot))
+        store.reload()
+        server = create_server(store, '127.0.0.1', 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        
+        try:
+            with urllib.request.urlopen(f"{base_url}/players?role=awper&nationality=france") as response:
+                data = json.load(response)
+                etag = response.headers['ETag']
+            if [p['name'] for p in data['players']] != ['ZywOo']:
+                logger.error(f"✗ 筛选结果错误: {data}")
+                return False
+            
+            # 负数的 offset/limit 会变成从末尾开始的切片，应拒绝
+            for query in ["offset=-1", "limit=-1"]:
+                try:
+                    urllib.request.urlopen(f"{base_url}/players?{query}")
+                    logger.error(f"✗ 负数分页参数没有返回400: {query}")
+                    return False
+                except urllib.error.HTTPError as e:
+                    if e.code != 400:
+                        raise
+            
+            # 每个索引使用自己的队伍维度表，不修改共用的维度表
+            from team_registry import default_team_registry
+            if store.index.team_registry is default_team_registry():
+                logger.error("✗ 索引修改了共用的队伍维度表")
+                return False
+            
+            request = urllib.request.Request(f"{base_url}/players/S1MPLE", headers={'If-None-Match': etag})
+            try:
+                urllib.request.urlopen(request)
+                logger.error("✗ ETag 未变化时没有返回304")
+                return False
+            except urllib.error.HTTPError as e:
+                if e.code != 304:
+                    raise
+            
+            snapshot.write_text("姓名,队伍,国籍,年龄,游戏内位置\ndonk,Team Spirit,Russia,18,Rifler\n", encoding='utf-8')
+            os.utime(snapshot, (time.time() + 10, time.time() + 10))
+            store.reload()
+            with urllib.request.urlopen(f"{base_url}/players/donk") as response:
+                if json.load(response)['team'] != 'Team Spirit' or response.headers['ETag'] == etag:
+                    logger.error("✗ 快照更新后索引没有替换")
+                    return False
+        finally:
+            server.shutdown()
+            server.server_close()
+    
+    logger.info("✓ 只读数据服务测试通过")
+    return True
+
+def test_updater_daemon():
+    """测试守护进程的均匀调度、请求上限、名单重载与快照"""
+    logger.info("开始测试守护进程模式...")
+    
+    import tempfile
+    from players_updater import PlayersUpdater, PlayerInfo as UpdaterPlayerInfo
+    from updater_daemon import UpdaterDaemon
+    
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            Path("players.csv").write_text("姓名,队伍,国籍,年龄,游戏内位置\ns1mple,,,,\nZywOo,,,,\n", encoding='utf-8')
+            updater = PlayersUpdater()
+            updater.title_resolver.resolve = lambda names: 0
+            
+            def fake_fetch(name):
+                # 每个选手发出一个请求
+                updater.request_count += 1
+                return UpdaterPlayerInfo(name=name, team="Team Vitality", nationality="France", role="AWPer")
+            updater.get_player_info_from_liquipedia = fake_fetch
+            
+            # 一轮40秒、2个选手 -> 间隔20秒；每小时60个请求 -> 每个请求至少60秒
+            daemon = UpdaterDaemon(updater, cycle_seconds=40, max_requests_per_hour=60)
+            daemon.reload()
+            daemon.start_cycle()
+            if daemon.spacing != 20:
+                logger.error(f"✗ 刷新间隔错误: {daemon.spacing}")
+                return False
+            daemon.step()
+            if not 59 <= daemon.next_step_at - time.monotonic() <= 60:
+                logger.error("✗ 没有遵守每小时请求上限")
+                return False
+            
+            Path("players.csv").write_text("姓名,队伍,国籍,年龄,游戏内位置\ns1mple,,,,\ndonk,,,,\n", encoding='utf-8')
+            daemon.reload()
+            if list(daemon.queue) != ['donk']:
+                logger.error(f"✗ 重新读取名单后队列错误: {list(daemon.queue)}")
+                return False
+            
+            daemon.step()
+            daemon.write_snapshot()
+            rows = Path("output/updated_players.csv").read_text(encoding='utf-8-sig').splitlines()
+            if [row.split(',')[0] for row in rows[1:]] != ['s1mple', 'donk'] or 'Team Vitality' not in rows[2]:
+                logger.error(f"✗ 快照内容错误: {rows}")
+                return False
+        finally:
+            os.chdir(cwd)
+    
+    logger.info("✓ 守护进程模式测试通过")
+    return True
+
+def test_record_merge():
+    """测试按字段合并、来源优先级与K路归并"""
+    logger.info("开始测试多来源合并...")
+    
+    from record_merge import merge_lists, merge_sorted
+    
+    hltv = [
+        PlayerInfo(name="ZywOo", team="Team Vitality", role="AWPer", source="HLTV"),
+        PlayerInfo(name="s1mple", team="Natus Vincere", nationality="Russia", source="HLTV"),
+    ]
+    liquipedia = [
+        PlayerInfo(name="S1mple", nationality="Ukraine", birth_date="1997-10-02", source="Liquipedia"),
+        PlayerInfo(name="donk", team="Team Spirit", source="Liquipedia"),
+    ]
+    merged = {player.name.lower(): player for player in merge_lists([hltv, liquipedia])}
+    
+    if [name for name in merged] != ['donk', 's1mple', 'zywoo']:
+        logger.error(f"✗ 合并结果错误: {list(merged)}")
+        return False
+    s1mple = merged['s1mple']
+    # 国籍两个来源都有，取优先级更高的Liquipedia；队伍只有HLTV有，不会被丢掉
+    if (s1mple.nationality, s1mple.team, s1mple.birth_date) != ("Ukraine", "Natus Vincere", "1997-10-02"):
+        logger.error(f"✗ 字段级合并错误: {s1mple}")
+        return False
+    
+    try:
+        list(merge_sorted([hltv]))
+        logger.error("✗ 未排序的输入没有报错")
+        return False
+    except ValueError:
+        pass
+    
+    logger.info("✓ 多来源合并测试通过")
+    return True
+
+def test_warc_reparse():
+    """测试WARC存档的写入/读取与离线重新解析"""
+    logger.info("开始测试WARC存档与重新解析...")
+    
+    import json
+    import tempfile
+    import gzip
+    from warc_archive import WarcWriter, iter_warc_records, record_spans
+    from reparse import reparse_archives, reparse_file, split_archives
+    
+    infobox = ('<div class="infobox-cell-2">Team:</div><div>Team Spirit</div>'
+               '<div class="infobox-cell-2">Nationality:</div><div>Russia</div>'
+               '<div class="infobox-cell-2">Born:</div><div>January 24, 2007 (age 19)</div>')
+    lead_section = {'parse': {'title': 'Donk', 'text': infobox}}
+    wikitext = {'parse': {'title': 'ZywOo', 'wikitext': {
+        '*': "{{Infobox player\n|team=Team Vitality\n|nationality=France\n|role=[[AWPer]]\n}}"}}}
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        writer = WarcWriter(tmp_dir, max_file_size=1)
+        base = "https://liquipedia.net/counterstrike/api.php"
+        writer.write_response(f"{base}?action=parse&page=donk&section=0&prop=text", 200, 'OK',
+                              {'Content-Encoding': 'gzip'}, json.dumps(lead_section).encode('utf-8'))
+        writer.write_response(f"{base}?action=parse&page=ZywOo&format=json&prop=wikitext", 200, 'OK',
+                              {}, json.dumps(wikitext).encode('utf-8'))
+        writer.write_response(f"{base}?action=query&titles=x", 200, 'OK', {}, b'{}')
+        
+        files = sorted(Path(tmp_dir).glob('*.warc.gz'))
+        if len(files) != 3:
+            logger.error(f"✗ 超过大小上限后没有换新文件: {files}")
+            return False
+        record = next(iter_warc_records(files[0]))
+        if 'Content-Encoding' in record.headers or record.headers['Content-Length'] != str(len(record.body)):
+            logger.error(f"✗ 存档的响应头错误: {record.headers}")
+            return False
+        
+        players = {}
+        for warc_file in files:
+            results, total, errors = reparse_file(warc_file)
+            if errors:
+                logger.error(f"✗ 重新解析出错: {errors}")
+                return False
+            players.update((key, fields) for key, _, fields in results)
+    
+    # 单个存档文件按记录切分后由多个进程处理
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        writer = WarcWriter(tmp_dir)
+        for i in range(10):
+            body = {'parse': {'title': f'Player{i}', 'text': infobox}}
+            writer.write_response(f"{base}?action=parse&page=Player{i}&section=0&prop=text", 200, 'OK',
+                                  {}, json.dumps(body).encode('utf-8'))
+        warc_file = writer.path
+        # 末尾截断的记录被跳过
+        with open(warc_file, 'ab') as f:
+            f.write(gzip.compress(b'WARC/1.1\r\n')[:10])
+        chunks = split_archives([warc_file], chunk_records=3)
+        plain_file = Path(tmp_dir) / "plain.warc"
+        plain_file.write_bytes(gzip.decompress(b''.join(
+            warc_file.read_bytes()[start:end] for start, end in record_spans(warc_file))))
+        plain_spans = list(record_spans(plain_file))
+        plain_records = [record.url for start, end in plain_spans[4:6]
+                         for record in iter_warc_records(plain_file, start, end)]
+        parallel = reparse_archives([str(warc_file)], workers=2, chunk_records=3)
+    
+    # warcinfo + 10 条响应 = 11 条记录，每段3条
+    if len(chunks) != 4 or len(plain_spans) != 11:
+        logger.error(f"✗ 存档切分错误: {chunks}, {len(plain_spans)}")
+        return False
+    if plain_records != [f"{base}?action=parse&page=Player{i}&section=0&prop=text" for i in (3, 4)]:
+        logger.error(f"✗ 按字节范围读取记录错误: {plain_records}")
+        return False
+    if sorted(parallel) != sorted(f"player{i}" for i in range(10)):
+        logger.error(f"✗ 并行重新解析结果错误: {sorted(parallel)}")
+        return False
+    
+    donk, zywoo = players.get('donk'), players.get('zywoo')
+    if not donk or (donk['team'], donk['birth_date']) != ('Team Spirit', '2007-01-24'):
+        logger.error(f"✗ 首段响应重新解析错误: {donk}")
+        return False
+    if not zywoo or (zywoo['team'], zywoo['nationality']) != ('Team Vitality', 'France'):
+        logger.error(f"✗ wikitext响应重新解析错误: {zywoo}")
+        return False
+    
+    logger.info("✓ WARC存档与重新解析测试通过")
+    return True
+
+def test_adaptive_timeout():
+    """测试按延迟分位数计算的超时与运行截止时间"""
+    logger.info("开始测试自适应超时...")
+    
+    from request_guard import AdaptiveTimeout, DeadlineExceeded
+    
+    timeouts = AdaptiveTimeout()
+    url = "https://liquipedia.net/counterstrike/s1mple"
+    if timeouts.timeout(url) != TIMEOUT_CONFIG['default']:
+        logger.error("✗ 没有样本时应使用默认超时")
+        return False
+    
+    for i in range(100):
+        timeouts.record('liquipedia.net', 'connect', 0.05)
+        timeouts.record('liquipedia.net', 'read', 10.0 if i == 99 else 2.0)
+    connect, read = timeouts.timeout(url)
+    # 连接: 0.05 x 1.5 低于下限；读取: p99 = 2.0 (偶发的10秒不影响) x 1.5
+    if connect != TIMEOUT_CONFIG['floor'][0] or abs(read - 3.0) > 1e-9:
+        logger.error(f"✗ 自适应超时计算错误: {(connect, read)}")
+        return False
+    if timeouts.timeout("https://www.hltv.org/stats") != TIMEOUT_CONFIG['default']:
+        logger.error("✗ 不同主机的样本没有分开记录")
+        return False
+    
+    expired = AdaptiveTimeout(run_deadline=0.01)
+    time.sleep(0.02)
+    try:
+        expired.request(lambda *args, **kwargs: None, url)
+        logger.error("✗ 超过截止时间后仍然发送了请求")
+        return False
+    except DeadlineExceeded:
+        pass
+    
+    logger.info("✓ 自适应超时测试通过")
+    return True
+
+def test_parse_cache():
+    """测试按正文哈希的解析缓存与重复请求合并"""
+    logger.info("开始测试解析缓存...")
+    
+    import tempfile
+    import threading
+    from parse_cache import ParseCache, SingleFlight
+    
+    calls = []
+    def parse():
+        calls.append(1)
+        return {'Team:': 'Team Spirit'}
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_file = os.path.join(tmp_dir, 'parse_cache.json')
+        cache = ParseCache('v1', cache_file)
+        cache.get_or_parse(b'<html>donk</html>', parse)
+        cache.get_or_parse(b'<html>donk</html>', parse)
+        # 没有信息框的结果 (None) 也要缓存
+        cache.get_or_parse(b'<html>other</html>', lambda: None)
+        cache.save()
+        
+        reloaded = ParseCache('v1', cache_file)
+        if (reloaded.get_or_parse(b'<html>donk</html>', parse) != {'Team:': 'Team Spirit'}
+                or reloaded.get_or_parse(b'<html>other</html>', parse) is not None or len(calls) != 1):
+            logger.error(f"✗ 相同正文重复解析: {len(calls)} 次")
+            return False
+        if ParseCache('v2', cache_file).entries:
+            logger.error("✗ 解析器版本变化后旧缓存没有失效")
+            return False
+    
+    flight = SingleFlight()
+    release = threading.Event()
+    fetches = []
+    def fetch():
+        fetches.append(1)
+        release.wait(5)
+        return 'page'
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('url', fetch))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while flight.shared < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    if len(fetches) != 1 or results != ['page'] * 4:
+        logger.error(f"✗ 并发请求没有合并: 请求 {len(fetches)} 次")
+        return False
+    
+    logger.info("✓ 解析缓存测试通过")
+    return True
+
+def test_text_cleaning():
+    """测试共用的文本清洗流水线"""
+    logger.info("开始测试文本清洗流水线...")
+    
+    from text_cleaning import TextCleaner, clean_text, clean_texts
+    
+    cases = {
+        "  Natus \n Vincere ": "Natus Vincere",
+        "[[Ukraine]]": "Ukraine",
+        "[[Team Spirit|Spirit]]": "Spirit",
+        "<b>FaZe</b> Clan": "FaZe Clan",
+        "'''MOUZ'''": "MOUZ",
+        "\u201cs1mple\u201d": "s1mple",
+        "Astralis\u200b\xa0": "Astralis",
+        "\uff27\uff12 Esports": "G2 Esports",
+        "": "",
+    }
+    for text, expected in cases.items():
+        if clean_text(text) != expected:
+            logger.error(f"✗ 清洗结果错误: {text!r} -> {clean_text(text)!r}，期望 {expected!r}")
+            return False
+    
+    texts = list(cases) * 3
+    if clean_texts(texts) != [clean_text(text) for text in texts]:
+        logger.error("✗ 批量清洗与逐个清洗结果不一致")
+        return False
+    
+    # 关闭的步骤不执行
+    if TextCleaner({'strip_quotes': False, 'remove_html_tags': False}).clean('"<b>x</b>"') != '"<b>x</b>"':
+        logger.error("✗ 清洗开关没有生效")
+        return False
+    
+    logger.info("✓ 文本清洗流水线测试通过")
+    return True
+
+def test_team_roster():
+    """测试队伍页面阵容解析与按队伍刷新"""
+    logger.info("开始测试按队伍刷新...")
+    
+    import tempfile
+    from types import SimpleNamespace
+    from bs4 import BeautifulSoup
+    from players_updater import PlayersUpdater, PlayerInfo as UpdaterPlayerInfo
+    from team_roster import parse_team_roster
+    
+    def row(title, name, nationality, position):
+        return (f'<tr class="Player"><td class="ID"><span class="flag"><a href="/counterstrike/Category:{nationality}" '
+                f'title="{nationality}"><img alt="{nationality}" title="{nationality}"/></a></span>&nbsp;'
+                f'<a href="/counterstrike/{title}" title="{title}">{name}</a></td><td class="Name">(x)</td>'
+                f'<td class="Position"><div class="MobileStuff">Position:</div>{position}</td></tr>')
+    html = ('<html><head><title>Natus Vincere - Liquipedia</title></head><body>'
+            '<table class="wikitable roster-card"><tr><th>Active Squad</th></tr>'
+            + row("S1mple", "s1mple", "Ukraine", "AWPer") + row("B1t", "b1t", "Ukraine", "Rifler") +
+            '</table><table class="wikitable roster-card"><tr><th>Former Squad</th></tr>'
+            + row("Electronic", "electronic", "Russia", "Rifler") + '</table></body></html>')
+    
+    roster = parse_team_roster(BeautifulSoup(html, 'html.parser'))
+    if [(e.name, e.nationality, e.role) for e in roster] != [("s1mple", "Ukraine", "AWPer"), ("b1t", "Ukraine", "Rifler")]:
+        logger.error(f"✗ 阵容解析错误: {roster}")
+        return False
+    
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            updater = PlayersUpdater()
+            updater.title_resolver.resolve = lambda names: 0
+            # 队伍页面标题使用单独的解析缓存
+            updater.team_resolver.resolve = lambda names: 0
+            if updater.team_resolver.cache_file == updater.title_resolver.cache_file:
+                logger.error("✗ 队伍标题与选手标题共用了缓存文件")
+                return False
+            requested = []
+            def fake_request(url, stream=False):
+                requested.append(url)
+                return SimpleNamespace(text=html, content=html.encode('utf-8'))
+            updater._make_request = fake_request
+    
+            existing = {
+                "s1mple": UpdaterPlayerInfo(name="s1mple", team="Natus Vincere", birth_date="1997-10-02"),
+                "b1t": UpdaterPlayerInfo(name="b1t", team="Natus Vincere"),
+                "electronic": UpdaterPlayerInfo(name="electronic", team="Natus Vincere"),
+                "dev1ce": UpdaterPlayerInfo(name="dev1ce", team="Astralis"),
+            }
+            updated, remaining = updater.refresh_by_team(list(existing), existing)
+        finally:
+            os.chdir(cwd)
+    
+    # 一个队伍页面更新两名现役选手；已离队的选手和单人队伍逐个刷新
+    if len(requested) != 1 or sorted(remaining) != ["dev1ce", "electronic"]:
+        logger.error(f"✗ 按队伍分组错误: 请求 {requested}, 逐个刷新 {remaining}")
+        return False
+    s1mple = next(player for player in updated if player.name == "s1mple")
+    if s1mple.nationality != "Ukraine" or s1mple.role != "AWPer" or s1mple.birth_date != "1997-10-02":
+        logger.error(f"✗ 阵容数据没有正确更新选手: {s1mple}")
+        return False
+    
+    logger.info("✓ 按队伍刷新测试通过")
+    return True
+    
+def test_transfer_feed():
+    """测试转会页面解析与高水位"""
+    logger.info("开始测试转会动态...")
+    
+    import tempfile
+    from bs4 import BeautifulSoup
+    from transfer_feed import TransferFeed, index_roster, parse_transfer_page
+    
+    def row(date, title, name, old, new):
+        def team(t):
+            return f'<span data-highlightingclass="{t}"><a href="/counterstrike/{t}" title="{t}">x</a></span>' if t else ''
+        return (f'<div class="divRow"><div class="divCell Date">{date}</div><div class="divCell Name">'
+                f'<span class="flag"><a href="/c" title="Denmark"></a></span><a href="/counterstrike/{title}" title="{title}">{name}</a></div>'
+                f'<div class="divCell Team OldTeam">{team(old)}</div><div class="divCell Team NewTeam">{team(new)}</div></div>')
+    html = ('<div class="divTable">' + row("2026-10-15", "Device", "dev1ce", "Astralis", "Ninjas in Pyjamas")
+            + row("2026-10-12", "B1t", "b1t", "Natus Vincere", "") + '</div>')
+    
+    transfers = parse_transfer_page(BeautifulSoup(html, 'html.parser'))
+    if [(t.player, t.from_team, t.to_team) for t in transfers] != [
+            ("dev1ce", "Astralis", "Ninjas in Pyjamas"), ("b1t", "Natus Vincere", "")]:
+        logger.error(f"✗ 转会页面解析错误: {transfers}")
+        return False
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        state_file = os.path.join(tmp_dir, "transfer_feed.json")
+        feed = TransferFeed(state_file)
+        if [t.player for t in feed.new_transfers(transfers)] != ["b1t", "dev1ce"]:
+            logger.error("✗ 首次运行应按日期处理页面上的所有转会")
+            return False
+        feed.advance(transfers)
+        feed.save()
+    
+        # 同一天新增的转会仍要处理，已处理的不再重复
+        later = transfers + parse_transfer_page(BeautifulSoup(
+            row("2026-10-15", "Blamef", "blameF", "Astralis", "Team Vitality"), 'html.parser'))
+        feed = TransferFeed(state_file)
+        if [t.player for t in feed.new_transfers(later)] != ["blameF"] or feed.has_gap(later):
+            logger.error(f"✗ 高水位过滤错误: {feed.high_water_mark}")
+            return False
+    
+    # 页面上新的在前：同一选手同一天两次转会，较早的先处理
+    same_day = parse_transfer_page(BeautifulSoup(
+        row("2026-10-16", "Device", "dev1ce", "Ninjas in Pyjamas", "Astralis")
+        + row("2026-10-16", "Device", "dev1ce", "Astralis", "Ninjas in Pyjamas"), 'html.parser'))
+    ordered = TransferFeed(os.path.join(tempfile.gettempdir(), "missing_feed.json")).new_transfers(same_day)
+    if [t.to_team for t in ordered] != ["Ninjas in Pyjamas", "Astralis"]:
+        logger.error(f"✗ 同一天的转会顺序错误: {[t.to_team for t in ordered]}")
+        return False
+    
+    # 更新器按顺序应用转会并显式分配新队伍的ID
+    from types import SimpleNamespace
+    from players_updater import PlayersUpdater, PlayerInfo as UpdaterPlayerInfo
+    page = ('<div class="divTable">' + row("2026-10-16", "Device", "dev1ce", "Ninjas in Pyjamas", "Astralis")
+            + row("2026-10-16", "Device", "dev1ce", "Astralis", "Ninjas in Pyjamas") + '</div>').encode('utf-8')
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            updater = PlayersUpdater()
+            updater._make_request = lambda url, stream=False: SimpleNamespace(content=page, text=page.decode('utf-8'))
+            # 标题只有解析之后才能查到
+            resolved = []
+            updater.title_resolver.resolve = lambda names: resolved.extend(names) or 0
+            updater.title_resolver.lookup = lambda name: {'title': 'Device', 'missing': False} if name in resolved else None
+            updater.team_resolver.resolve = lambda names: 0
+            updater.refresh_player = lambda name, old_info: old_info
+            existing = {"dev1ce": UpdaterPlayerInfo(name="dev1ce", team="Ninjas in Pyjamas"),
+                        "b1t": UpdaterPlayerInfo(name="b1t", team="Natus Vincere")}
+            players = updater.update_from_transfers(existing)
+        finally:
+            os.chdir(cwd)
+    if not players or players[0].team != "Astralis" or players[0].team_id != updater.team_registry.find("Astralis"):
+        logger.error(f"✗ 转会没有正确写入新队伍: {players}")
+        return False
+    # 名单先批量解析标题，输出统一分配队伍ID
+    if set(resolved) != set(existing) or any(player.team_id < 0 for player in players):
+        logger.error(f"✗ 没有解析名单标题或统一队伍ID: {resolved} {players}")
+        return False
+    
+    # 名单中的名字通过已缓存的规范标题匹配转会记录中的页面标题
+    index = index_roster(["dev1ce"], lambda name: {'title': 'Device', 'missing': False})
+    if index.get('device') != "dev1ce":
+        logger.error("✗ 没有通过规范标题匹配选手")
+        return False
+    
+    logger.info("✓ 转会动态测试通过")
+    return True
+    
+def test_memory_guard():
+    """测试内存受限模式：有界链接队列、背压与阶段峰值统计"""
+    logger.info("开始测试内存上限...")
+    
+    import threading
+    from types import SimpleNamespace
+    from memory_guard import MemoryGuard, PeakTracker
+    
+    if MemoryGuard(None).over_budget():
+        logger.error("✗ 未设置上限时不应触发背压")
+        return False
+    
+    rows = ''.join(f'<tr><td><a href="/counterstrike/Player{i}">Player{i}</a></td></tr>' for i in range(10))
+    page = SimpleNamespace(text=f'<table class="wikitable">{rows}</table>', close=lambda: None)
+    
+    # 1MB 的上限一定超出：抓取下一页之前释放缓存并等待队列清空，所有链接仍然都要处理
+    old_size = MEMORY_CONFIG['link_queue_size']
+    MEMORY_CONFIG['link_queue_size'] = 3
+    try:
+        crawler = CS2PlayerCrawler(max_rss_mb=1)
+        crawler.memory_guard.check_interval = 0
+        request_threads = set()
+        def fake_request(url, **kwargs):
+            request_threads.add(threading.current_thread())
+            return page
+        crawler._make_request = fake_request
+        processed = []
+        crawler._get_player_info_from_liquipedia = lambda url: processed.append(url)
+        crawler.crawl_liquipedia_by_region()
+    finally:
+        MEMORY_CONFIG['link_queue_size'] = old_size
+    
+    regions = len(DATA_SOURCES['liquipedia']['regions'])
+    stats = crawler.memory_guard.stats()
+    if len(processed) != 10 * regions:
+        logger.error(f"✗ 有界队列丢失了链接: 处理 {len(processed)} 个")
+        return False
+    if request_threads != {threading.main_thread()}:
+        logger.error(f"✗ 解析线程不应发出请求: {request_threads}")
+        return False
+    # 每个列表页之后背压一次；选手页面阶段每个选手之前只释放缓存
+    if stats['背压次数'] != regions or stats['释放缓存次数'] != regions + 10 * regions:
+        logger.error(f"✗ 超出上限时没有施加背压: {stats}")
+        return False
+    
+    tracker = PeakTracker()
+    with tracker.stage('分配'):
+        data = [bytes(1024) for _ in range(2048)]
+    del data
+    tracker.stop()
+    if tracker.stats().get('分配', 0) < 2:
+        logger.error(f"✗ 阶段峰值统计错误: {tracker.stats()}")
+        return False
+    
+    logger.info("✓ 内存上限测试通过")
+    return True
+    
 def run_all_tests():
     """运行所有测试"""
     logger.info("开始运行所有测试...")
@@ -259,6 +1762,31 @@ def run_all_tests():
         ("知名选手爬取", test_famous_players_crawl),
         ("数据清洗功能", test_data_cleaning),
         ("CSV操作", test_csv_operations),
+        ("负缓存与熔断器", test_request_guard),
+        ("标题解析", test_title_resolver),
+        ("刷新调度", test_refresh_scheduler),
+        ("分片爬取", test_sharding),
+        ("多进程分片", test_shard_workers),
+        ("首段抓取", test_lead_section),
+        ("HLTV统计表解析", test_hltv_stats_parser),
+        ("流式信息框解析", test_infobox_stream),
+        ("统计汇总", test_stats_aggregator),
+        ("出生日期与年龄", test_birth_dates),
+        ("CSV批量加载", test_csv_loader),
+        ("Cookie持久化", test_cookie_store),
+        ("抓取计划", test_fetch_plan),
+        ("本地角色库", test_role_database),
+        ("队伍维度表", test_team_registry),
+        ("只读数据服务", test_player_api),
+        ("守护进程模式", test_updater_daemon),
+        ("多来源合并", test_record_merge),
+        ("WARC存档与重新解析", test_warc_reparse),
+        ("自适应超时", test_adaptive_timeout),
+        ("解析缓存", test_parse_cache),
+        ("文本清洗流水线", test_text_cleaning),
+        ("按队伍刷新", test_team_roster),
+        ("转会动态", test_transfer_feed),
+        ("内存上限", test_memory_guard),
     ]
     
     passed = 0
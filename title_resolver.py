@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Liquipedia标题解析器
+通过MediaWiki API (redirects=1) 批量把名单中的名字解析为规范标题，
+识别不存在的页面和消歧义页面，并持久化结果，之后的请求直接访问最终URL。
+"""
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import quote, urlencode
+
+from config import CACHE_CONFIG, DATA_SOURCES
+
+logger = logging.getLogger(__name__)
+
+# MediaWiki API 单次查询最多50个标题
+MAX_TITLES_PER_QUERY = 50
+# 页面地址中不编码的字符 (与 MediaWiki 的 wfUrlencode 一致，'?' '&' '#' 等需要编码)
+PAGE_URL_SAFE = ";:@$!*(),/~'"
+
+
+class TitleResolver:
+    """批量解析并缓存选手页面的规范标题"""
+
+    def __init__(self, request_func: Callable[[str], Optional[object]],
+                 cache_file: Optional[str] = None,
+                 base_url: str = DATA_SOURCES['liquipedia']['base_url']):
+        """
+        request_func: 接收URL、返回Response(失败返回None)的函数，
+                      一般传入爬虫的 _make_request 以共享限速和熔断
+        """
+        if cache_file is None:
+            cache_file = os.path.join(CACHE_CONFIG['cache_dir'], CACHE_CONFIG['title_cache_file'])
+        self.cache_file = Path(cache_file)
+        self.request_func = request_func
+        self.base_url = base_url
+        self.api_url = f"{base_url}/api.php"
+        self.entries: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self):
+        if not self.cache_file.exists():
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+            logger.info("加载了 %s 条标题解析缓存", len(self.entries))
+        except (OSError, ValueError) as e:
+            logger.warning("标题缓存读取失败，将重新解析: %s", e)
+
+    def save(self):
+        """原子写入缓存文件"""
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = Path(f"{self.cache_file}.{os.getpid()}.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_file, self.cache_file)
+
+    def _is_fresh(self, entry: Dict) -> bool:
+        if entry.get('missing') or entry.get('disambiguation'):
+            ttl = CACHE_CONFIG['missing_title_ttl']
+        else:
+            ttl = CACHE_CONFIG['title_ttl']
+        return time.time() - entry.get('resolved_at', 0) < ttl
+
+    def lookup(self, name: str) -> Optional[Dict]:
+        """返回缓存的解析结果: {'title', 'missing', 'disambiguation', 'resolved_at'}"""
+        return self.entries.get(name)
+
+    def title_of(self, name: str) -> str:
+        """返回解析后的页面标题 (未解析或不存在时退回原始名字)"""
+        entry = self.entries.get(name)
+        return entry['title'] if entry and not entry.get('missing') else name
+
+    def page_url(self, name: str) -> str:
+        """返回选手页面的最终URL (未解析时退回原始名字)，标题按 MediaWiki 的方式百分号编码"""
+        return f"{self.base_url}/{quote(self.title_of(name).replace(' ', '_'), safe=PAGE_URL_SAFE)}"
+
+    def pending(self, names: Iterable[str]) -> List[str]:
+        """返回需要(重新)解析的名字"""
+        return [name for name in names
+                if name not in self.entries or not self._is_fresh(self.entries[name])]
+
+    def resolve(self, names: Iterable[str]) -> int:
+        """批量解析未缓存或已过期的名字，返回实际发出的API请求数"""
+        batches = self.batches(names)
+        if not batches:
+            return 0
+
+        logger.info("需要解析 %s 个标题", sum(len(batch) for batch in batches))
+        request_count = 0
+        for batch in batches:
+            request_count += 1
+            if not self._resolve_batch(batch):
+                logger.warning("标题解析失败，%s 个名字将使用原始URL", len(batch))
+
+        logger.info("标题解析完成，共 %s 次API请求", request_count)
+        return request_count
+
+    def batches(self, names: Iterable[str]) -> List[List[str]]:
+        """把需要解析的名字按每次查询的上限分批"""
+        pending = list(dict.fromkeys(self.pending(names)))
+        return [pending[start:start + MAX_TITLES_PER_QUERY]
+                for start in range(0, len(pending), MAX_TITLES_PER_QUERY)]
+
+    def query_url(self, names: List[str]) -> str:
+        """一批名字对应的 action=query 请求地址"""
+        params = {
+            'action': 'query',
+            'format': 'json',
+            'formatversion': '2',
+            'redirects': '1',
+            'prop': 'pageprops',
+            'ppprop': 'disambiguation',
+            'titles': '|'.join(name.replace('_', ' ') for name in names),
+        }
+        return f"{self.api_url}?{urlencode(params)}"
+
+    def _resolve_batch(self, names: List[str]) -> bool:
+        response = self.request_func(self.query_url(names))
+        if not response:
+            return False
+
+        try:
+            data = response.json()
+        except ValueError as e:
+            logger.error("标题解析响应不是有效JSON: %s", e)
+            return False
+
+        query = data.get('query', {})
+        normalized = {item['from']: item['to'] for item in query.get('normalized', [])}
+        redirects = {item['from']: item['to'] for item in query.get('redirects', [])}
+        pages = {page['title']: page for page in query.get('pages', [])}
+
+        now = time.time()
+        for name in names:
+            title = name.replace('_', ' ')
+            title = normalized.get(title, title)
+            # 重定向可能是链式的，最多跟随几跳，防止循环
+            for _ in range(5):
+                if title not in redirects:
+                    break
+                title = redirects[title]
+
+            page = pages.get(title, {})
+            entry = {
+                'title': title,
+                'missing': bool(page.get('missing') or page.get('invalid')) or not page,
+                'disambiguation': 'disambiguation' in page.get('pageprops', {}),
+                'resolved_at': now,
+            }
+            if title != name.replace('_', ' '):
+                logger.info("标题解析: %s -> %s", name, title)
+            if entry['disambiguation']:
+                logger.warning("%s 指向消歧义页面: %s", name, title)
+            self.entries[name] = entry
+
+        return True
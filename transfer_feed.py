@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Liquipedia 转会动态
+解析转会门户页面 (Portal:Transfers) 的转会记录，按上次运行的高水位 (最新转会日期) 只取新记录：
+  - 直接把新队伍写入名单中对应的选手
+  - 只把这些选手标记为需要重新抓取
+日常运行只需请求几个转会页面，而不是名单中的每个选手 (players_updater.py --transfers)。
+"""
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from config import CACHE_CONFIG
+from sharding import normalize_title
+from text_cleaning import clean_text
+
+logger = logging.getLogger(__name__)
+
+_DATE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+
+@dataclass
+class Transfer:
+    """一名选手的一次转会 (队伍为空表示没有队伍：自由选手/退役)"""
+    date: str  # YYYY-MM-DD
+    player: str  # 显示的ID
+    title: str  # 选手页面标题
+    from_team: str = ""
+    to_team: str = ""
+
+    @property
+    def key(self) -> str:
+        return f"{self.date}|{normalize_title(self.title)}|{self.from_team}|{self.to_team}"
+
+
+def _team_of(cell) -> str:
+    if cell is None:
+        return ""
+    # 队伍模板上的高亮类名就是队伍页面标题；没有时取队伍链接
+    template = cell.find(attrs={'data-highlightingclass': True})
+    if template:
+        return clean_text(template['data-highlightingclass'])
+    link = cell.find('a', title=True)
+    return clean_text(link['title']) if link else ""
+
+
+def parse_transfer_page(soup) -> List[Transfer]:
+    """解析转会页面中的所有转会记录 (一行可能包含多名选手)"""
+    transfers = []
+    for row in soup.select('div.divRow'):
+        date_cell = row.select_one('.Date')
+        match = _DATE.search(date_cell.get_text()) if date_cell else None
+        name_cell = row.select_one('.Name')
+        if not match or name_cell is None:
+            continue
+        from_team = _team_of(row.select_one('.OldTeam'))
+        to_team = _team_of(row.select_one('.NewTeam'))
+        for link in name_cell.find_all('a', title=True):
+            # 国旗链接指向国家分类页面
+            if link.find_parent(class_='flag'):
+                continue
+            transfers.append(Transfer(date=match.group(0), player=clean_text(link.get_text()),
+                                      title=clean_text(link['title']), from_team=from_team, to_team=to_team))
+    return transfers
+
+
+class TransferFeed:
+    """记录已处理到的转会日期 (高水位) 与该日期已处理的记录，跨运行持久化"""
+
+    def __init__(self, state_file: Optional[str] = None):
+        if state_file is None:
+            state_file = os.path.join(CACHE_CONFIG['cache_dir'], CACHE_CONFIG['transfer_feed_file'])
+        self.state_file = Path(state_file)
+        self.high_water_mark = ""
+        # 高水位当天已处理的记录 (同一天之后可能还会新增转会)
+        self.seen: Set[str] = set()
+        self._load()
+
+    def _load(self):
+        if not self.state_file.exists():
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.high_water_mark = data['high_water_mark']
+            self.seen = set(data['seen'])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("转会动态状态读取失败，将处理页面上的所有转会: %s", e)
+
+    def save(self):
+        """原子写入状态文件"""
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = Path(f"{self.state_file}.{os.getpid()}.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'high_water_mark': self.high_water_mark, 'seen': sorted(self.seen)}, f,
+                      ensure_ascii=False, indent=1)
+        os.replace(tmp_file, self.state_file)
+
+    def new_transfers(self, transfers: List[Transfer]) -> List[Transfer]:
+        """
+        返回高水位之后的转会，按发生顺序从旧到新排列 (同一选手后发生的转会覆盖先发生的)
+        transfers 按页面顺序传入：页面上新的在前，同一天的转会按页面位置倒序
+        """
+        new = [t for t in transfers
+               if t.date > self.high_water_mark or (t.date == self.high_water_mark and t.key not in self.seen)]
+        ordered = sorted(enumerate(new), key=lambda item: (item[1].date, -item[0]))
+        return [transfer for _, transfer in ordered]
+
+    def has_gap(self, transfers: List[Transfer]) -> bool:
+        """页面上最早的转会也在高水位之后：中间的转会已不在页面上，可能有遗漏"""
+        return bool(self.high_water_mark and transfers
+                    and min(t.date for t in transfers) > self.high_water_mark)
+
+    def advance(self, transfers: List[Transfer]):
+        """把高水位推进到已处理的最新日期"""
+        if not transfers:
+            return
+        latest = max(t.date for t in transfers)
+        if latest > self.high_water_mark:
+            self.high_water_mark = latest
+            self.seen = set()
+        self.seen.update(t.key for t in transfers if t.date == self.high_water_mark)
+
+
+def index_roster(names, title_lookup) -> Dict[str, str]:
+    """{规范键: 名单中的名字}，同时收录名字本身和已缓存的页面标题 (不发请求)"""
+    index = {}
+    for name in names:
+        index[normalize_title(name)] = name
+        entry = title_lookup(name)
+        if entry and not entry.get('missing'):
+            index.setdefault(normalize_title(entry['title']), name)
+    return index
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+更新器守护进程模式
+常驻运行，复用已通过Cloudflare验证的会话和内存中的选手数据，
+把一轮全量刷新均匀分散到 cycle_seconds 内 (同时不超过每小时请求上限)，
+定期写出快照 (output/updated_players.csv，player_api.py 会自动加载)。
+
+信号:
+  SIGHUP  重新读取 players.csv (新增选手优先刷新，删除的选手不再输出)
+  SIGUSR1 立即开始新一轮刷新，只受请求上限限制
+  SIGTERM/SIGINT 写出快照并保存缓存后退出
+"""
+import logging
+import signal
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict
+
+from config import DAEMON_CONFIG
+from players_updater import PlayerInfo, PlayersUpdater
+from stats_aggregator import StatsAggregator
+
+logger = logging.getLogger(__name__)
+
+
+class UpdaterDaemon:
+    """持续调度刷新的常驻更新器"""
+
+    def __init__(self, updater: PlayersUpdater, players_file: str = "players.csv",
+                 output_file: str = "updated_players.csv",
+                 cycle_seconds: float = DAEMON_CONFIG['cycle_seconds'],
+                 max_requests_per_hour: int = DAEMON_CONFIG['max_requests_per_hour'],
+                 snapshot_interval: float = DAEMON_CONFIG['snapshot_interval']):
+        self.updater = updater
+        self.players_file = players_file
+        self.output_file = output_file
+        self.cycle_seconds = cycle_seconds
+        # 每个请求至少占用的时间，保证不超过每小时请求上限
+        self.request_interval = 3600 / max_requests_per_hour
+        self.snapshot_interval = snapshot_interval
+
+        # 名单 (players.csv 的顺序) 与每个选手的最新数据
+        self.existing_data: Dict[str, PlayerInfo] = {}
+        self.current: Dict[str, PlayerInfo] = {}
+        self.queue: Deque[str] = deque()
+        # 本轮相邻两次刷新之间的目标间隔 (秒)
+        self.spacing = 0.0
+        # 下一次刷新的时间，以及请求上限允许的最早时间 (time.monotonic)
+        self.next_step_at = 0.0
+        self.rate_ready_at = 0.0
+        self.cycles = 0
+        self.dirty = False
+        self.last_snapshot = time.monotonic()
+
+        self._wake = threading.Event()
+        self._reload_requested = False
+        self._refresh_requested = False
+        self._stop_requested = False
+
+    # ---- 信号 ----
+
+    def install_signal_handlers(self):
+        handlers = {
+            'SIGHUP': self.request_reload,
+            'SIGUSR1': self.request_refresh,
+            'SIGTERM': self.request_stop,
+            'SIGINT': self.request_stop,
+        }
+        for name, handler in handlers.items():
+            # Windows 没有 SIGHUP/SIGUSR1
+            signum = getattr(signal, name, None)
+            if signum is not None:
+                signal.signal(signum, lambda *_, handler=handler: handler())
+
+    def request_reload(self):
+        self._reload_requested = True
+        self._wake.set()
+
+    def request_refresh(self):
+        self._refresh_requested = True
+        self._wake.set()
+
+    def request_stop(self):
+        self._stop_requested = True
+        self._wake.set()
+
+    # ---- 名单与调度 ----
+
+    def reload(self) -> bool:
+        """重新读取名单：已刷新的数据保留，新增选手插到队首，删除的选手移出队列"""
+        existing_data = self.updater.load_existing_players(self.players_file)
+        if not existing_data:
+            # 读取失败时继续使用旧名单
+            return False
+
+        added = [name for name in existing_data if name not in self.existing_data]
+        removed = [name for name in self.existing_data if name not in existing_data]
+        self.current = {name: self.current.get(name, info) for name, info in existing_data.items()}
+        self.existing_data = existing_data
+        self.queue = deque(name for name in self.queue if name in existing_data)
+        self.queue.extendleft(reversed(added))
+        if self.cycles and added:
+            self.updater.title_resolver.resolve(added)
+        self.dirty = self.dirty or bool(added or removed)
+        logger.info("名单已加载: %s 个选手 (新增 %s, 删除 %s)", len(existing_data), len(added), len(removed))
+        return True
+
+    def start_cycle(self, urgent: bool = False):
+        """按优先级排出新一轮的刷新顺序；urgent 时不做均匀分散，只受请求上限限制"""
+        if self.cycles:
+            self._finish_cycle()
+        self.cycles += 1
+
+        names = self.updater.plan_refresh(self.current)
+        self.queue = deque(names)
+        self.updater.stats = StatsAggregator()
+        # 上一轮抓到的页面不能在本轮直接复用
+        self.updater.page_flight.reset()
+        # 每轮只解析一次标题，结果进入缓存
+        self.updater.title_resolver.resolve(names)
+
+        self.spacing = 0.0 if urgent or not names else self.cycle_seconds / len(names)
+        logger.info("开始第 %s 轮刷新: %s 个选手, 间隔 %.1f 秒%s", self.cycles, len(names), self.spacing,
+                    " (立即刷新)" if urgent else "")
+
+    def _finish_cycle(self):
+        """一轮结束：合并队伍别名，输出本轮统计"""
+        self.updater.team_registry.learn_redirects(self.updater.team_resolver)
+        self.updater.team_registry.canonicalize(self.current.values())
+        stats = self.updater.stats
+        if stats is not None:
+            logger.info("第 %s 轮刷新结束: 成功 %s, 使用旧数据 %s, 失败 %s", self.cycles,
+                        stats.counters['refreshed'], stats.counters['fallback'], stats.counters['failed'])
+        logger.info(self.updater.download_stats.summary())
+
+    def step(self):
+        """刷新队首的一个选手，并安排下一次刷新的时间"""
+        if not self.queue:
+            self.start_cycle()
+            if not self.queue:
+                self.next_step_at = self.rate_ready_at = time.monotonic() + self.cycle_seconds
+                return
+
+        name = self.queue.popleft()
+        requests_before = self.updater.request_count
+        info = self.updater.refresh_player(name, self.current.get(name))
+        if info is not None:
+            self.current[name] = info
+            self.dirty = True
+
+        now = time.monotonic()
+        # 请求上限按本次实际发出的请求数计算 (负缓存命中等情况不发请求)
+        self.rate_ready_at = now + (self.updater.request_count - requests_before) * self.request_interval
+        self.next_step_at = max(now + self.spacing, self.rate_ready_at)
+
+    # ---- 快照 ----
+
+    def write_snapshot(self):
+        """按名单顺序写出当前数据并保存缓存"""
+        players = [self.current[name] for name in self.existing_data]
+        self.updater.save_updated_players(players, self.output_file)
+        self.updater.save_state()
+        self.dirty = False
+        self.last_snapshot = time.monotonic()
+
+    def _snapshot_due(self) -> bool:
+        return self.dirty and time.monotonic() - self.last_snapshot >= self.snapshot_interval
+
+    # ---- 主循环 ----
+
+    def run(self):
+        if not self.reload():
+            logger.error("没有可刷新的选手，守护进程退出")
+            return
+        self.start_cycle()
+
+        while not self._stop_requested:
+            if self._reload_requested:
+                self._reload_requested = False
+                self.reload()
+            if self._refresh_requested:
+                self._refresh_requested = False
+                self.start_cycle(urgent=True)
+                self.next_step_at = self.rate_ready_at
+
+            if self._snapshot_due():
+                self.write_snapshot()
+
+            now = time.monotonic()
+            if now >= self.next_step_at:
+                self.step()
+                continue
+
+            # 等到下一次刷新或快照时间；期间收到信号时立即醒来
+            wait = self.next_step_at - now
+            if self.dirty:
+                wait = min(wait, max(0.0, self.last_snapshot + self.snapshot_interval - now))
+            self._wake.wait(wait)
+            self._wake.clear()
+
+        if self.cycles:
+            self._finish_cycle()
+        self.write_snapshot()
+        logger.info("守护进程已停止，共刷新 %s 轮", self.cycles)
+
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WARC 抓取存档
+1. WarcWriter: 把抓取到的响应写成 WARC 1.1 response 记录，每条记录单独gzip压缩 (.warc.gz)，
+   文件超过大小上限后换新文件
+2. iter_warc_records: 顺序读取 .warc.gz (或其中一段) 中的 response 记录，供 reparse.py 离线重新解析
+3. record_spans: 列出每条记录在文件中的字节范围，reparse.py 据此把一个文件切成多段并行处理
+
+requests 返回的正文已经解压，存档时去掉 Content-Encoding/Transfer-Encoding 并按解压后的长度
+重写 Content-Length，记录中的正文就是解析器看到的内容。
+"""
+import base64
+import gzip
+import hashlib
+import io
+import logging
+import os
+import uuid
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import WARC_CONFIG
+
+logger = logging.getLogger(__name__)
+
+WARC_VERSION = b'WARC/1.1'
+# 正文已解压/已合并分块，这些响应头不再适用
+DROPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length'}
+
+
+@dataclass
+class WarcRecord:
+    """一条 response 记录"""
+    url: str
+    date: str
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+
+def _warc_date() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _build_record(warc_type: str, url: Optional[str], content_type: str, block: bytes) -> bytes:
+    headers = [
+        ('WARC-Type', warc_type),
+        ('WARC-Record-ID', f'<urn:uuid:{uuid.uuid4()}>'),
+        ('WARC-Date', _warc_date()),
+    ]
+    if url:
+        headers.append(('WARC-Target-URI', url))
+    headers.append(('Content-Type', content_type))
+    headers.append(('WARC-Block-Digest', 'sha1:' + base64.b32encode(hashlib.sha1(block).digest()).decode()))
+    headers.append(('Content-Length', str(len(block))))
+    head = WARC_VERSION + b'\r\n' + b''.join(f'{k}: {v}\r\n'.encode('utf-8') for k, v in headers) + b'\r\n'
+    return head + block + b'\r\n\r\n'
+
+
+class WarcWriter:
+    """按大小轮换的 .warc.gz 写入器"""
+
+    def __init__(self, directory: str = WARC_CONFIG['directory'], prefix: str = 'capture',
+                 max_file_size: int = WARC_CONFIG['max_file_size']):
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.max_file_size = max_file_size
+        self.path: Optional[Path] = None
+        self.serial = 0
+        self.records = 0
+
+    def _open_next(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
+        self.path = self.directory / f"{self.prefix}-{stamp}-{os.getpid()}-{self.serial:05d}.warc.gz"
+        self.serial += 1
+        info = "software: prodown\r\nformat: WARC File Format 1.1\r\n".encode('utf-8')
+        self._append(_build_record('warcinfo', None, 'application/warc-fields', info))
+        logger.info("WARC存档写入: %s", self.path)
+
+    def _append(self, record: bytes):
+        # 每条记录一个gzip成员，文件在任意记录之后截断仍可读取
+        with open(self.path, 'ab') as f:
+            f.write(gzip.compress(record))
+
+    def write_response(self, url: str, status: int, reason: str, headers: Dict[str, str], body: bytes):
+        if self.path is None or self.path.stat().st_size >= self.max_file_size:
+            self._open_next()
+        lines = [f"HTTP/1.1 {status} {reason}"]
+        lines += [f"{k}: {v}" for k, v in headers.items() if k.lower() not in DROPPED_HEADERS]
+        lines.append(f"Content-Length: {len(body)}")
+        block = ('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8') + body
+        self._append(_build_record('response', url, 'application/http;msgtype=response', block))
+        self.records += 1
+
+    def capture(self, response):
+        """存档一个 requests/cloudscraper 的 Response (正文必须已完整读取)"""
+        self.write_response(response.url, response.status_code, response.reason or '',
+                            dict(response.headers), response.content)
+
+
+def _read_headers(stream) -> Dict[str, str]:
+    headers = {}
+    while True:
+        line = stream.readline()
+        if not line or line in (b'\r\n', b'\n'):
+            return headers
+        key, _, value = line.decode('utf-8', 'replace').partition(':')
+        headers[key.strip()] = value.strip()
+
+
+def iter_warc_records(path, start: int = 0, end: Optional[int] = None) -> Iterator[WarcRecord]:
+    """
+    读取一个 .warc.gz (或未压缩的 .warc) 文件中的 response 记录
+    start/end: 只读取该字节范围 (必须是 record_spans 给出的记录边界)
+    """
+    gzipped = str(path).endswith('.gz')
+    with open(path, 'rb') as raw:
+        if start or end is not None:
+            raw.seek(start)
+            raw = io.BytesIO(raw.read(-1 if end is None else end - start))
+        # 多个gzip成员依次解压
+        stream = gzip.GzipFile(fileobj=raw) if gzipped else raw
+        yield from _parse_records(stream, path)
+
+
+def _parse_records(stream, path) -> Iterator[WarcRecord]:
+    while True:
+        line = stream.readline()
+        if not line:
+            return
+        if not line.strip():
+            continue
+        if not line.startswith(b'WARC/'):
+            raise ValueError(f"{path} 不是有效的WARC文件: {line[:40]!r}")
+        warc_headers = _read_headers(stream)
+        block = stream.read(int(warc_headers.get('Content-Length', 0)))
+        if warc_headers.get('WARC-Type') != 'response':
+            continue
+
+        head, _, body = block.partition(b'\r\n\r\n')
+        status_line, _, header_text = head.partition(b'\r\n')
+        parts = status_line.split(b' ', 2)
+        headers = {}
+        for header_line in header_text.split(b'\r\n'):
+            key, _, value = header_line.decode('utf-8', 'replace').partition(':')
+            if key:
+                headers[key.strip()] = value.strip()
+        yield WarcRecord(url=warc_headers.get('WARC-Target-URI', ''), date=warc_headers.get('WARC-Date', ''),
+                         status=int(parts[1]) if len(parts) > 1 else 0, headers=headers, body=body)
+
+
+def record_spans(path, read_size: int = 256 * 1024) -> Iterator[Tuple[int, int]]:
+    """
+    返回文件中每条记录的字节范围 (start, end)，不解析记录内容
+    .warc.gz 每条记录是一个gzip成员，按成员边界切分 (只解压，丢弃输出)；末尾截断的成员跳过
+    """
+    if not str(path).endswith('.gz'):
+        yield from _plain_record_spans(path)
+        return
+
+    with open(path, 'rb') as f:
+        offset = 0
+        pending = b''
+        while True:
+            if not pending:
+                pending = f.read(read_size)
+                if not pending:
+                    return
+            start = offset
+            member = zlib.decompressobj(wbits=31)
+            while True:
+                member.decompress(pending)
+                if member.eof:
+                    offset += len(pending) - len(member.unused_data)
+                    pending = member.unused_data
+                    break
+                offset += len(pending)
+                pending = f.read(read_size)
+                if not pending:
+                    logger.warning("%s 在 %s 字节处截断，忽略最后一条不完整的记录", path, start)
+                    return
+            yield start, offset
+
+
+def _plain_record_spans(path) -> Iterator[Tuple[int, int]]:
+    with open(path, 'rb') as f:
+        while True:
+            start = f.tell()
+            line = f.readline()
+            if not line:
+                return
+            if not line.strip():
+                continue
+            warc_headers = _read_headers(f)
+            f.seek(int(warc_headers.get('Content-Length', 0)), os.SEEK_CUR)
+            yield start, f.tell()
+
+
+def find_warc_files(paths: List[str]) -> List[Path]:
+    """展开命令行给出的文件/目录，返回所有 .warc / .warc.gz 文件"""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(p for p in path.rglob('*') if p.name.endswith(('.warc', '.warc.gz'))))
+        elif path.exists():
+            files.append(path)
+        else:
+            logger.warning("存档不存在: %s", path)
+    return files